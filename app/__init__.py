@@ -1,3 +1,11 @@
-from .agent import zerodha_agent, ZerodhaAgent, root_agent
+from typing import Any
 
 __all__ = ['zerodha_agent', 'ZerodhaAgent', 'root_agent']
+
+
+def __getattr__(name: str) -> Any:
+    # Importing app (or app.config, app.tools, ...) must not pull in the agent and its numeric stack
+    if name in __all__:
+        from . import agent
+        return getattr(agent, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,115 @@
+"""
+Multi-account portfolio aggregation
+
+Each client account is served by its own ZerodhaAgent session, stored in its
+own session file. Portfolios are
+fetched concurrently, large books have their metrics computed in a process
+pool so one account's number crunching does not hold up the event loop, and
+the per-account summaries are consolidated into one.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .agent import ZerodhaAgent
+from .config import config
+from .portfolio import calculate_portfolio_metrics, merge_summaries
+
+logger = logging.getLogger(__name__)
+
+
+def _book_size(portfolio: Dict[str, Any]) -> int:
+    """Number of holding and position rows in a fetched portfolio"""
+    size = 0
+    for section in ('holdings', 'positions'):
+        data = portfolio.get(section, {}).get('data')
+        size += len(data) if isinstance(data, list) else 0
+    return size
+
+
+class MultiAccountAggregator:
+    """Per-account and consolidated portfolio summaries across many sessions"""
+
+    def __init__(self, agents: Dict[str, ZerodhaAgent],
+                 max_concurrency: int = config.ACCOUNT_FETCH_CONCURRENCY,
+                 workers: Optional[int] = config.ACCOUNT_METRICS_WORKERS):
+        owners: Dict[str, str] = {}
+        for account_id, agent in agents.items():
+            path = os.path.abspath(agent.session_store.path)
+            if path in owners:
+                raise ValueError(f"Accounts {owners[path]} and {account_id} share the session file {path}; "
+                                 f"create each agent with ZerodhaAgent(account_id=...)")
+            owners[path] = account_id
+        self.agents = agents
+        self.max_concurrency = max_concurrency
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _fetch(self, semaphore: asyncio.Semaphore, agent: ZerodhaAgent) -> Dict[str, Any]:
+        async with semaphore:
+            if not agent.is_logged_in:
+                await agent.initialize()
+            return await agent.fetch_portfolio_data()
+
+    async def _summarise(self, agent: ZerodhaAgent, portfolio: Dict[str, Any]) -> Dict[str, Any]:
+        args = (portfolio['holdings'], portfolio['positions'], portfolio['margins'], agent.sector_map)
+        if _book_size(portfolio) < config.ACCOUNT_POOL_MIN_ROWS:
+            # Shipping a small book to another process costs more than computing it
+            return calculate_portfolio_metrics(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), calculate_portfolio_metrics, *args)
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Fetch every account and build per-account and consolidated summaries"""
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        account_ids = list(self.agents)
+        fetched = await asyncio.gather(
+            *(self._fetch(semaphore, self.agents[account_id]) for account_id in account_ids),
+            return_exceptions=True
+        )
+
+        pending: List[Tuple[str, Dict[str, Any]]] = []
+        accounts: Dict[str, Any] = {}
+        for account_id, portfolio in zip(account_ids, fetched):
+            if isinstance(portfolio, BaseException):
+                logger.error(f"Error fetching portfolio for account {account_id}: {portfolio}")
+                accounts[account_id] = {'error': str(portfolio)}
+            else:
+                pending.append((account_id, portfolio))
+
+        summaries = await asyncio.gather(
+            *(self._summarise(self.agents[account_id], portfolio) for account_id, portfolio in pending),
+            return_exceptions=True
+        )
+        for (account_id, portfolio), summary in zip(pending, summaries):
+            if isinstance(summary, BaseException):
+                logger.error(f"Error calculating metrics for account {account_id}: {summary}")
+                accounts[account_id] = {'error': str(summary)}
+            else:
+                accounts[account_id] = {
+                    'summary': summary,
+                    'stale_sections': portfolio.get('stale_sections', []),
+                }
+
+        return {
+            'accounts': accounts,
+            'consolidated': merge_summaries([a['summary'] for a in accounts.values() if 'summary' in a]),
+            'failed_accounts': [account_id for account_id, a in accounts.items() if 'error' in a],
+            'elapsed': time.perf_counter() - started,
+        }
+
+    def close(self) -> None:
+        """Shut down the metrics process pool"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
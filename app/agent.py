@@ -2,19 +2,51 @@
 Zerodha AI Agent for portfolio management, order placement, and live market data
 """
 
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
+from datetime import date, datetime, time, timedelta
+import asyncio
 import logging
+import uuid
+
+import numpy as np
+
+from . import scoring
+from .bars import BarAggregator
+from .candle_cache import CandleCache, format_timestamp, request_range, to_epoch
+from .config import config
+from .gtt import GTTEngine
+from .indicators import IndicatorState
+from .instruments import InstrumentMaster
+from .order_updates import OrderUpdate, OrderUpdateStream
+from .orderbook import OrderBook
+from .portfolio import PortfolioArrays, _column, _rows, available_margin, calculate_metrics
+from .quote_cache import QuoteCache
+from .ratelimit import DEFAULT_ENDPOINT, ENDPOINTS, RateLimiter
+from .resilience import Resilience
+from .risk import PreTradeRiskEngine, RiskDecision, symbol_key
+from .session import SessionStore, session_path
+from .streaming import TickStream
+from .transport import AiohttpToolBackend, ThreadedToolBackend, ToolBackend
+from .utils import chunked
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Portfolio section -> (tool, value used when the tool returns nothing)
+PORTFOLIO_SECTIONS: Dict[str, Any] = {
+    'holdings': ('d94_get_holdings', {'data': []}),
+    'positions': ('d94_get_positions', {'data': []}),
+    'margins': ('d94_get_margins', {'data': {}}),
+    'mutual_funds': ('d94_get_mf_holdings', {'data': []}),
+}
+
+MAX_TAG_LENGTH = 20  # Kite order tags are at most 20 characters
+
 class ZerodhaAgent:
     """
     Zerodha AI Agent for portfolio management, order placement, and live market data
     """
     
-    def __init__(self):
+    def __init__(self, account_id: Optional[str] = None, session_file: Optional[str] = None):
         # Simple agent configuration
         self.agent_config = {
             'model': 'gemini-2.0-flash-001',
@@ -32,58 +64,149 @@ class ZerodhaAgent:
             Ask for confirmation before placing any orders that involve significant amounts.'''
         }
         self.is_logged_in = False
+        # One session file per account: agents never share or overwrite tokens
+        self.session_store = SessionStore(session_file or session_path(account_id))
+        self._session_task: Optional['asyncio.Future[None]'] = None  # Login in flight
+        self._session_generation = 0  # Sessions started by this process
+        self.instrument_master: Optional[InstrumentMaster] = None
+        self.instrument_cache_dir = config.INSTRUMENT_CACHE_DIR
+        self._instrument_master_date: Optional[str] = None
+        self._instrument_lock: Optional[asyncio.Lock] = None
+        self.candle_cache = CandleCache(config.CANDLE_CACHE_DIR)
+        self.quote_cache = QuoteCache(ttl=config.MARKET_DATA_REFRESH_INTERVAL)
+        self._quote_semaphore: Optional[asyncio.Semaphore] = None
+        self.rate_limiter = RateLimiter(config.RATE_LIMITS, window=config.RATE_LIMIT_DELAY)
+        self.resilience = Resilience()  # Retries, hedging and circuit breakers for reads
+        self.backend: ToolBackend = (AiohttpToolBackend(config.TOOL_SERVER_URL) if config.TOOL_SERVER_URL
+                                     else ThreadedToolBackend())
+        self._portfolio_sections: Dict[str, Any] = {}
+        self.portfolio_arrays: Optional[PortfolioArrays] = None  # Latest holdings, re-priced by quotes
+        self.risk_engine = PreTradeRiskEngine()  # Seeded from each portfolio fetch
+        self.order_book = OrderBook()  # Mirror of today's orders, merged on each sync
+        self._order_book_date: Optional[date] = None
+        self._placed_tags: Dict[str, Optional[str]] = {}  # Basket idempotency key -> order id
+        self._ambiguous_tags: set = set()  # Keys whose placement outcome is unknown
+        self._pending_tags: Dict[str, asyncio.Future] = {}  # Keys being placed right now
+        self.sector_map: Dict[str, str] = {}  # tradingsymbol -> sector for the sector breakdown
+        self.tick_stream: Optional[TickStream] = None
+        self._quote_tokens: Dict[str, int] = {}  # Instrument -> instrument token, learned from quotes
+        self.order_updates: Optional[OrderUpdateStream] = None
+        self.gtt_engine: Optional[GTTEngine] = None  # Local GTTs, evaluated on the tick stream
+        self.bar_aggregator: Optional[BarAggregator] = None  # Today's bars built from streamed ticks
+        self.indicator_state = IndicatorState()  # Daily indicators up to yesterday's close
+        self._indicator_dates: Dict[str, date] = {}  # Instrument -> day its state was seeded
+        self._indicator_retry: Dict[str, float] = {}  # Instrument -> loop time a failed seed may be retried
         
     async def initialize(self) -> bool:
-        """Initialize the agent and login to Zerodha"""
+        """Make sure there is a session: the cached token if still valid, otherwise a login"""
         try:
-            # Login to Kite API
-            login_result = await self._login()
-            if login_result:
-                self.is_logged_in = True
-                logger.info("Successfully logged in to Zerodha Kite")
-                return True
-            else:
-                logger.error("Failed to login to Zerodha Kite")
-                return False
+            await self.ensure_session()
+            return True
         except Exception as e:
             logger.error(f"Error during initialization: {e}")
             return False
     
-    async def _login(self) -> bool:
-        """Login to Zerodha Kite API"""
+    async def ensure_session(self) -> None:
+        """Reuse the stored token or log in; concurrent callers share one login"""
+        if self.is_logged_in:
+            return
+        if self._session_task is None:
+            self._session_task = asyncio.ensure_future(self._start_session())
+        task = self._session_task
         try:
-            # The d94_login tool will be called directly by the environment
-            # This is a placeholder for the actual implementation
-            logger.info("Attempting to login to Zerodha Kite API...")
-            return True  # Placeholder - actual implementation will use the d94_login tool
-        except Exception as e:
-            logger.error(f"Login error: {e}")
-            return False
+            await asyncio.shield(task)
+        finally:
+            if task.done() and self._session_task is task:
+                self._session_task = None
+    
+    async def _start_session(self) -> None:
+        loop = asyncio.get_running_loop()
+        session = None if self._session_generation else await loop.run_in_executor(None, self.session_store.load)
+        if session is None:
+            session = await self._login()
+        else:
+            logger.info("Reusing stored Zerodha Kite session")
+        self.backend.set_session(session.get('access_token'))
+        self._session_generation += 1
+        self.is_logged_in = True
+    
+    async def _login(self) -> Dict[str, Any]:
+        """Log in through the d94_login tool and store the new session"""
+        logger.info("Attempting to login to Zerodha Kite API...")
+        result = await self._call('d94_login')
+        if isinstance(result, dict) and result.get('status') == 'error':
+            raise RuntimeError(result.get('message') or "Login failed")
+        # The environment's tool may manage the session itself and return nothing
+        data = (result or {}).get('data') or {}
+        loop = asyncio.get_running_loop()
+        session = await loop.run_in_executor(
+            None, self.session_store.save, data.get('access_token'), data.get('user_id'))
+        logger.info("Successfully logged in to Zerodha Kite")
+        return session
+    
+    async def _reauthenticate(self, generation: int) -> None:
+        """Replace an expired session once, however many callers noticed it"""
+        if generation == self._session_generation and self.is_logged_in:
+            self.is_logged_in = False
+            await asyncio.get_running_loop().run_in_executor(None, self.session_store.clear)
+        await self.ensure_session()
+    
+    async def _call(self, tool_name: str, **kwargs: Any) -> Any:
+        """Call a d94_ tool once the rate limiter admits it, logging in first if needed"""
+        return await self._authenticated(tool_name, kwargs, resilient=False)
+    
+    async def _read(self, tool_name: str, **kwargs: Any) -> Any:
+        """Call an idempotent read tool with retries, hedged requests and its circuit breaker
+        
+        Every attempt and every hedge takes its own rate-limit token before it
+        is sent; only the backend call itself is timed, bounded by the timeout
+        and hedged.
+        """
+        return await self._authenticated(tool_name, kwargs, resilient=True)
+    
+    async def _authenticated(self, tool_name: str, kwargs: Dict[str, Any], resilient: bool) -> Any:
+        """Send a tool call, logging in first if needed and again if the token has expired"""
+        if not self.is_logged_in and tool_name != 'd94_login':
+            await self.ensure_session()
+        generation = self._session_generation
+        result = await self._send(tool_name, kwargs, resilient)
+        if isinstance(result, dict) and result.get('error_type') == 'TokenException' and tool_name != 'd94_login':
+            # Expired or revoked token: log in again once and repeat the call
+            await self._reauthenticate(generation)
+            result = await self._send(tool_name, kwargs, resilient)
+        return result
+    
+    async def _send(self, tool_name: str, kwargs: Dict[str, Any], resilient: bool) -> Any:
+        endpoint, lane = ENDPOINTS.get(tool_name, DEFAULT_ENDPOINT)
+        if not resilient:
+            await self.rate_limiter.acquire(endpoint, lane)
+            return await self.backend.call(tool_name, **kwargs)
+        return await self.resilience.call(
+            tool_name, lambda: self.backend.call(tool_name, **kwargs),
+            acquire=lambda: self.rate_limiter.acquire(endpoint, lane),
+            try_acquire=lambda: self.rate_limiter.try_acquire(endpoint, lane),
+        )
+    
+    async def use_backend(self, backend: ToolBackend) -> None:
+        """Send tool calls through backend from now on, closing the previous one"""
+        previous, self.backend = self.backend, backend
+        if previous is not backend:
+            await previous.close()
+    
+    async def close(self) -> None:
+        """Release the transport's pooled connections"""
+        await self.backend.close()
     
     async def get_portfolio_summary(self) -> Dict[str, Any]:
         """Get comprehensive portfolio summary"""
-        if not self.is_logged_in:
-            await self.initialize()
-        
         try:
-            portfolio_data: Dict[str, Any] = {}
-            
-            # Note: These functions will use the actual d94_ tools when available
-            # For now, they return placeholder data
-            holdings_data: Dict[str, Any] = {'data': []}
-            positions_data: Dict[str, Any] = {'data': []}
-            margins_data: Dict[str, Any] = {'data': {}}
-            
-            portfolio_data['holdings'] = holdings_data
-            portfolio_data['positions'] = positions_data
-            portfolio_data['margins'] = margins_data
-            portfolio_data['mutual_funds'] = {'data': []}
+            portfolio_data = await self.fetch_portfolio_data()
             
             # Calculate portfolio metrics
             portfolio_data['summary'] = self._calculate_portfolio_metrics(
-                holdings_data, 
-                positions_data, 
-                margins_data
+                portfolio_data['holdings'], 
+                portfolio_data['positions'], 
+                portfolio_data['margins']
             )
             
             return portfolio_data
@@ -92,50 +215,54 @@ class ZerodhaAgent:
             logger.error(f"Error fetching portfolio: {e}")
             return {'error': str(e)}
     
+    async def fetch_portfolio_data(self) -> Dict[str, Any]:
+        """Fetch holdings, positions, margins and mutual funds concurrently
+        
+        Each section is read with its own retries, but all of them share one
+        API_TIMEOUT deadline, so a hung section cannot hold up the summary
+        for longer than that. A section that fails or misses the deadline
+        falls back to its last good value, flagged with 'stale': True, and is
+        listed under 'stale_sections'.
+        """
+        sections = list(PORTFOLIO_SECTIONS)
+        tasks = [asyncio.ensure_future(self._read(PORTFOLIO_SECTIONS[section][0])) for section in sections]
+        try:
+            _, late = await asyncio.wait(tasks, timeout=config.API_TIMEOUT)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if late:
+            await asyncio.gather(*late, return_exceptions=True)
+        
+        portfolio_data: Dict[str, Any] = {'stale_sections': []}
+        for section, task in zip(sections, tasks):
+            result = asyncio.TimeoutError() if task in late else task.exception() or task.result()
+            if isinstance(result, BaseException):
+                error = str(result) or f"timed out after {config.API_TIMEOUT}s"
+                logger.warning(f"Portfolio {section} unavailable, serving last known data: {error}")
+                fallback = self._portfolio_sections.get(section, PORTFOLIO_SECTIONS[section][1])
+                portfolio_data[section] = dict(fallback, stale=True, error=error)
+                portfolio_data['stale_sections'].append(section)
+            else:
+                data = result or PORTFOLIO_SECTIONS[section][1]
+                self._portfolio_sections[section] = data
+                portfolio_data[section] = data
+        
+        self.risk_engine.seed(portfolio_data['holdings'], portfolio_data['positions'], portfolio_data['margins'])
+        return portfolio_data
+    
     def _calculate_portfolio_metrics(self, holdings: Dict[str, Any], positions: Dict[str, Any], margins: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate portfolio performance metrics"""
+        """Calculate portfolio performance metrics
+        
+        The holdings arrays are only rebuilt for newly fetched holdings; in
+        between, get_live_quotes re-prices them in place.
+        """
         try:
-            total_invested = 0.0
-            current_value = 0.0
-            total_pnl = 0.0
-            
-            # Calculate from holdings
-            if holdings and 'data' in holdings and isinstance(holdings['data'], list):
-                for holding in holdings['data']:
-                    if isinstance(holding, dict):
-                        avg_price = holding.get('average_price', 0)
-                        quantity = holding.get('quantity', 0)
-                        last_price = holding.get('last_price', 0)
-                        pnl = holding.get('pnl', 0)
-                        
-                        invested = float(avg_price or 0) * float(quantity or 0)
-                        current = float(last_price or 0) * float(quantity or 0)
-                        total_invested += invested
-                        current_value += current
-                        total_pnl += float(pnl or 0)
-            
-            # Add positions PnL
-            if positions and 'data' in positions and isinstance(positions['data'], list):
-                for position in positions['data']:
-                    total_pnl += float(position.get('pnl', 0))
-            
-            available_margin = 0.0
-            if margins and 'data' in margins:
-                margin_data = margins['data']
-                if isinstance(margin_data, dict) and 'equity' in margin_data:
-                    equity_data = margin_data['equity']
-                    if isinstance(equity_data, dict) and 'available' in equity_data:
-                        available_data = equity_data['available']
-                        if isinstance(available_data, dict):
-                            available_margin = float(available_data.get('cash', 0))
-            
-            return {
-                'total_invested': total_invested,
-                'current_value': current_value,
-                'total_pnl': total_pnl,
-                'return_percentage': (total_pnl / total_invested * 100) if total_invested > 0 else 0,
-                'available_margin': available_margin
-            }
+            rows = _rows(holdings)
+            arrays = self.portfolio_arrays
+            if arrays is None or arrays.rows is not rows:
+                arrays = self.portfolio_arrays = PortfolioArrays(rows, self.sector_map)
+            return calculate_metrics(arrays, _column(_rows(positions), 'pnl'), available_margin(margins))
         except Exception as e:
             logger.error(f"Error calculating metrics: {e}")
             return {}
@@ -143,23 +270,118 @@ class ZerodhaAgent:
     async def search_instruments(self, query: str, filter_type: str = "name") -> List[Dict[str, Any]]:
         """Search for trading instruments"""
         try:
-            # Placeholder implementation - in real environment, this would use d94_search_instruments
-            # return d94_search_instruments(query=query, filter_on=filter_type).get('data', [])
-            return []
+            master = await self._get_instrument_master()
+            if master is not None and filter_type in master.indexes:
+                return master.search(query, filter_type, limit=config.INSTRUMENT_SEARCH_LIMIT)
+            
+            # Fall back to the remote search for filters the local index does not cover
+            result = await self._call('d94_search_instruments', query=query, filter_on=filter_type)
+            return (result or {}).get('data', [])
         except Exception as e:
             logger.error(f"Error searching instruments: {e}")
             return []
     
+    async def get_instrument_universe(self, exchange: str, instrument_type: str) -> List[Dict[str, Any]]:
+        """Every instrument of a type on an exchange, from the local instrument master"""
+        master = await self._get_instrument_master()
+        if master is None:
+            return []
+        return master.records(master.filter(exchange=exchange, instrument_type=instrument_type))
+    
+    async def _get_instrument_master(self) -> Optional[InstrumentMaster]:
+        """Get the local instrument master, loading it at most once a day"""
+        today = date.today().isoformat()
+        if self._instrument_master_date == today:
+            return self.instrument_master
+        
+        if self._instrument_lock is None:
+            self._instrument_lock = asyncio.Lock()
+        async with self._instrument_lock:
+            if self._instrument_master_date != today:
+                try:
+                    self.instrument_master = await self._load_instrument_master(today)
+                except Exception as e:
+                    logger.warning(f"Instrument master unavailable, using remote search: {e}")
+                self._instrument_master_date = today
+        return self.instrument_master
+    
+    async def _load_instrument_master(self, today: str) -> Optional[InstrumentMaster]:
+        """Open the stored master, refreshing it from the instrument dump when stale"""
+        loop = asyncio.get_running_loop()
+        master = await loop.run_in_executor(None, InstrumentMaster.open, self.instrument_cache_dir)
+        if master is not None and master.as_of == today:
+            return master
+        
+        result = await self._call('d94_get_instruments')
+        instruments = (result or {}).get('data', [])
+        if not instruments:
+            # Keep serving the previous dump rather than nothing
+            return master
+        return await loop.run_in_executor(
+            None, InstrumentMaster.refresh, self.instrument_cache_dir, instruments, today
+        )
+    
     async def get_live_quotes(self, instruments: List[str]) -> Dict[str, Any]:
-        """Get live market quotes for instruments"""
+        """Get live market quotes for instruments
+        
+        With a tick stream attached, instruments it carries are quoted from
+        their latest tick; the rest, and all of them once the stream has gone
+        quiet, come from the API through the quote cache.
+        """
         try:
-            # Placeholder implementation - in real environment, this would use d94_get_quotes
-            # return d94_get_quotes(instruments=instruments).get('data', {})
-            return {}
+            streamed = self._streamed_quotes(instruments)
+            rest = [instrument for instrument in instruments if instrument not in streamed]
+            quotes = await self.quote_cache.get(rest, self._fetch_quotes) if rest else {}
+            for instrument, data in quotes.items():
+                if isinstance(data, dict) and data.get('instrument_token'):
+                    self._quote_tokens[instrument] = data['instrument_token']
+            quotes.update(streamed)
+            prices = {instrument: float(data['last_price']) for instrument, data in quotes.items()
+                      if isinstance(data, dict) and data.get('last_price')}
+            for instrument, price in prices.items():
+                self.risk_engine.update_price(instrument, price)
+            if self.portfolio_arrays is not None and prices:
+                self.portfolio_arrays.update_last_prices(prices)
+            return quotes
         except Exception as e:
             logger.error(f"Error fetching quotes: {e}")
             return {}
     
+    def _streamed_quotes(self, instruments: List[str]) -> Dict[str, Any]:
+        """Quotes from the tick stream for instruments whose token is known and streamed
+        
+        LTP-mode ticks carry no day range or volume, so those instruments are
+        left to the API.
+        """
+        stream = self.tick_stream
+        if stream is None or stream.idle() > config.STREAM_QUOTE_MAX_IDLE:
+            return {}
+        symbols = {self._quote_tokens[instrument]: instrument for instrument in instruments
+                   if instrument in self._quote_tokens}
+        return {instrument: quote for instrument, quote in stream.quotes(symbols).items() if 'ohlc' in quote}
+    
+    async def _fetch_quotes(self, instruments: List[str]) -> Dict[str, Any]:
+        """Fetch quotes from the API in concurrent batches, bypassing the cache"""
+        if self._quote_semaphore is None:
+            self._quote_semaphore = asyncio.Semaphore(config.QUOTE_MAX_CONCURRENCY)
+        
+        async def fetch_batch(batch: List[str]) -> Dict[str, Any]:
+            async with self._quote_semaphore:
+                result = await self._read('d94_get_quotes', instruments=batch)
+                return (result or {}).get('data', {})
+        
+        batches = chunked(instruments, config.QUOTE_BATCH_SIZE)
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches), return_exceptions=True)
+        
+        # A failed batch only loses its own instruments
+        quotes: Dict[str, Any] = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error fetching quotes for {len(batch)} instruments: {result}")
+            else:
+                quotes.update(result)
+        return quotes
+    
     async def place_order(self, 
                          exchange: str,
                          trading_symbol: str,
@@ -170,58 +392,269 @@ class ZerodhaAgent:
                          price: Optional[float] = None,
                          trigger_price: Optional[float] = None,
                          validity: str = "DAY",
-                         variety: str = "regular") -> Dict[str, Any]:
-        """Place a trading order"""
+                         variety: str = "regular",
+                         tag: Optional[str] = None,
+                         confirmed: bool = False) -> Dict[str, Any]:
+        """Place a trading order
+        
+        The order is checked against the pre-trade risk limits first, and its
+        value stays reserved against them while it is submitted. Orders above
+        MAX_ORDER_VALUE are returned with 'requires_confirmation' set unless
+        confirmed is True.
+        """
         try:
-            # Validate order parameters
-            if transaction_type not in ["BUY", "SELL"]:
-                return {"error": "Invalid transaction type. Use BUY or SELL"}
-            
-            if order_type not in ["MARKET", "LIMIT", "SL", "SL-M"]:
-                return {"error": "Invalid order type"}
-            
-            if product not in ["CNC", "NRML", "MIS", "MTF"]:
-                return {"error": "Invalid product type"}
-            
-            # Prepare order parameters
-            order_params: Dict[str, Union[str, int, float]] = {
-                "variety": variety,
-                "exchange": exchange,
-                "tradingsymbol": trading_symbol,
-                "transaction_type": transaction_type,
-                "quantity": quantity,
-                "product": product,
-                "order_type": order_type,
-                "validity": validity
-            }
+            order_params, error = self._order_params(
+                exchange, trading_symbol, transaction_type, quantity, order_type, product,
+                price, trigger_price, validity, variety, tag
+            )
+            if error:
+                return {"error": error}
+            await self._load_reference_prices([order_params])
+            decision = self._reserve_risk(order_params, confirmed)
+            if not decision.allowed:
+                return {"error": decision.reason, "requires_confirmation": decision.requires_confirmation,
+                        "order_value": decision.order_value}
+            return await self._submit_order(order_params, decision.reservation)
             
-            if order_type == "LIMIT" and price is not None:
+        except Exception as e:
+            logger.error(f"Error placing order: {e}")
+            return {"error": str(e)}
+    
+    def _order_params(self,
+                      exchange: str,
+                      trading_symbol: str,
+                      transaction_type: str,
+                      quantity: int,
+                      order_type: str,
+                      product: str,
+                      price: Optional[float] = None,
+                      trigger_price: Optional[float] = None,
+                      validity: str = "DAY",
+                      variety: str = "regular",
+                      tag: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Validate an order and build the d94_place_order parameters, or return an error"""
+        # Validate order parameters
+        if transaction_type not in ["BUY", "SELL"]:
+            return {}, "Invalid transaction type. Use BUY or SELL"
+        
+        if order_type not in ["MARKET", "LIMIT", "SL", "SL-M"]:
+            return {}, "Invalid order type"
+        
+        if product not in ["CNC", "NRML", "MIS", "MTF"]:
+            return {}, "Invalid product type"
+
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+            return {}, "Invalid quantity. Use a positive whole number"
+
+        if tag is not None and not (0 < len(tag) <= MAX_TAG_LENGTH and tag.isalnum()):
+            return {}, f"Invalid tag. Use up to {MAX_TAG_LENGTH} letters or digits"
+        
+        # Prepare order parameters
+        order_params: Dict[str, Union[str, int, float]] = {
+            "variety": variety,
+            "exchange": exchange,
+            "tradingsymbol": trading_symbol,
+            "transaction_type": transaction_type,
+            "quantity": quantity,
+            "product": product,
+            "order_type": order_type,
+            "validity": validity
+        }
+        
+        if order_type == "LIMIT" and price is not None:
+            order_params["price"] = price
+        
+        if order_type in ["SL", "SL-M"] and trigger_price is not None:
+            order_params["trigger_price"] = trigger_price
+            if order_type == "SL" and price is not None:
                 order_params["price"] = price
-            
-            if order_type in ["SL", "SL-M"] and trigger_price is not None:
-                order_params["trigger_price"] = trigger_price
-                if order_type == "SL" and price is not None:
-                    order_params["price"] = price
-            
-            # Placeholder implementation - in real environment, this would use d94_place_order
-            # result = d94_place_order(**order_params)
-            result: Dict[str, Any] = {"status": "success", "data": {"order_id": "placeholder_order_id"}}
+        
+        if tag is not None:
+            order_params["tag"] = tag
+        
+        return order_params, None
+    
+    async def _load_reference_prices(self, orders: List[Dict[str, Any]]) -> None:
+        """Quote, in one batched call, the symbols of unpriced orders that have no reference price yet"""
+        missing = {
+            symbol_key(order_params['exchange'], order_params['tradingsymbol']) for order_params in orders
+            if not (order_params.get('price') or order_params.get('trigger_price'))
+        } - self.risk_engine.prices.keys()
+        if missing:
+            await self.get_live_quotes(sorted(missing))
+    
+    def _reserve_risk(self, order_params: Dict[str, Any], confirmed: bool = False) -> RiskDecision:
+        """Pre-trade risk decision for built order parameters, reserving the order's value if allowed"""
+        symbol = symbol_key(order_params['exchange'], order_params['tradingsymbol'])
+        price = order_params.get('price') or order_params.get('trigger_price')
+        return self.risk_engine.reserve(symbol, order_params['transaction_type'], order_params['quantity'],
+                                        price, confirmed)
+    
+    async def _submit_order(self, order_params: Dict[str, Any], reservation: Optional[str]) -> Dict[str, Any]:
+        """Place an order whose risk reservation is committed if it is placed and released otherwise"""
+        order_id = None
+        try:
+            result = await self._call('d94_place_order', **order_params)
+            if result is None:
+                # No tool attached - keep the simulated response
+                result = {"status": "success", "data": {"order_id": "placeholder_order_id"}}
             
             if result.get('status') == 'success':
-                logger.info(f"Order placed successfully: {result.get('data', {}).get('order_id')}")
-            
+                order_id = result.get('data', {}).get('order_id')
+                logger.info(f"Order placed successfully: {order_id}")
             return result
-            
-        except Exception as e:
-            logger.error(f"Error placing order: {e}")
-            return {"error": str(e)}
+        finally:
+            if reservation is not None:
+                if order_id is not None:
+                    self.risk_engine.commit(reservation, order_id)
+                else:
+                    self.risk_engine.release(reservation)
+    
+    async def place_orders(self, basket: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate a basket of orders up front, then submit it concurrently
+        
+        Each order takes place_order's keyword arguments, and every order must
+        pass the pre-trade risk checks together with the basket orders before
+        it. Symbols of unpriced orders are quoted in one batched request
+        first. Orders without a 'tag' get a generated idempotency key, written
+        back into the order dict, which is sent to Kite as the order tag. Submitting the same basket again only
+        places orders whose key has not been placed yet. When an earlier attempt
+        failed ambiguously, the order book is checked for the tag first, so a
+        retry never places an order twice.
+        """
+        prepared: List[Dict[str, Any]] = []
+        valid: List[Tuple[int, bool]] = []
+        errors: List[Dict[str, Any]] = []
+        tags = set()
+        for index, order in enumerate(basket):
+            order.setdefault('tag', uuid.uuid4().hex[:MAX_TAG_LENGTH])
+            kwargs = dict(order)
+            kwargs.setdefault('trading_symbol', kwargs.pop('tradingsymbol', None))
+            confirmed = kwargs.pop('confirmed', False)
+            try:
+                order_params, error = self._order_params(**kwargs)
+            except TypeError as e:
+                order_params, error = {}, str(e)
+            if not error and order['tag'] in tags:
+                error = "Duplicate tag in basket"
+            if error:
+                errors.append({'index': index, 'tag': order['tag'], 'error': error})
+            else:
+                valid.append((index, confirmed))
+            tags.add(order['tag'])
+            prepared.append(order_params)
+        
+        # Reserving order by order checks each one against the basket orders before it
+        await self._load_reference_prices([prepared[index] for index, _ in valid])
+        reservations: List[Optional[str]] = [None] * len(prepared)
+        for index, confirmed in valid:
+            decision = self._reserve_risk(prepared[index], confirmed)
+            if not decision.allowed:
+                errors.append({'index': index, 'tag': prepared[index]['tag'], 'error': decision.reason})
+            reservations[index] = decision.reservation
+        
+        if errors:
+            for reservation in reservations:
+                if reservation is not None:
+                    self.risk_engine.release(reservation)
+            errors.sort(key=lambda error: error['index'])
+            return {'status': 'error', 'errors': errors, 'results': []}
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(config.ORDER_MAX_CONCURRENCY)
+        started = loop.time()
+        results = await asyncio.gather(*(
+            self._place_idempotent(index, order_params, reservations[index], semaphore)
+            for index, order_params in enumerate(prepared)
+        ))
+        failed = sum(1 for result in results if result['status'] != 'success')
+        return {
+            'status': 'success' if not failed else 'partial' if failed < len(results) else 'error',
+            'results': results,
+            'failed': failed,
+            'elapsed_ms': (loop.time() - started) * 1000,
+        }
+    
+    async def _place_idempotent(self, index: int, order_params: Dict[str, Any], reservation: Optional[str],
+                                semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Place one basket order unless its tag has already been placed
+        
+        The order's risk reservation is released if it turns out to be a duplicate.
+        """
+        tag = order_params['tag']
+        loop = asyncio.get_running_loop()
+        queued = started = loop.time()
+        
+        def outcome(status: str, order_id: Optional[str] = None, error: Optional[str] = None,
+                    duplicate: bool = False) -> Dict[str, Any]:
+            return {
+                'index': index,
+                'tag': tag,
+                'tradingsymbol': order_params['tradingsymbol'],
+                'status': status,
+                'order_id': order_id,
+                'error': error,
+                'duplicate': duplicate,
+                'queued_ms': (started - queued) * 1000,
+                'latency_ms': (loop.time() - started) * 1000,
+            }
+        
+        submitted = False
+        try:
+            async with semaphore:
+                started = loop.time()
+                pending = self._pending_tags.get(tag)
+                if pending is not None:
+                    # The same key is being placed by a concurrent call right now
+                    order_id = await asyncio.shield(pending)
+                    if order_id is not None:
+                        return outcome('success', order_id, duplicate=True)
+                
+                placed = self._placed_tags.get(tag)
+                if placed is None and tag in self._ambiguous_tags:
+                    placed = await self._find_order_by_tag(tag)
+                if placed is not None:
+                    return outcome('success', placed, duplicate=True)
+                
+                self._ambiguous_tags.add(tag)  # Until the API answers, the order may or may not exist
+                pending = self._pending_tags[tag] = loop.create_future()
+                order_id = None
+                try:
+                    submitted = True  # _submit_order settles the reservation from here on
+                    result = await self._submit_order(order_params, reservation)
+                    if result.get('status') == 'success':
+                        order_id = result.get('data', {}).get('order_id')
+                        self._placed_tags[tag] = order_id
+                    # Success or a definite rejection: either way the outcome is known
+                    self._ambiguous_tags.discard(tag)
+                except Exception as e:
+                    logger.error(f"Error placing basket order {tag}: {e}")
+                    return outcome('error', error=str(e))
+                finally:
+                    pending.set_result(order_id)
+                    del self._pending_tags[tag]
+                
+                if order_id is not None or result.get('status') == 'success':
+                    return outcome('success', order_id)
+                return outcome('error', error=result.get('message') or result.get('error') or 'Order rejected')
+        finally:
+            if not submitted and reservation is not None:
+                self.risk_engine.release(reservation)
+    
+    async def _find_order_by_tag(self, tag: str) -> Optional[str]:
+        """Order id of an order in today's order book carrying tag"""
+        for order in await self.get_orders():
+            if order.get('tag') == tag or tag in (order.get('tags') or []):
+                self._placed_tags[tag] = order.get('order_id')
+                self._ambiguous_tags.discard(tag)
+                return order.get('order_id')
+        return None
     
     async def modify_order(self, order_id: str, **kwargs: Any) -> Dict[str, Any]:
         """Modify an existing order"""
         try:
-            # Placeholder implementation - in real environment, this would use d94_modify_order
-            # return d94_modify_order(order_id=order_id, **kwargs)
-            return {"status": "success", "message": "Order modification simulated"}
+            result = await self._call('d94_modify_order', order_id=order_id, **kwargs)
+            return result or {"status": "success", "message": "Order modification simulated"}
         except Exception as e:
             logger.error(f"Error modifying order: {e}")
             return {"error": str(e)}
@@ -229,61 +662,183 @@ class ZerodhaAgent:
     async def cancel_order(self, order_id: str, variety: str = "regular") -> Dict[str, Any]:
         """Cancel an existing order"""
         try:
-            # Placeholder implementation - in real environment, this would use d94_cancel_order
-            # return d94_cancel_order(order_id=order_id, variety=variety)
-            return {"status": "success", "message": "Order cancellation simulated"}
+            result = await self._call('d94_cancel_order', order_id=order_id, variety=variety)
+            result = result or {"status": "success", "message": "Order cancellation simulated"}
+            if result.get('status') == 'success':
+                self.risk_engine.on_order_closed(order_id)
+            return result
         except Exception as e:
             logger.error(f"Error cancelling order: {e}")
             return {"error": str(e)}
     
-    async def get_orders(self) -> List[Dict[str, Any]]:
-        """Get all orders"""
+    async def get_orders(self, max_age: float = 0.0) -> List[Dict[str, Any]]:
+        """Get all orders, oldest first
+        
+        The order list is merged into order_book, and only orders that changed
+        since the previous sync are processed further. With max_age, a mirror
+        synced within that many seconds is served without an API call.
+        """
+        loop = asyncio.get_running_loop()
+        synced_at = self.order_book.synced_at
+        if max_age and synced_at is not None and loop.time() - synced_at < max_age:
+            return self.order_book.query()
+        if self._order_book_date != date.today():
+            # Kite's order book starts empty every trading day
+            self.order_book = OrderBook()
+            self._order_book_date = date.today()
         try:
-            # Placeholder implementation - in real environment, this would use d94_get_orders
-            # return d94_get_orders().get('data', [])
-            return []
+            result = await self._read('d94_get_orders')
+            for order in self.order_book.merge((result or {}).get('data', []), synced_at=loop.time()):
+                self.risk_engine.apply_order_update(order)
+            return self.order_book.query()
         except Exception as e:
             logger.error(f"Error fetching orders: {e}")
             return []
     
+    async def query_orders(self, status: Optional[Any] = None, symbol: Optional[str] = None,
+                           since: Optional[str] = None, until: Optional[str] = None,
+                           limit: Optional[int] = None,
+                           max_age: float = config.PORTFOLIO_REFRESH_INTERVAL) -> List[Dict[str, Any]]:
+        """Indexed order lookup (see OrderBook.query), syncing the mirror if it is older than max_age"""
+        await self.get_orders(max_age=max_age)
+        return self.order_book.query(status=status, symbol=symbol, since=since, until=until, limit=limit)
+    
     async def get_historical_data(self,
                                  instrument_token: int,
                                  from_date: str,
                                  to_date: str,
                                  interval: str = "day") -> List[Dict[str, Any]]:
-        """Get historical price data"""
+        """Get historical price data, fetching only the ranges missing from the local cache
+        
+        Today's intraday bars come from the tick stream when one is attached and
+        has covered the session so far.
+        """
         try:
-            # Placeholder implementation - in real environment, this would use d94_get_historical_data
-            # return d94_get_historical_data(
-            #     instrument_token=instrument_token,
-            #     from_date=from_date,
-            #     to_date=to_date,
-            #     interval=interval
-            # ).get('data', [])
-            return []
+            start, end = request_range(from_date, to_date)
+            session_start = to_epoch(datetime.combine(date.today(), time.min))
+            
+            if self.bar_aggregator is not None and end > session_start:
+                live_start = max(start, session_start)
+                if self.bar_aggregator.covers(instrument_token, interval, live_start):
+                    earlier = []
+                    if start < session_start:
+                        earlier = await self._cached_historical_data(instrument_token, start, session_start,
+                                                                     interval, session_start)
+                    return earlier + self.bar_aggregator.bars(instrument_token, interval, live_start, end)
+            
+            return await self._cached_historical_data(instrument_token, start, end, interval, session_start)
         except Exception as e:
             logger.error(f"Error fetching historical data: {e}")
             return []
     
+    async def _cached_historical_data(self, instrument_token: int, start: int, end: int,
+                                      interval: str, session_start: int) -> List[Dict[str, Any]]:
+        """Candles for [start, end) from the local cache, filling gaps from the API"""
+        for gap_start, gap_end in self.candle_cache.missing(instrument_token, interval, start, end):
+            records = await self._fetch_historical_data(instrument_token, gap_start, gap_end, interval)
+            if records is None:
+                continue
+            # Today's candles are still forming, so they are never marked as cached
+            self.candle_cache.store(instrument_token, interval, records, gap_start, gap_end,
+                                    complete_before=session_start)
+        
+        return self.candle_cache.read(instrument_token, interval, start, end)
+    
+    def attach_stream(self, stream: TickStream, intervals: Optional[List[str]] = None,
+                      local_gtts: bool = False) -> BarAggregator:
+        """Use a tick stream for live quotes and intraday bars served from get_historical_data
+        
+        get_live_quotes serves an instrument from the stream once one API
+        quote has supplied its instrument token.
+        
+        local_gtts also evaluates new GTTs on the stream instead of placing
+        them with Kite. Local GTTs are kept in memory only: they stop
+        triggering, and are forgotten, when this process exits.
+        """
+        self.tick_stream = stream
+        self.bar_aggregator = BarAggregator(intervals or config.BAR_INTERVALS, stream.buffer.max_instruments)
+        stream.add_consumer(self.bar_aggregator.update)
+        if local_gtts:
+            self.gtt_engine = GTTEngine(self.place_order)
+            stream.add_consumer(self.gtt_engine.on_ticks)
+        return self.bar_aggregator
+    
+    def attach_order_updates(self, stream: OrderUpdateStream) -> None:
+        """Keep the order book and risk totals current from pushed order updates"""
+        self.order_updates = stream
+        stream.add_consumer(self._on_order_update)
+    
+    def _on_order_update(self, update: OrderUpdate, received: float) -> None:
+        # Postbacks may carry only some fields; keep the rest from the mirror
+        current = self.order_book.get(update.get('order_id'))
+        order = dict(current, **update) if current is not None else update
+        if self.order_book.upsert(order):
+            self.risk_engine.apply_order_update(order)
+    
+    async def _fetch_historical_data(self, instrument_token: int, start: int, end: int,
+                                     interval: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch candles for [start, end) from the API, or None if the call failed"""
+        result = await self._read(
+            'd94_get_historical_data',
+            instrument_token=instrument_token,
+            from_date=format_timestamp(start),
+            to_date=format_timestamp(end - 1),
+            interval=interval
+        )
+        if not result or 'data' not in result:
+            return None
+        return result['data']
+    
     async def place_gtt_order(self, **kwargs: Any) -> Dict[str, Any]:
-        """Place a Good Till Triggered (GTT) order"""
+        """Place a Good Till Triggered (GTT) order
+        
+        GTTs are placed with Kite, which keeps them across restarts. With a
+        stream attached with local_gtts=True the GTT is instead kept in
+        memory by the local engine and takes Kite's parameters: trigger_type,
+        exchange, tradingsymbol, trigger_values, last_price and orders (plus
+        an optional instrument_token, otherwise looked up in the instrument
+        master).
+        """
         try:
-            # Placeholder implementation - in real environment, this would use d94_place_gtt_order
-            # return d94_place_gtt_order(**kwargs)
-            return {"status": "success", "message": "GTT order placement simulated"}
+            if self.gtt_engine is not None:
+                token = kwargs.get('instrument_token') or await self._instrument_token(
+                    kwargs['exchange'], kwargs['tradingsymbol'])
+                if token is None:
+                    return {"error": f"Unknown instrument {kwargs['exchange']}:{kwargs['tradingsymbol']}"}
+                gtt_id = self.gtt_engine.create(
+                    kwargs['trigger_type'], kwargs['exchange'], kwargs['tradingsymbol'], token,
+                    kwargs['trigger_values'], kwargs['last_price'], kwargs['orders'])
+                return {"status": "success", "data": {"trigger_id": gtt_id}}
+            result = await self._call('d94_place_gtt_order', **kwargs)
+            return result or {"status": "success", "message": "GTT order placement simulated"}
         except Exception as e:
             logger.error(f"Error placing GTT order: {e}")
             return {"error": str(e)}
     
+    async def _instrument_token(self, exchange: str, tradingsymbol: str) -> Optional[int]:
+        master = await self._get_instrument_master()
+        if master is None:
+            return None
+        rows = master.filter(exchange=exchange)
+        matches = rows[master.columns['tradingsymbol'][rows] == tradingsymbol.upper().encode('utf-8')]
+        return int(master.columns['instrument_token'][matches[0]]) if len(matches) else None
+    
     async def get_gtt_orders(self) -> List[Dict[str, Any]]:
-        """Get all GTT orders"""
+        """Get all GTT orders, local ones first (active, then recently triggered or cancelled)"""
+        local = (list(self.gtt_engine.gtts.values()) + list(self.gtt_engine.history)
+                 if self.gtt_engine is not None else [])
         try:
-            # Placeholder implementation - in real environment, this would use d94_get_gtts
-            # return d94_get_gtts().get('data', [])
-            return []
+            result = await self._call('d94_get_gtts')
+            return local + (result or {}).get('data', [])
         except Exception as e:
             logger.error(f"Error fetching GTT orders: {e}")
-            return []
+            return local
+    
+    def cancel_gtt_order(self, trigger_id: int) -> Dict[str, Any]:
+        """Cancel a local GTT"""
+        if self.gtt_engine is not None and self.gtt_engine.cancel(trigger_id):
+            return {"status": "success", "data": {"trigger_id": trigger_id}}
+        return {"error": f"No active GTT {trigger_id}"}
     
     async def analyze_market_data(self, instruments: List[str]) -> Dict[str, Any]:
         """Analyze market data for given instruments"""
@@ -291,46 +846,108 @@ class ZerodhaAgent:
             quotes = await self.get_live_quotes(instruments)
             analysis: Dict[str, Any] = {}
             
-            for instrument, data in quotes.items():
-                if isinstance(data, dict):
-                    analysis[instrument] = {
-                        'current_price': data.get('last_price', 0),
-                        'change': data.get('net_change', 0),
-                        'change_percent': data.get('change_percent', 0),
-                        'volume': data.get('volume', 0),
-                        'high': data.get('ohlc', {}).get('high', 0),
-                        'low': data.get('ohlc', {}).get('low', 0),
-                        'open': data.get('ohlc', {}).get('open', 0),
-                        'close': data.get('ohlc', {}).get('close', 0),
-                        'recommendation': self._generate_recommendation(data)
-                    }
+            rows = [(instrument, data) for instrument, data in quotes.items() if isinstance(data, dict)]
+            recommendations, risks = scoring.score(*scoring.quote_columns([data for _, data in rows]))
+            recommendation_labels = scoring.labels(recommendations, scoring.RECOMMENDATION_LABELS)
+            risk_labels = scoring.labels(risks, scoring.RISK_LABELS)
+            
+            for (instrument, data), recommendation, risk in zip(rows, recommendation_labels, risk_labels):
+                analysis[instrument] = {
+                    'current_price': data.get('last_price', 0),
+                    'change': data.get('net_change', 0),
+                    'change_percent': data.get('change_percent', 0),
+                    'volume': data.get('volume', 0),
+                    'high': data.get('ohlc', {}).get('high', 0),
+                    'low': data.get('ohlc', {}).get('low', 0),
+                    'open': data.get('ohlc', {}).get('open', 0),
+                    'close': data.get('ohlc', {}).get('close', 0),
+                    'recommendation': recommendation,
+                    'risk': risk
+                }
+            
+            for instrument, indicators in (await self._quote_indicators(quotes)).items():
+                analysis[instrument]['indicators'] = indicators
             
             return analysis
         except Exception as e:
             logger.error(f"Error analyzing market data: {e}")
             return {}
     
+    async def _quote_indicators(self, quotes: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Daily indicators including today's forming bar, for quotes carrying an instrument_token
+        
+        Each instrument is seeded from its cached daily candles once a day;
+        refreshes after that only evaluate today's bar against the stored state.
+        Seeding costs a historical call, so a refresh seeds at most
+        INDICATOR_SEEDS_PER_REFRESH instruments and the rest follow on later
+        refreshes. Instruments that are not seeded (yet, or because seeding
+        failed) are left without indicators; a failed one is retried after
+        INDICATOR_SEED_RETRY seconds.
+        """
+        tokens = {
+            instrument: data['instrument_token'] for instrument, data in quotes.items()
+            if isinstance(data, dict) and data.get('instrument_token')
+        }
+        if not tokens:
+            return {}
+        
+        today = date.today()
+        now = asyncio.get_running_loop().time()
+        stale = [instrument for instrument in tokens if self._indicator_dates.get(instrument) != today
+                 and self._indicator_retry.get(instrument, 0.0) <= now]
+        batch = stale[:config.INDICATOR_SEEDS_PER_REFRESH]
+        if batch:
+            results = await asyncio.gather(*(self._seed_indicators(instrument, tokens[instrument], today)
+                                             for instrument in batch), return_exceptions=True)
+            for instrument, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"Could not seed indicators for {instrument}: {result}")
+                    self._indicator_retry[instrument] = now + config.INDICATOR_SEED_RETRY
+        
+        instruments = [instrument for instrument in tokens if self._indicator_dates.get(instrument) == today]
+        if not instruments:
+            return {}
+        ohlc = [quotes[instrument].get('ohlc') or {} for instrument in instruments]
+        rows = np.array([self.indicator_state.row(instrument) for instrument in instruments])
+        close = np.array([float(quotes[instrument].get('last_price') or 0) for instrument in instruments])
+        high = np.array([float(o.get('high') or 0) for o in ohlc])
+        low = np.array([float(o.get('low') or 0) for o in ohlc])
+        volume = np.array([float(quotes[instrument].get('volume') or 0) for instrument in instruments])
+        # Quotes without today's range (e.g. LTP only) count as a flat bar
+        high = np.where(high > 0, high, close)
+        low = np.where(low > 0, low, close)
+        
+        values = self.indicator_state.peek(rows, close, high, low, volume)
+        return dict(zip(instruments, self.indicator_state.records(values)))
+    
+    async def _seed_indicators(self, instrument: str, instrument_token: int, today: date) -> None:
+        """Load an instrument's daily history up to yesterday into the indicator state"""
+        session_start = to_epoch(datetime.combine(today, time.min))
+        start = to_epoch(datetime.combine(today - timedelta(days=config.INDICATOR_HISTORY_DAYS), time.min))
+        await self._cached_historical_data(instrument_token, start, session_start, 'day', session_start)
+        candles = self.candle_cache.read_array(instrument_token, 'day', start, session_start)
+        self.indicator_state.seed(instrument, candles['close'], candles['high'], candles['low'],
+                                  candles['volume'])
+        self._indicator_dates[instrument] = today
+        self._indicator_retry.pop(instrument, None)
+    
     def _generate_recommendation(self, data: Dict[str, Any]) -> str:
         """Generate basic trading recommendation based on price data"""
         try:
             change_percent = float(data.get('change_percent', 0) or 0)
             volume = int(data.get('volume', 0) or 0)
-            
-            if change_percent > 5 and volume > 100000:
-                return "Strong Bullish - High volume with significant price increase"
-            elif change_percent > 2:
-                return "Bullish - Positive momentum"
-            elif change_percent < -5 and volume > 100000:
-                return "Strong Bearish - High volume with significant price decrease"
-            elif change_percent < -2:
-                return "Bearish - Negative momentum"
-            else:
-                return "Neutral - Sideways movement"
+            return scoring.RECOMMENDATION_LABELS[scoring.recommendation_code(change_percent, volume)]
         except Exception:
-            return "Insufficient data for recommendation"
+            return scoring.RECOMMENDATION_LABELS[scoring.INSUFFICIENT_DATA]
 
-# Create the main agent instance
-zerodha_agent = ZerodhaAgent()
+# Shared instances, built on first access (see __getattr__ below)
+_shared: Dict[str, Any] = {}
+
+def get_agent() -> ZerodhaAgent:
+    """The shared ZerodhaAgent, created on first use"""
+    if 'zerodha_agent' not in _shared:
+        _shared['zerodha_agent'] = ZerodhaAgent()
+    return _shared['zerodha_agent']
 
 # Create a simple agent wrapper for backward compatibility
 class SimpleAgent:
@@ -340,10 +957,21 @@ class SimpleAgent:
         self.description = description
         self.instruction = instruction
 
-# Backward compatibility
-root_agent = SimpleAgent(
-    model='gemini-2.0-flash-001',
-    name='zerodha_trading_agent',
-    description='An AI agent for Zerodha trading operations',
-    instruction='Assist users with trading operations on Zerodha platform'
-)
+def _root_agent() -> SimpleAgent:
+    if 'root_agent' not in _shared:
+        # Backward compatibility
+        _shared['root_agent'] = SimpleAgent(
+            model='gemini-2.0-flash-001',
+            name='zerodha_trading_agent',
+            description='An AI agent for Zerodha trading operations',
+            instruction='Assist users with trading operations on Zerodha platform'
+        )
+    return _shared['root_agent']
+
+def __getattr__(name: str) -> Any:
+    # zerodha_agent and root_agent are still importable by name but no longer built at import time
+    if name == 'zerodha_agent':
+        return get_agent()
+    if name == 'root_agent':
+        return _root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,211 @@
+"""
+Incremental OHLCV bar aggregation from streamed ticks
+
+Each configured interval keeps the forming bar of every instrument in flat
+numpy arrays indexed by instrument row, so a tick updates open/high/low/close
+and volume in O(1) and a whole frame is applied with a few vectorized
+operations. Bars are aligned to the 09:15 session open like Kite's intraday
+candles; when a tick falls into a new period the previous bar is closed,
+kept for the session and announced to subscribers.
+
+Timestamps follow the candle cache convention of naive exchange-local (IST)
+epoch seconds, and bars() returns the same records as get_historical_data.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .candle_cache import from_epoch
+from .config import config
+from .streaming import TokenIndex, unique_batches
+
+logger = logging.getLogger(__name__)
+
+# Kite interval names -> bar length in seconds
+INTERVAL_SECONDS = {
+    'minute': 60,
+    '3minute': 180,
+    '5minute': 300,
+    '10minute': 600,
+    '15minute': 900,
+    '30minute': 1800,
+    '60minute': 3600,
+}
+
+IST_OFFSET = 19800  # Tick timestamps are Unix time; bars use IST wall-clock seconds
+SESSION_OPEN = 9 * 3600 + 15 * 60  # 09:15, seconds after midnight
+DAY = 86400
+
+Bar = Tuple[int, float, float, float, float, int]  # (ts, open, high, low, close, volume)
+
+
+def align(ts: np.ndarray, seconds: int) -> np.ndarray:
+    """Start of the session-aligned bar containing each IST epoch second
+
+    Pre-open ticks fall into the first bar of the session.
+    """
+    session_open = ts - ts % DAY + SESSION_OPEN
+    offset = np.maximum(ts - session_open, 0)
+    return session_open + offset - offset % seconds
+
+
+def _record(bar: Bar) -> Dict[str, Any]:
+    ts, o, h, l, c, v = bar
+    return {'date': from_epoch(ts).isoformat(), 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+
+class _IntervalBars:
+    """Forming bars of one interval plus the session's closed bars"""
+
+    def __init__(self, seconds: int, capacity: int):
+        self.seconds = seconds
+        self.start = np.zeros(capacity, dtype=np.int64)  # 0 = no bar yet
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        self.volume = np.zeros(capacity, dtype=np.int64)
+        self.first = np.zeros(capacity, dtype=np.int64)  # Time of the first tick seen this session
+        self.closed: Dict[int, List[Bar]] = {}
+
+    def forming(self, row: int) -> Optional[Bar]:
+        if not self.start[row]:
+            return None
+        return (int(self.start[row]), float(self.open[row]), float(self.high[row]),
+                float(self.low[row]), float(self.close[row]), int(self.volume[row]))
+
+    def apply(self, rows: np.ndarray, ts: np.ndarray, price: np.ndarray,
+              volume: np.ndarray) -> List[Tuple[int, Bar]]:
+        """Apply ticks for distinct rows, returning the bars they closed"""
+        bucket = align(ts, self.seconds)
+        current = self.start[rows]
+        late = bucket < current  # Out-of-order ticks for an already closed bar
+        if late.any():
+            keep = ~late
+            rows, ts, bucket, current = rows[keep], ts[keep], bucket[keep], current[keep]
+            price, volume = price[keep], volume[keep]
+
+        rolled = bucket != current
+        closed: List[Tuple[int, Bar]] = []
+        if rolled.any():
+            ended = rows[rolled & (current > 0)]
+            for row in ended.tolist():
+                bar = self.forming(row)
+                self.closed.setdefault(row, []).append(bar)  # type: ignore[arg-type]
+                closed.append((row, bar))  # type: ignore[arg-type]
+
+            new_rows = rows[rolled]
+            new_session = (bucket[rolled] - bucket[rolled] % DAY) != (current[rolled] - current[rolled] % DAY)
+            for row in new_rows[new_session].tolist():
+                self.closed.pop(row, None)  # Drop the previous session's bars
+            self.first[new_rows[new_session]] = ts[rolled][new_session]
+            self.start[new_rows] = bucket[rolled]
+            self.open[new_rows] = price[rolled]
+            self.high[new_rows] = price[rolled]
+            self.low[new_rows] = price[rolled]
+            self.volume[new_rows] = 0
+
+        self.high[rows] = np.maximum(self.high[rows], price)
+        self.low[rows] = np.minimum(self.low[rows], price)
+        self.close[rows] = price
+        self.volume[rows] += volume
+        return closed
+
+
+class BarAggregator:
+    """Intraday OHLCV bars for every streamed instrument and interval"""
+
+    def __init__(self, intervals: Iterable[str] = config.BAR_INTERVALS,
+                 max_instruments: int = config.STREAM_MAX_INSTRUMENTS):
+        self.index = TokenIndex(max_instruments)
+        self.intervals = {
+            name: _IntervalBars(INTERVAL_SECONDS[name], max_instruments) for name in intervals
+        }
+        self._tokens = np.zeros(max_instruments, dtype=np.int64)  # Row -> instrument token
+        self._last_volume = np.full(max_instruments, -1, dtype=np.int64)  # Cumulative day volume
+        self._subscribers: List[Tuple['asyncio.Queue[Dict[str, Any]]', Optional[str]]] = []
+
+    def subscribe(self, interval: Optional[str] = None,
+                  maxsize: int = 10000) -> 'asyncio.Queue[Dict[str, Any]]':
+        """Queue receiving each closed bar, optionally for one interval only
+
+        Items are historical-data records plus instrument_token and interval.
+        A subscriber that falls behind loses its oldest bars.
+        """
+        queue: 'asyncio.Queue[Dict[str, Any]]' = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append((queue, interval))
+        return queue
+
+    def unsubscribe(self, queue: 'asyncio.Queue[Dict[str, Any]]') -> None:
+        self._subscribers = [(q, i) for q, i in self._subscribers if q is not queue]
+
+    def _volume_delta(self, rows: np.ndarray, ticks: np.ndarray) -> np.ndarray:
+        """Traded volume since the previous tick, from cumulative day volume"""
+        cumulative = ticks['volume']
+        previous = self._last_volume[rows]
+        delta = np.where(previous < 0, ticks['last_quantity'],  # First tick seen for the instrument
+                         np.where(cumulative >= previous, cumulative - previous, cumulative))  # New day
+        self._last_volume[rows] = np.where(cumulative > 0, cumulative, np.maximum(previous, 0))
+        return np.where(cumulative > 0, delta, 0)
+
+    def update(self, ticks: np.ndarray, received: float) -> List[Dict[str, Any]]:
+        """Apply decoded ticks; returns the bars they closed"""
+        rows = self.index.rows_for(ticks['instrument_token'])
+        stored = rows >= 0
+        if not stored.all():
+            ticks, rows = ticks[stored], rows[stored]
+        if not len(rows):
+            return []
+
+        exchange_ts = ticks['exchange_timestamp']
+        ts = np.where(exchange_ts > 0, exchange_ts, int(received)) + IST_OFFSET
+        self._tokens[rows] = ticks['instrument_token']
+        closed: List[Dict[str, Any]] = []
+        for batch in unique_batches(rows):
+            batch_rows = rows[batch]
+            volume = self._volume_delta(batch_rows, ticks[batch])
+            for name, bars in self.intervals.items():
+                for row, bar in bars.apply(batch_rows, ts[batch], ticks['last_price'][batch], volume):
+                    closed.append(dict(_record(bar), instrument_token=int(self._tokens[row]), interval=name))
+
+        if closed and self._subscribers:
+            for queue, interval in self._subscribers:
+                for bar in closed:
+                    if interval is None or bar['interval'] == interval:
+                        if queue.full():
+                            queue.get_nowait()
+                        queue.put_nowait(bar)
+        return closed
+
+    def covers(self, instrument_token: int, interval: str, start: int) -> bool:
+        """Whether this session's bars for the instrument are complete from start
+
+        True when the first tick of the session arrived at or before the start
+        of the first bar bars() would return from start, so that bar and every
+        later one saw all of their ticks.
+        """
+        bars = self.intervals.get(interval)
+        row = self.index.rows.get(instrument_token)
+        if bars is None or row is None or not bars.start[row]:
+            return False
+        first = int(bars.first[row])
+        boundary = int(align(np.int64(start), bars.seconds))
+        if boundary < start:
+            boundary += bars.seconds  # bars() skips the bar start falls inside
+        return first // DAY == start // DAY and first <= boundary
+
+    def bars(self, instrument_token: int, interval: str, start: int, end: int,
+             include_forming: bool = True) -> List[Dict[str, Any]]:
+        """This session's bars in [start, end), shaped like get_historical_data records"""
+        bars = self.intervals.get(interval)
+        row = self.index.rows.get(instrument_token)
+        if bars is None or row is None:
+            return []
+        candidates = list(bars.closed.get(row, []))
+        forming = bars.forming(row)
+        if include_forming and forming is not None:
+            candidates.append(forming)
+        return [_record(bar) for bar in candidates if start <= bar[0] < end]
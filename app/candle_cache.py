@@ -0,0 +1,173 @@
+"""
+Persistent on-disk cache for historical candles
+
+Candles are stored per instrument token and interval as a sorted, fixed-width
+numpy structured array (``<token>/<interval>.npy``). A sidecar JSON file keeps
+the time ranges that have already been fetched, so ranges that legitimately
+hold no candles (weekends, holidays) are not fetched again and only the gaps
+of a request go to the API.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+CANDLE_DTYPE = np.dtype([
+    ('ts', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+
+Range = Tuple[int, int]  # [start, end) in epoch seconds
+
+# Timestamps are kept as naive exchange-local (IST) wall-clock seconds, so
+# the cache does not depend on the timezone of the machine it runs on
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch(value: datetime) -> int:
+    """Naive wall-clock datetime to epoch seconds"""
+    return int((value - EPOCH).total_seconds())
+
+
+def from_epoch(ts: int) -> datetime:
+    """Epoch seconds to naive wall-clock datetime"""
+    return EPOCH + timedelta(seconds=ts)
+
+
+def parse_datetime(value: Any) -> datetime:
+    """Parse a Kite date or timestamp into a naive exchange-local datetime"""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip().replace(' ', 'T', 1)
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            parsed = datetime.strptime(text, '%Y-%m-%dT%H:%M:%S%z')
+    return parsed.replace(tzinfo=None)
+
+
+def request_range(from_date: str, to_date: str) -> Range:
+    """Convert an inclusive from/to request into a half-open epoch range"""
+    start = parse_datetime(from_date)
+    end = parse_datetime(to_date)
+    # A bare date includes that whole day, a timestamp includes that second
+    end += timedelta(days=1) if len(str(to_date).strip()) <= 10 else timedelta(seconds=1)
+    return to_epoch(start), to_epoch(end)
+
+
+def format_timestamp(ts: int) -> str:
+    """Format an epoch second as the to/from value expected by the API"""
+    return from_epoch(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Merge overlapping or touching ranges"""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class CandleCache:
+    """Candle store partitioned by instrument token and interval"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _paths(self, instrument_token: int, interval: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, str(int(instrument_token)), interval)
+        return base + '.npy', base + '.json'
+
+    def _load(self, instrument_token: int, interval: str,
+              mmap: bool = True) -> Tuple[np.ndarray, List[Range]]:
+        candles_path, coverage_path = self._paths(instrument_token, interval)
+        if not os.path.exists(coverage_path):
+            return np.empty(0, dtype=CANDLE_DTYPE), []
+        with open(coverage_path) as f:
+            coverage = [tuple(r) for r in json.load(f)]
+        candles = np.load(candles_path, mmap_mode='r' if mmap else None).view(np.ndarray)
+        return candles, coverage  # type: ignore[return-value]
+
+    def missing(self, instrument_token: int, interval: str, start: int, end: int) -> List[Range]:
+        """Sub-ranges of [start, end) that have not been fetched yet"""
+        _, coverage = self._load(instrument_token, interval)
+        gaps: List[Range] = []
+        cursor = start
+        for covered_start, covered_end in coverage:
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def read_array(self, instrument_token: int, interval: str, start: int, end: int) -> np.ndarray:
+        """Cached candles in [start, end) as a CANDLE_DTYPE array"""
+        candles, _ = self._load(instrument_token, interval)
+        lo, hi = np.searchsorted(candles['ts'], [start, end])
+        return candles[lo:hi]
+
+    def read(self, instrument_token: int, interval: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """Cached candles in [start, end), in the shape returned by the API"""
+        window = self.read_array(instrument_token, interval, start, end)
+        dates = [from_epoch(ts).isoformat() for ts in window['ts'].tolist()]
+        return [
+            {'date': d, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for d, o, h, l, c, v in zip(dates, window['open'].tolist(), window['high'].tolist(),
+                                        window['low'].tolist(), window['close'].tolist(),
+                                        window['volume'].tolist())
+        ]
+
+    def store(self, instrument_token: int, interval: str, records: List[Dict[str, Any]],
+              start: int, end: int, complete_before: Optional[int] = None) -> None:
+        """Merge fetched records for [start, end) into the cache
+
+        Coverage is only recorded up to complete_before (e.g. the start of the
+        current session) so candles that may still change are fetched again.
+        """
+        # Read into memory: Windows cannot replace a file that is still mapped
+        candles, coverage = self._load(instrument_token, interval, mmap=False)
+        fetched = np.empty(len(records), dtype=CANDLE_DTYPE)
+        for i, record in enumerate(records):
+            fetched[i] = (
+                to_epoch(parse_datetime(record['date'])),
+                float(record.get('open') or 0),
+                float(record.get('high') or 0),
+                float(record.get('low') or 0),
+                float(record.get('close') or 0),
+                int(record.get('volume') or 0),
+            )
+
+        # Fetched candles come first so they win over stale cached ones
+        combined = np.concatenate([fetched, candles])
+        _, first = np.unique(combined['ts'], return_index=True)
+        combined = combined[first]
+
+        covered_end = end if complete_before is None else min(end, complete_before)
+        if covered_end > start:
+            coverage = _merge_ranges(coverage + [(start, covered_end)])
+
+        candles_path, coverage_path = self._paths(instrument_token, interval)
+        os.makedirs(os.path.dirname(candles_path), exist_ok=True)
+        # Write-then-rename keeps readers on a consistent file
+        with open(candles_path + '.tmp', 'wb') as f:
+            np.save(f, combined)
+        os.replace(candles_path + '.tmp', candles_path)
+        with open(coverage_path + '.tmp', 'w') as f:
+            json.dump(coverage, f)
+        os.replace(coverage_path + '.tmp', coverage_path)
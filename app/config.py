@@ -9,9 +9,29 @@ class Config:
     """Configuration class for the Zerodha AI Agent"""
     
     # API Configuration
+    API_SECRET = os.getenv('ZERODHA_SECRET')  # Kite app secret, also used to verify postbacks
     API_TIMEOUT = 30
     MAX_RETRIES = 3
-    RATE_LIMIT_DELAY = 1  # seconds
+    RATE_LIMIT_DELAY = 1  # seconds, window over which a rate limit may burst
+    RETRY_BACKOFF_BASE = 0.2  # seconds, doubled per retry of a read (with full jitter)
+    RETRY_BACKOFF_MAX = 5.0
+    HEDGE_PERCENTILE = 95  # Reads slower than this latency percentile get a hedged request
+    HEDGE_WINDOW = 200  # Recent latencies kept per endpoint
+    HEDGE_MIN_SAMPLES = 20  # No hedging until an endpoint has this many samples
+    CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures that open an endpoint's circuit
+    CIRCUIT_RESET_TIMEOUT = 30  # seconds before a trial call is let through
+    
+    # Tool Transport
+    TOOL_SERVER_URL = os.getenv('ZERODHA_TOOL_URL')  # HTTP tool server; None runs the d94_ functions
+    HTTP_POOL_SIZE = 100  # Pooled connections across all hosts
+    HTTP_POOL_SIZE_PER_HOST = 20
+    HTTP_KEEPALIVE_TIMEOUT = 30  # seconds an idle pooled connection is kept open
+    RATE_LIMITS = {  # requests per second per endpoint
+        "order": 10,
+        "quote": 1,
+        "historical": 3,
+        "default": 10
+    }
     
     # Trading Configuration
     DEFAULT_EXCHANGE = "NSE"
@@ -23,12 +43,53 @@ class Config:
     MAX_ORDER_VALUE = 100000  # Maximum order value without confirmation
     MAX_POSITION_SIZE = 0.1   # Maximum position size as % of portfolio
     STOP_LOSS_PERCENTAGE = 5  # Default stop loss percentage
+    MAX_EXPOSURE = 1.0  # Maximum gross exposure plus open orders, as a multiple of portfolio value
+    MAX_OPEN_ORDER_VALUE = 500000  # Maximum total value of working orders
     
     # Display Configuration
     PORTFOLIO_REFRESH_INTERVAL = 30  # seconds
     MARKET_DATA_REFRESH_INTERVAL = 5  # seconds
     MAX_DISPLAY_INSTRUMENTS = 20
     
+    # Basket Orders
+    ORDER_MAX_CONCURRENCY = 10  # Basket orders in flight at once
+    
+    # Quote Fetching
+    QUOTE_BATCH_SIZE = 500  # Maximum instruments per quote request
+    QUOTE_MAX_CONCURRENCY = 4  # Quote batches in flight at once
+    
+    # Multi-Account Aggregation
+    ACCOUNT_FETCH_CONCURRENCY = 16  # Accounts fetched at once
+    ACCOUNT_METRICS_WORKERS = None  # Process pool size, None = one per CPU
+    ACCOUNT_POOL_MIN_ROWS = 5000  # Smaller books are computed in-process
+    
+    # Tick Streaming
+    STREAM_MAX_INSTRUMENTS = 3000  # Ring buffer rows, the ticker's per-connection limit
+    STREAM_BUFFER_SIZE = 256  # Latest ticks kept per instrument
+    STREAM_QUOTE_MAX_IDLE = 5  # seconds without frames before live quotes fall back to REST
+    BAR_INTERVALS = ('minute', '3minute', '5minute', '15minute', '60minute')  # Built from ticks
+    GTT_LATENCY_SAMPLES = 1024  # Trigger latencies kept for local GTT stats
+    GTT_HISTORY_SIZE = 1024  # Triggered and cancelled local GTTs kept for get_gtt_orders
+    
+    # Market Scanner
+    SCANNER_EXCHANGE = "NSE"
+    SCANNER_INSTRUMENT_TYPE = "EQ"
+    SCANNER_TOP_K = 10
+    SCANNER_VOLUME_LOOKBACK_DAYS = 20  # Cached daily candles used for the average volume
+    
+    # Technical Indicators
+    INDICATOR_HISTORY_DAYS = 120  # Calendar days of daily candles used to seed indicators
+    INDICATOR_SEEDS_PER_REFRESH = 3  # Historical fetches one analysis waits for (the historical rate)
+    INDICATOR_SEED_RETRY = 300  # seconds before an instrument whose seeding failed is tried again
+    
+    # Local Cache Configuration
+    CACHE_DIR = os.getenv('ZERODHA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.kite-agent'))
+    INSTRUMENT_CACHE_DIR = os.path.join(CACHE_DIR, 'instruments')  # Refreshed once a day
+    INSTRUMENT_SEARCH_LIMIT = 100
+    CANDLE_CACHE_DIR = os.path.join(CACHE_DIR, 'candles')
+    SESSION_FILE = os.path.join(CACHE_DIR, 'session')  # Access token (owner-only file), reused until expiry; per-account files add a suffix
+    SESSION_EXPIRY_HOUR = 6  # Kite access tokens expire at this hour (IST) the next morning
+    
     # Logging Configuration
     LOG_LEVEL = "INFO"
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -0,0 +1,251 @@
+"""
+Vectorized decoder for binary market-data frames
+
+Whole frames are decoded with numpy.frombuffer over a memoryview of the frame:
+when every packet in a frame has the same mode (the usual case, since a
+connection subscribes instruments in one mode) the packets are read in place
+with a strided structured dtype, with no copy and no per-packet Python work.
+Frames mixing modes are grouped by packet length and gathered per group.
+
+The result is one structured array of TICK_DTYPE rows with prices converted
+to rupees; to_quotes turns it into the quote dicts the rest of the agent uses.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+
+LTP_MODE = 1
+QUOTE_MODE = 2
+FULL_MODE = 3
+MODE_NAMES = {LTP_MODE: 'ltp', QUOTE_MODE: 'quote', FULL_MODE: 'full'}
+DEPTH_LEVELS = 5
+
+# Price divisors by exchange segment (the low byte of the instrument token)
+CDS_SEGMENT = 3
+BCD_SEGMENT = 6
+
+_PREFIX = [('length', '>u2')]  # Each packet is preceded by its length in the frame
+_QUOTE_FIELDS = [
+    ('instrument_token', '>i4'), ('last_price', '>i4'), ('last_quantity', '>i4'),
+    ('average_price', '>i4'), ('volume', '>i4'), ('buy_quantity', '>i4'), ('sell_quantity', '>i4'),
+    ('open', '>i4'), ('high', '>i4'), ('low', '>i4'), ('close', '>i4'),
+]
+_INDEX_FIELDS = [
+    ('instrument_token', '>i4'), ('last_price', '>i4'), ('high', '>i4'), ('low', '>i4'),
+    ('open', '>i4'), ('close', '>i4'), ('change', '>i4'),
+]
+_DEPTH_ENTRY = np.dtype([('quantity', '>i4'), ('price', '>i4'), ('orders', '>i2'), ('padding', '>i2')])
+
+# Packet length -> (wire dtype including the length prefix, mode)
+WIRE_DTYPES = {
+    8: (np.dtype(_PREFIX + [('instrument_token', '>i4'), ('last_price', '>i4')]), LTP_MODE),
+    28: (np.dtype(_PREFIX + _INDEX_FIELDS), QUOTE_MODE),
+    32: (np.dtype(_PREFIX + _INDEX_FIELDS + [('exchange_timestamp', '>i4')]), FULL_MODE),
+    44: (np.dtype(_PREFIX + _QUOTE_FIELDS), QUOTE_MODE),
+    184: (np.dtype(_PREFIX + _QUOTE_FIELDS + [
+        ('last_trade_time', '>i4'), ('oi', '>i4'), ('oi_day_high', '>i4'), ('oi_day_low', '>i4'),
+        ('exchange_timestamp', '>i4'), ('depth', _DEPTH_ENTRY, (2 * DEPTH_LEVELS,)),
+    ]), FULL_MODE),
+}
+
+TICK_DTYPE = np.dtype([
+    ('instrument_token', np.int64),
+    ('mode', np.uint8),
+    ('last_price', np.float64),
+    ('last_quantity', np.int64),
+    ('average_price', np.float64),
+    ('volume', np.int64),
+    ('buy_quantity', np.int64),
+    ('sell_quantity', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('change', np.float64),
+    ('last_trade_time', np.int64),
+    ('oi', np.int64),
+    ('oi_day_high', np.int64),
+    ('oi_day_low', np.int64),
+    ('exchange_timestamp', np.int64),
+    ('bid_quantity', np.int64, (DEPTH_LEVELS,)),
+    ('bid_price', np.float64, (DEPTH_LEVELS,)),
+    ('bid_orders', np.int32, (DEPTH_LEVELS,)),
+    ('ask_quantity', np.int64, (DEPTH_LEVELS,)),
+    ('ask_price', np.float64, (DEPTH_LEVELS,)),
+    ('ask_orders', np.int32, (DEPTH_LEVELS,)),
+])
+
+PRICE_FIELDS = ('last_price', 'average_price', 'open', 'high', 'low', 'close', 'change')
+_COUNT_FIELDS = ('last_quantity', 'volume', 'buy_quantity', 'sell_quantity', 'last_trade_time',
+                 'oi', 'oi_day_high', 'oi_day_low', 'exchange_timestamp')
+_EMPTY = np.zeros(0, dtype=TICK_DTYPE)
+
+
+def price_divisors(instrument_tokens: np.ndarray) -> np.ndarray:
+    """Divisors that convert integer packet prices to rupees, per token"""
+    segment = instrument_tokens & 0xff
+    return np.where(segment == CDS_SEGMENT, 10000000.0,
+                    np.where(segment == BCD_SEGMENT, 10000.0, 100.0))
+
+
+def _fill(out: np.ndarray, packets: np.ndarray, mode: int) -> None:
+    """Convert wire packets of one mode into TICK_DTYPE rows"""
+    names = packets.dtype.names
+    tokens = packets['instrument_token']
+    out['instrument_token'] = tokens
+    out['mode'] = mode
+    divisor = price_divisors(out['instrument_token'])
+    for name in PRICE_FIELDS:
+        if name in names:
+            out[name] = packets[name] / divisor
+    for name in _COUNT_FIELDS:
+        if name in names:
+            out[name] = packets[name]
+    if 'change' not in names and 'close' in names:
+        out['change'] = out['last_price'] - out['close']
+    if 'depth' in names:
+        depth = packets['depth']
+        for side, levels in (('bid', slice(0, DEPTH_LEVELS)), ('ask', slice(DEPTH_LEVELS, None))):
+            out[f'{side}_quantity'] = depth['quantity'][:, levels]
+            out[f'{side}_price'] = depth['price'][:, levels] / divisor[:, None]
+            out[f'{side}_orders'] = depth['orders'][:, levels]
+
+
+def decode_frame(frame: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Decode every packet in a binary frame into a TICK_DTYPE array
+
+    Frame layout (big-endian): uint16 packet count, then per packet a uint16
+    length followed by the packet. Heartbeats and unknown packet lengths
+    decode to no rows.
+    """
+    view = memoryview(frame)
+    if len(view) < 4:
+        return _EMPTY  # Heartbeat
+    count = int.from_bytes(view[0:2], 'big')
+    length = int.from_bytes(view[2:4], 'big')
+
+    wire = WIRE_DTYPES.get(length)
+    if wire is not None and 2 + count * wire[0].itemsize == len(view):
+        # Uniform frame: read all packets in place with a strided dtype
+        packets = np.frombuffer(view, dtype=wire[0], count=count, offset=2)
+        if (packets['length'] == length).all():
+            out = np.zeros(count, dtype=TICK_DTYPE)
+            _fill(out, packets, wire[1])
+            return out
+
+    return _decode_mixed(view, count)
+
+
+def _decode_mixed(view: memoryview, count: int) -> np.ndarray:
+    """Decode a frame whose packets differ in mode"""
+    offsets: Dict[int, List[int]] = {}
+    order: Dict[int, List[int]] = {}
+    offset = 2
+    for position in range(count):
+        if offset + 2 > len(view):
+            break
+        length = int.from_bytes(view[offset:offset + 2], 'big')
+        if length in WIRE_DTYPES and offset + 2 + length <= len(view):
+            offsets.setdefault(length, []).append(offset)
+            order.setdefault(length, []).append(position)
+        offset += 2 + length
+    if not offsets:
+        return _EMPTY
+
+    raw = np.frombuffer(view, dtype=np.uint8)
+    parts = []
+    for length, starts in offsets.items():
+        dtype, mode = WIRE_DTYPES[length]
+        rows = raw[np.add.outer(np.array(starts), np.arange(dtype.itemsize))]
+        part = np.zeros(len(starts), dtype=TICK_DTYPE)
+        _fill(part, rows.view(dtype).reshape(-1), mode)
+        parts.append((order[length], part))
+
+    # Restore frame order
+    positions = np.concatenate([np.array(p) for p, _ in parts])
+    out = np.concatenate([part for _, part in parts])
+    return out[np.argsort(positions, kind='stable')]
+
+
+def to_quotes(ticks: np.ndarray,
+              symbols: Optional[Mapping[int, str]] = None) -> Dict[str, Dict[str, object]]:
+    """Quote dicts keyed by symbol, shaped like get_live_quotes results
+
+    Supplies the fields analyze_market_data and DataFormatter.format_market_quotes
+    read: last_price, net_change, change_percent, volume and ohlc, plus depth
+    for full-mode ticks. Tokens missing from symbols are keyed by the token.
+    """
+    symbols = symbols or {}
+    close = ticks['close']
+    change_percent = np.divide(ticks['change'] * 100, close, out=np.zeros(len(ticks)), where=close > 0)
+    columns = {name: ticks[name].tolist() for name in (
+        'instrument_token', 'mode', 'last_price', 'last_quantity', 'average_price', 'volume',
+        'buy_quantity', 'sell_quantity', 'open', 'high', 'low', 'close', 'change', 'oi',
+    )}
+    change_percent = change_percent.tolist()
+
+    quotes: Dict[str, Dict[str, object]] = {}
+    for i, token in enumerate(columns['instrument_token']):
+        quote: Dict[str, object] = {
+            'instrument_token': token,
+            'last_price': columns['last_price'][i],
+        }
+        if columns['mode'][i] != LTP_MODE:
+            quote.update(
+                last_quantity=columns['last_quantity'][i],
+                average_price=columns['average_price'][i],
+                volume=columns['volume'][i],
+                buy_quantity=columns['buy_quantity'][i],
+                sell_quantity=columns['sell_quantity'][i],
+                net_change=columns['change'][i],
+                change_percent=change_percent[i],
+                oi=columns['oi'][i],
+                ohlc={'open': columns['open'][i], 'high': columns['high'][i],
+                      'low': columns['low'][i], 'close': columns['close'][i]},
+            )
+        if columns['mode'][i] == FULL_MODE and ticks['bid_quantity'][i].any() | ticks['ask_quantity'][i].any():
+            quote['depth'] = {
+                side: [
+                    {'price': p, 'quantity': q, 'orders': o}
+                    for p, q, o in zip(ticks[f'{prefix}_price'][i].tolist(),
+                                       ticks[f'{prefix}_quantity'][i].tolist(),
+                                       ticks[f'{prefix}_orders'][i].tolist())
+                ]
+                for side, prefix in (('buy', 'bid'), ('sell', 'ask'))
+            }
+        quotes[symbols.get(token, str(token))] = quote
+    return quotes
+
+
+def encode_frame(packets: Iterable[bytes]) -> bytes:
+    """Assemble packets into one binary frame"""
+    packets = list(packets)
+    parts = [len(packets).to_bytes(2, 'big')]
+    for packet in packets:
+        parts.append(len(packet).to_bytes(2, 'big'))
+        parts.append(packet)
+    return b''.join(parts)
+
+
+def encode_packets(ticks: np.ndarray, mode: int) -> List[bytes]:
+    """Encode TICK_DTYPE rows as wire packets of one mode (for recordings and tests)"""
+    length = next(n for n, (_, m) in WIRE_DTYPES.items() if m == mode and n in (8, 44, 184))
+    dtype = WIRE_DTYPES[length][0]
+    packets = np.zeros(len(ticks), dtype=dtype)
+    packets['length'] = length
+    divisor = price_divisors(ticks['instrument_token'])
+    for name in dtype.names:
+        if name in PRICE_FIELDS:
+            packets[name] = np.rint(ticks[name] * divisor)
+        elif name in _COUNT_FIELDS or name == 'instrument_token':
+            packets[name] = ticks[name]
+    if mode == FULL_MODE:
+        depth = packets['depth']
+        for side, levels in (('bid', slice(0, DEPTH_LEVELS)), ('ask', slice(DEPTH_LEVELS, None))):
+            depth['quantity'][:, levels] = ticks[f'{side}_quantity']
+            depth['price'][:, levels] = np.rint(ticks[f'{side}_price'] * divisor[:, None])
+            depth['orders'][:, levels] = ticks[f'{side}_orders']
+        packets['depth'] = depth
+    data = packets.tobytes()
+    return [data[i + 2:i + dtype.itemsize] for i in range(0, len(data), dtype.itemsize)]
@@ -0,0 +1,234 @@
+"""
+Local GTT (Good Till Triggered) engine
+
+Triggers are kept per instrument in two sorted price-level lists: levels
+that fire when the price rises to them and levels that fire when it falls to
+them. A tick only looks at the ends of those lists, so evaluating it costs
+O(log n + k) for k crossed levels however many triggers are active.
+
+GTTs follow the Kite model: a 'single' GTT has one trigger value, and a
+'two-leg' (OCO) GTT has a lower (stop-loss) and an upper (target) value, each
+with its own order; when one leg fires the other is cancelled. A triggered
+leg's order is submitted through the supplied place_order coroutine.
+Triggered and cancelled GTTs leave gtts and the level lists at once; only the
+latest GTT_HISTORY_SIZE of them are kept, in history.
+
+GTTs live only in this process's memory and are lost when it exits, which is
+why the agent uses the engine only when asked to (attach_stream with
+local_gtts=True) and otherwise places GTTs with Kite.
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Set, Tuple
+
+import numpy as np
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+SINGLE = 'single'
+TWO_LEG = 'two-leg'
+
+ACTIVE = 'active'
+TRIGGERED = 'triggered'
+CANCELLED = 'cancelled'
+REJECTED = 'rejected'
+
+# (level, sequence, gtt id, leg); the sequence keeps equal levels in creation order
+_Entry = Tuple[float, int, int, int]
+
+OrderPlacer = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+class _Levels:
+    """Rising and falling trigger levels of one instrument"""
+
+    __slots__ = ('rising', 'falling')
+
+    def __init__(self):
+        self.rising: List[_Entry] = []  # Fire when price >= level; ascending
+        self.falling: List[_Entry] = []  # Fire when price <= level; ascending
+
+    def __bool__(self) -> bool:
+        return bool(self.rising or self.falling)
+
+    def crossed(self, price: float) -> List[_Entry]:
+        """Remove and return the entries crossed at price"""
+        crossed: List[_Entry] = []
+        if self.rising and self.rising[0][0] <= price:
+            k = bisect.bisect_right(self.rising, (price, float('inf')))
+            crossed.extend(self.rising[:k])
+            del self.rising[:k]
+        if self.falling and self.falling[-1][0] >= price:
+            k = bisect.bisect_left(self.falling, (price,))
+            crossed.extend(self.falling[k:])
+            del self.falling[k:]
+        return crossed
+
+
+class GTTEngine:
+    """Price-level indexed GTTs evaluated on every tick"""
+
+    def __init__(self, place_order: OrderPlacer):
+        self.place_order = place_order
+        self.gtts: Dict[int, Dict[str, Any]] = {}  # Active GTTs
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=config.GTT_HISTORY_SIZE)  # Latest closed GTTs
+        self._levels: Dict[int, _Levels] = {}
+        self._entries: Dict[int, List[_Entry]] = {}  # GTT id -> its level entries
+        self._tokens = np.zeros(0, dtype=np.int64)  # Instruments with active levels, sorted
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._tasks: Set['asyncio.Task[Any]'] = set()
+        self.triggered = 0  # Orders placed or rejected
+        # Tick received -> order response, seconds; only the latest samples
+        self.latencies: Deque[float] = deque(maxlen=config.GTT_LATENCY_SAMPLES)
+
+    def create(self, trigger_type: str, exchange: str, tradingsymbol: str, instrument_token: int,
+               trigger_values: List[float], last_price: float, orders: List[Dict[str, Any]]) -> int:
+        """Register a GTT and return its id
+
+        For 'single', a trigger above last_price fires when the price rises
+        to it and one below fires when the price falls to it. For 'two-leg',
+        trigger_values and orders are [stop-loss, target].
+        """
+        expected = 2 if trigger_type == TWO_LEG else 1
+        if trigger_type not in (SINGLE, TWO_LEG):
+            raise ValueError("trigger_type must be 'single' or 'two-leg'")
+        if len(trigger_values) != expected or len(orders) != expected:
+            raise ValueError(f"A {trigger_type} GTT needs {expected} trigger value(s) and order(s)")
+        if trigger_type == TWO_LEG and not trigger_values[0] < last_price < trigger_values[1]:
+            raise ValueError("Two-leg triggers must be below and above the last price")
+
+        gtt_id = next(self._ids)
+        self.gtts[gtt_id] = {
+            'id': gtt_id,
+            'type': trigger_type,
+            'trigger_type': trigger_type,
+            'exchange': exchange,
+            'tradingsymbol': tradingsymbol,
+            'instrument_token': instrument_token,
+            'trigger_values': list(trigger_values),
+            'last_price': last_price,
+            'orders': [dict(order) for order in orders],
+            'status': ACTIVE,
+            'created_at': time.time(),
+            'triggered_leg': None,
+            'result': None,
+        }
+        levels = self._levels.get(instrument_token)
+        if levels is None:
+            levels = self._levels[instrument_token] = _Levels()
+            self._tokens = np.insert(self._tokens, np.searchsorted(self._tokens, instrument_token), instrument_token)
+        entries = self._entries[gtt_id] = []
+        for leg, value in enumerate(trigger_values):
+            entry = (float(value), next(self._sequence), gtt_id, leg)
+            bisect.insort(levels.rising if value > last_price else levels.falling, entry)
+            entries.append(entry)
+        return gtt_id
+
+    def cancel(self, gtt_id: int) -> bool:
+        """Cancel an active GTT, removing its levels"""
+        gtt = self.gtts.get(gtt_id)
+        if gtt is None:
+            return False
+        gtt['status'] = CANCELLED
+        self._close(gtt)
+        return True
+
+    def _close(self, gtt: Dict[str, Any]) -> None:
+        """Move a GTT from gtts to history and remove its remaining levels"""
+        del self.gtts[gtt['id']]
+        self.history.append(gtt)
+        token = gtt['instrument_token']
+        levels = self._levels.get(token)
+        for entry in self._entries.pop(gtt['id']):
+            if levels is None:
+                break
+            for side in (levels.rising, levels.falling):
+                k = bisect.bisect_left(side, entry)
+                if k < len(side) and side[k] == entry:
+                    del side[k]
+                    break
+        if levels is not None and not levels:
+            self._drop_levels(token)
+
+    def _drop_levels(self, token: int) -> None:
+        del self._levels[token]
+        self._tokens = self._tokens[self._tokens != token]
+
+    def active(self) -> List[Dict[str, Any]]:
+        return list(self.gtts.values())
+
+    def on_ticks(self, ticks: np.ndarray, received: float) -> None:
+        """TickStream consumer: fire every active leg whose level the ticks cross"""
+        if not len(self._tokens) or not len(ticks):
+            return
+        tokens = ticks['instrument_token']
+        positions = np.searchsorted(self._tokens, tokens).clip(max=len(self._tokens) - 1)
+        hits = np.flatnonzero(self._tokens[positions] == tokens)
+        for i in hits.tolist():
+            token = int(tokens[i])
+            levels = self._levels.get(token)
+            if levels is None:
+                continue
+            price = float(ticks['last_price'][i])
+            for _, _, gtt_id, leg in levels.crossed(price):
+                self._trigger(gtt_id, leg, price, received)
+            if not levels and token in self._levels:
+                self._drop_levels(token)
+
+    def _trigger(self, gtt_id: int, leg: int, price: float, received: float) -> None:
+        gtt = self.gtts.get(gtt_id)
+        if gtt is None:
+            return  # The other leg of an OCO crossed by the same tick already fired
+        gtt['status'] = TRIGGERED
+        gtt['triggered_leg'] = leg
+        gtt['triggered_price'] = price
+        self._close(gtt)
+        task = asyncio.get_running_loop().create_task(self._place(gtt, leg, received))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _place(self, gtt: Dict[str, Any], leg: int, received: float) -> None:
+        order = gtt['orders'][leg]
+        try:
+            result = await self.place_order(
+                exchange=gtt['exchange'],
+                trading_symbol=gtt['tradingsymbol'],
+                transaction_type=order['transaction_type'],
+                quantity=order['quantity'],
+                order_type=order.get('order_type', 'LIMIT'),
+                product=order['product'],
+                price=order.get('price'),
+                tag=f"gtt{gtt['id']}leg{leg}",
+                confirmed=True,  # Confirmed when the GTT was created
+            )
+        except Exception as e:
+            result = {'error': str(e)}
+        gtt['result'] = result
+        if 'error' in result:
+            gtt['status'] = REJECTED
+            logger.error(f"GTT {gtt['id']} order rejected: {result['error']}")
+        self.triggered += 1
+        self.latencies.append(time.time() - received)
+
+    async def drain(self) -> None:
+        """Wait for triggered orders still being placed"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            'active': len(self.gtts),
+            'triggered': self.triggered,
+            'instruments': len(self._levels),
+            'trigger_ms_p50': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+            'trigger_ms_max': latencies[-1] * 1000 if latencies else 0.0,
+        }
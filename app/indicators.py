@@ -0,0 +1,348 @@
+"""
+Technical indicators over candle arrays
+
+Batch mode computes full indicator series from numpy arrays of candles (1-D
+for one symbol, or 2-D with one row per symbol and time on the last axis).
+IndicatorState keeps the running state of every indicator for many symbols
+so a new bar updates all of them in O(1) per symbol, and peek() evaluates a
+still-forming bar without committing it.
+
+Conventions: EMA-type averages start from the first value, RSI and ATR use
+Wilder smoothing (alpha = 1 / period), Bollinger bands use the population
+standard deviation, and VWAP is taken over the last sma_period bars. Values
+are NaN until an indicator has seen enough bars.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SMA_PERIOD = 20
+EMA_PERIOD = 20
+RSI_PERIOD = 14
+MACD_PERIODS = (12, 26, 9)
+ATR_PERIOD = 14
+BOLLINGER_STD = 2.0
+
+INDICATORS = ('sma', 'ema', 'rsi', 'macd', 'macd_signal', 'macd_histogram', 'atr', 'vwap',
+              'bollinger_upper', 'bollinger_middle', 'bollinger_lower')
+
+
+def _alpha(period: int) -> float:
+    return 2.0 / (period + 1)
+
+
+def _ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponentially weighted mean along the last axis, starting from the first value"""
+    out = np.empty(x.shape, dtype=np.float64)
+    if not x.shape[-1]:
+        return out
+    if x.ndim == 1:
+        # Plain floats are much faster than numpy scalars for a single series
+        value = None
+        result = []
+        for v in x.tolist():
+            value = v if value is None else value + alpha * (v - value)
+            result.append(value)
+        out[:] = result
+        return out
+    out[..., 0] = x[..., 0]
+    for t in range(1, x.shape[-1]):
+        out[..., t] = out[..., t - 1] + alpha * (x[..., t] - out[..., t - 1])
+    return out
+
+
+def _rolling_sum(x: np.ndarray, period: int) -> np.ndarray:
+    """Sum of the last period values along the last axis (partial at the start)"""
+    total = np.cumsum(x, axis=-1)
+    total[..., period:] = total[..., period:] - total[..., :-period]
+    return total
+
+
+def _warmup(values: np.ndarray, valid_from: int) -> np.ndarray:
+    values[..., :max(0, valid_from)] = np.nan
+    return values
+
+
+def sma(close: np.ndarray, period: int = SMA_PERIOD) -> np.ndarray:
+    return _warmup(_rolling_sum(close, period) / period, period - 1)
+
+
+def ema(close: np.ndarray, period: int = EMA_PERIOD) -> np.ndarray:
+    return _ewm(close, _alpha(period))
+
+
+def _changes(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    change = np.diff(close, axis=-1)
+    return np.maximum(change, 0.0), np.maximum(-change, 0.0)
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), rsi)
+    return rsi
+
+
+def _rsi_averages(close: np.ndarray, period: int) -> Tuple[np.ndarray, np.ndarray]:
+    gain, loss = _changes(close)
+    return _ewm(gain, 1.0 / period), _ewm(loss, 1.0 / period)
+
+
+def rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] > 1:
+        out[..., 1:] = _rsi_from_averages(*_rsi_averages(close, period))
+    return _warmup(out, period)
+
+
+def macd(close: np.ndarray, fast: int = MACD_PERIODS[0], slow: int = MACD_PERIODS[1],
+         signal: int = MACD_PERIODS[2]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = _ewm(line, _alpha(signal))
+    return line, signal_line, line - signal_line
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    tr = high - low
+    if close.shape[-1] > 1:
+        previous = close[..., :-1]
+        tr[..., 1:] = np.maximum(tr[..., 1:], np.maximum(np.abs(high[..., 1:] - previous),
+                                                         np.abs(low[..., 1:] - previous)))
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = ATR_PERIOD) -> np.ndarray:
+    return _warmup(_ewm(true_range(high, low, close), 1.0 / period), period - 1)
+
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+         period: int = SMA_PERIOD) -> np.ndarray:
+    """Volume-weighted typical price over the last period bars"""
+    typical = (high + low + close) / 3.0
+    pv = _rolling_sum(typical * volume, period)
+    v = _rolling_sum(volume.astype(np.float64), period)
+    return np.divide(pv, v, out=close.astype(np.float64).copy(), where=v > 0)
+
+
+def bollinger(close: np.ndarray, period: int = SMA_PERIOD,
+              num_std: float = BOLLINGER_STD) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Upper band, middle band (SMA) and lower band"""
+    middle = sma(close, period)
+    mean_sq = _rolling_sum(close * close, period) / period
+    std = np.sqrt(np.maximum(mean_sq - middle * middle, 0.0))
+    return middle + num_std * std, middle, middle - num_std * std
+
+
+def compute(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+            sma_period: int = SMA_PERIOD, ema_period: int = EMA_PERIOD, rsi_period: int = RSI_PERIOD,
+            macd_periods: Tuple[int, int, int] = MACD_PERIODS, atr_period: int = ATR_PERIOD,
+            bollinger_std: float = BOLLINGER_STD) -> Dict[str, np.ndarray]:
+    """Every indicator series for the given candles"""
+    close, high, low = (np.asarray(a, dtype=np.float64) for a in (close, high, low))
+    volume = np.asarray(volume, dtype=np.float64)
+    line, signal, histogram = macd(close, *macd_periods)
+    upper, middle, lower = bollinger(close, sma_period, bollinger_std)
+    return {
+        'sma': middle,
+        'ema': ema(close, ema_period),
+        'rsi': rsi(close, rsi_period),
+        'macd': line,
+        'macd_signal': signal,
+        'macd_histogram': histogram,
+        'atr': atr(high, low, close, atr_period),
+        'vwap': vwap(high, low, close, volume, sma_period),
+        'bollinger_upper': upper,
+        'bollinger_middle': middle,
+        'bollinger_lower': lower,
+    }
+
+
+class IndicatorState:
+    """Running indicator state for many symbols, one row per symbol
+
+    seed() loads a symbol's history with the batch functions; update() then
+    folds each new closed bar in with O(1) work per symbol, vectorized across
+    all the symbols passed at once.
+    """
+
+    _SCALARS = ('count', 'ema', 'ema_fast', 'ema_slow', 'signal', 'avg_gain', 'avg_loss', 'atr',
+                'prev_close', 'head', 'sum', 'sum_sq', 'pv_sum', 'v_sum')
+
+    def __init__(self, capacity: int = 64, sma_period: int = SMA_PERIOD, ema_period: int = EMA_PERIOD,
+                 rsi_period: int = RSI_PERIOD, macd_periods: Tuple[int, int, int] = MACD_PERIODS,
+                 atr_period: int = ATR_PERIOD, bollinger_std: float = BOLLINGER_STD):
+        self.sma_period = sma_period
+        self.ema_period = ema_period
+        self.rsi_period = rsi_period
+        self.macd_periods = macd_periods
+        self.atr_period = atr_period
+        self.bollinger_std = bollinger_std
+        self.rows: Dict[str, int] = {}
+        self.capacity = 0
+        self.state: Dict[str, np.ndarray] = {}
+        self._grow(capacity)
+
+    def _grow(self, capacity: int) -> None:
+        old = self.capacity
+        for name in self._SCALARS:
+            column = np.zeros(capacity)
+            if old:
+                column[:old] = self.state[name]
+            self.state[name] = column
+        for name in ('window', 'pv_window', 'v_window'):
+            column = np.zeros((capacity, self.sma_period))
+            if old:
+                column[:old] = self.state[name]
+            self.state[name] = column
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, symbol: str) -> int:
+        """Row for a symbol, allocating an empty one on first use"""
+        row = self.rows.get(symbol)
+        if row is None:
+            if len(self.rows) == self.capacity:
+                self._grow(self.capacity * 2)
+            row = self.rows[symbol] = len(self.rows)
+        return row
+
+    def seed(self, symbol: str, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+             volume: np.ndarray) -> int:
+        """Replace a symbol's state with the result of its candle history"""
+        row = self.row(symbol)
+        close, high, low = (np.asarray(a, dtype=np.float64) for a in (close, high, low))
+        volume = np.asarray(volume, dtype=np.float64)
+        s = self.state
+        for name in self._SCALARS:
+            s[name][row] = 0.0
+        for name in ('window', 'pv_window', 'v_window'):
+            s[name][row] = 0.0
+        n = len(close)
+        if not n:
+            return row
+
+        fast, slow, signal = self.macd_periods
+        ema_fast = ema(close, fast)
+        ema_slow = ema(close, slow)
+        s['count'][row] = n
+        s['ema'][row] = ema(close, self.ema_period)[-1]
+        s['ema_fast'][row] = ema_fast[-1]
+        s['ema_slow'][row] = ema_slow[-1]
+        s['signal'][row] = _ewm(ema_fast - ema_slow, _alpha(signal))[-1]
+        if n > 1:
+            avg_gain, avg_loss = _rsi_averages(close, self.rsi_period)
+            s['avg_gain'][row], s['avg_loss'][row] = avg_gain[-1], avg_loss[-1]
+        s['atr'][row] = _ewm(true_range(high, low, close), 1.0 / self.atr_period)[-1]
+        s['prev_close'][row] = close[-1]
+
+        # The window holds the last sma_period bars, oldest at head
+        k = min(n, self.sma_period)
+        pv = (high + low + close)[-k:] / 3.0 * volume[-k:]
+        s['window'][row, :k] = close[-k:]
+        s['pv_window'][row, :k] = pv
+        s['v_window'][row, :k] = volume[-k:]
+        s['head'][row] = k % self.sma_period
+        s['sum'][row] = close[-k:].sum()
+        s['sum_sq'][row] = (close[-k:] ** 2).sum()
+        s['pv_sum'][row] = pv.sum()
+        s['v_sum'][row] = volume[-k:].sum()
+        return row
+
+    def _step(self, rows: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+              volume: np.ndarray, commit: bool) -> Dict[str, np.ndarray]:
+        s = self.state
+        close, high, low, volume = (np.asarray(a, dtype=np.float64) for a in (close, high, low, volume))
+        count = s['count'][rows]
+        first = count == 0
+        n = count + 1
+
+        def smooth(name: str, value: np.ndarray, alpha: float) -> np.ndarray:
+            previous = s[name][rows]
+            return np.where(first, value, previous + alpha * (value - previous))
+
+        fast, slow, signal_period = self.macd_periods
+        ema_value = smooth('ema', close, _alpha(self.ema_period))
+        ema_fast = smooth('ema_fast', close, _alpha(fast))
+        ema_slow = smooth('ema_slow', close, _alpha(slow))
+        line = ema_fast - ema_slow
+        signal = smooth('signal', line, _alpha(signal_period))
+
+        prev_close = s['prev_close'][rows]
+        change = np.where(first, 0.0, close - prev_close)
+        gain, loss = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+        alpha_rsi = 1.0 / self.rsi_period
+        first_change = count == 1
+        avg_gain = np.where(first_change, gain, s['avg_gain'][rows] + alpha_rsi * (gain - s['avg_gain'][rows]))
+        avg_loss = np.where(first_change, loss, s['avg_loss'][rows] + alpha_rsi * (loss - s['avg_loss'][rows]))
+        avg_gain, avg_loss = np.where(first, 0.0, avg_gain), np.where(first, 0.0, avg_loss)
+
+        tr = np.where(first, high - low, np.maximum(high - low, np.maximum(np.abs(high - prev_close),
+                                                                           np.abs(low - prev_close))))
+        atr_value = smooth('atr', tr, 1.0 / self.atr_period)
+
+        period = self.sma_period
+        head = s['head'][rows].astype(np.int64)
+        full = n > period
+        pv = (high + low + close) / 3.0 * volume
+        total = s['sum'][rows] + close - np.where(full, s['window'][rows, head], 0.0)
+        total_sq = s['sum_sq'][rows] + close * close - np.where(full, s['window'][rows, head] ** 2, 0.0)
+        pv_sum = s['pv_sum'][rows] + pv - np.where(full, s['pv_window'][rows, head], 0.0)
+        v_sum = s['v_sum'][rows] + volume - np.where(full, s['v_window'][rows, head], 0.0)
+
+        middle = np.where(n >= period, total / period, np.nan)
+        std = np.sqrt(np.maximum(total_sq / period - middle * middle, 0.0))
+        values = {
+            'sma': middle,
+            'ema': ema_value,
+            'rsi': np.where(count >= self.rsi_period, _rsi_from_averages(avg_gain, avg_loss), np.nan),
+            'macd': line,
+            'macd_signal': signal,
+            'macd_histogram': line - signal,
+            'atr': np.where(n >= self.atr_period, atr_value, np.nan),
+            'vwap': np.divide(pv_sum, v_sum, out=close.copy(), where=v_sum > 0),
+            'bollinger_upper': middle + self.bollinger_std * std,
+            'bollinger_middle': middle,
+            'bollinger_lower': middle - self.bollinger_std * std,
+        }
+
+        if commit:
+            s['count'][rows] = n
+            s['ema'][rows] = ema_value
+            s['ema_fast'][rows] = ema_fast
+            s['ema_slow'][rows] = ema_slow
+            s['signal'][rows] = signal
+            s['avg_gain'][rows] = avg_gain
+            s['avg_loss'][rows] = avg_loss
+            s['atr'][rows] = atr_value
+            s['prev_close'][rows] = close
+            s['window'][rows, head] = close
+            s['pv_window'][rows, head] = pv
+            s['v_window'][rows, head] = volume
+            s['head'][rows] = (head + 1) % period
+            s['sum'][rows] = total
+            s['sum_sq'][rows] = total_sq
+            s['pv_sum'][rows] = pv_sum
+            s['v_sum'][rows] = v_sum
+        return values
+
+    def update(self, rows: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+               volume: np.ndarray) -> Dict[str, np.ndarray]:
+        """Fold one closed bar per row into the state; rows must be distinct"""
+        return self._step(np.asarray(rows, dtype=np.int64), close, high, low, volume, commit=True)
+
+    def peek(self, rows: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+             volume: np.ndarray) -> Dict[str, np.ndarray]:
+        """Indicator values if the given (forming) bar closed now, without changing state"""
+        return self._step(np.asarray(rows, dtype=np.int64), close, high, low, volume, commit=False)
+
+    def records(self, values: Dict[str, np.ndarray]) -> List[Dict[str, Optional[float]]]:
+        """Per-row dicts of indicator values, with None for not-yet-available ones"""
+        table = np.round(np.column_stack([values[name] for name in INDICATORS]), 4)
+        return [
+            {name: None if v != v else v for name, v in zip(INDICATORS, row)}
+            for row in table.tolist()
+        ]
@@ -0,0 +1,282 @@
+"""
+Local instrument master for fast instrument search
+
+The full instrument dump is refreshed once a day and persisted as a columnar
+store of ``.npy`` files which are memory-mapped on load. Two indexes are kept
+over ``tradingsymbol`` and ``name``:
+
+* a prefix index - the sorted unique keys of a column together with the rows
+  that carry each key, so a prefix lookup is two binary searches followed by a
+  contiguous slice (a flattened trie);
+* a trigram index - postings from every 3-character gram to the keys that
+  contain it, used for fuzzy matches when the prefix lookup runs short.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columns stored as-is (fixed-width numeric or bytes arrays)
+NUMERIC_COLUMNS = {
+    'instrument_token': np.int64,
+    'exchange_token': np.int64,
+    'last_price': np.float64,
+    'strike': np.float64,
+    'tick_size': np.float64,
+    'lot_size': np.int64,
+}
+TEXT_COLUMNS = ('tradingsymbol', 'name', 'expiry')
+# Low-cardinality columns stored as uint8 codes into a vocabulary
+CATEGORY_COLUMNS = ('exchange', 'segment', 'instrument_type')
+INDEXED_COLUMNS = ('tradingsymbol', 'name')
+
+NGRAM_SIZE = 3
+META_FILE = 'meta.json'
+CURRENT_FILE = 'CURRENT'
+
+
+def _grams(key: bytes) -> List[bytes]:
+    """Split a key into its distinct character n-grams"""
+    if len(key) < NGRAM_SIZE:
+        return []
+    return list({key[i:i + NGRAM_SIZE] for i in range(len(key) - NGRAM_SIZE + 1)})
+
+
+def _csr(groups: Dict[bytes, List[int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten a key -> ids mapping into sorted keys, offsets and postings"""
+    keys = sorted(groups)
+    ptr = np.zeros(len(keys) + 1, dtype=np.int32)
+    postings: List[int] = []
+    for i, key in enumerate(keys):
+        postings.extend(groups[key])
+        ptr[i + 1] = len(postings)
+    width = max((len(k) for k in keys), default=1) or 1
+    return (np.array(keys, dtype=f'S{width}'), ptr, np.array(postings, dtype=np.int32))
+
+
+class _ColumnIndex:
+    """Prefix and trigram index over one text column"""
+
+    def __init__(self, keys: np.ndarray, key_len: np.ndarray, key_ptr: np.ndarray, key_rows: np.ndarray,
+                 grams: np.ndarray, gram_ptr: np.ndarray, gram_keys: np.ndarray):
+        self.keys = keys
+        self.key_len = key_len
+        self.key_ptr = key_ptr
+        self.key_rows = key_rows
+        self.grams = grams
+        self.gram_ptr = gram_ptr
+        self.gram_keys = gram_keys
+
+    @classmethod
+    def build(cls, values: Iterable[bytes]) -> '_ColumnIndex':
+        """Build the index from the (upper-cased) column values"""
+        rows_by_key: Dict[bytes, List[int]] = {}
+        for row, value in enumerate(values):
+            if value:
+                rows_by_key.setdefault(value, []).append(row)
+        keys, key_ptr, key_rows = _csr(rows_by_key)
+        key_len = np.array([len(k) for k in keys.tolist()], dtype=np.uint16)
+
+        keys_by_gram: Dict[bytes, List[int]] = {}
+        for key_id, key in enumerate(keys.tolist()):
+            for gram in _grams(key):
+                keys_by_gram.setdefault(gram, []).append(key_id)
+        grams, gram_ptr, gram_keys = _csr(keys_by_gram)
+        return cls(keys, key_len, key_ptr, key_rows, grams, gram_ptr, gram_keys)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist, keyed by file suffix"""
+        return {
+            'keys': self.keys, 'key_len': self.key_len,
+            'key_ptr': self.key_ptr, 'key_rows': self.key_rows,
+            'grams': self.grams, 'gram_ptr': self.gram_ptr, 'gram_keys': self.gram_keys,
+        }
+
+    def _rows_for_keys(self, key_ids: np.ndarray, limit: int) -> np.ndarray:
+        """Expand key ids into at most limit row ids, preserving key order"""
+        # Every key carries at least one row, so limit keys are always enough
+        key_ids = key_ids[:limit]
+        starts = self.key_ptr[key_ids]
+        counts = self.key_ptr[key_ids + 1] - starts
+        ends = np.cumsum(counts)
+        idx = np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - counts), counts)
+        return self.key_rows[idx[:limit]]
+
+    def prefix(self, query: bytes, limit: int) -> np.ndarray:
+        """Rows whose key starts with query, exact match first then by key length"""
+        lo = int(np.searchsorted(self.keys, query, side='left'))
+        hi = int(np.searchsorted(self.keys, query + b'\xff', side='left'))
+        if hi <= lo:
+            return np.empty(0, dtype=np.int32)
+        key_ids = lo + np.argsort(self.key_len[lo:hi], kind='stable')
+        return self._rows_for_keys(key_ids, limit)
+
+    def fuzzy(self, query: bytes, limit: int, min_score: float = 0.5) -> np.ndarray:
+        """Rows whose key shares at least min_score of the query's trigrams"""
+        query_grams = _grams(query)
+        if not query_grams:
+            return np.empty(0, dtype=np.int32)
+        positions = np.searchsorted(self.grams, np.array(query_grams, dtype=self.grams.dtype))
+        postings = [
+            self.gram_keys[self.gram_ptr[p]:self.gram_ptr[p + 1]]
+            for p, gram in zip(positions.tolist(), query_grams)
+            if p < len(self.grams) and self.grams[p] == gram
+        ]
+        if not postings:
+            return np.empty(0, dtype=np.int32)
+
+        # Grams shared by a large share of keys (e.g. "DEC" in option symbols)
+        # say little about similarity and dominate the cost, so leave them out
+        informative = [p for p in postings if len(p) <= len(self.keys) // 10] or [min(postings, key=len)]
+        candidates = np.concatenate(informative)
+        if len(candidates) * 8 < len(self.keys):
+            key_ids, counts = np.unique(candidates, return_counts=True)
+        else:
+            counts = np.bincount(candidates, minlength=len(self.keys))
+            key_ids = np.flatnonzero(counts)
+            counts = counts[key_ids]
+        needed = max(1, int(np.ceil(len(informative) * min_score)))
+        keep = counts >= needed
+        key_ids, counts = key_ids[keep], counts[keep]
+        key_ids = key_ids[np.argsort(-counts, kind='stable')]
+        return self._rows_for_keys(key_ids, limit)
+
+
+class InstrumentMaster:
+    """Memory-mapped instrument dump with prefix and fuzzy search"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], vocabularies: Dict[str, List[str]],
+                 indexes: Dict[str, _ColumnIndex], as_of: str):
+        self.columns = columns
+        self.vocabularies = vocabularies
+        self.indexes = indexes
+        self.as_of = as_of
+
+    def __len__(self) -> int:
+        return len(self.columns['instrument_token'])
+
+    @classmethod
+    def build(cls, instruments: List[Dict[str, Any]], as_of: Optional[str] = None) -> 'InstrumentMaster':
+        """Build an in-memory master from the raw instrument dump"""
+        columns: Dict[str, np.ndarray] = {}
+        for column, dtype in NUMERIC_COLUMNS.items():
+            columns[column] = np.array([inst.get(column) or 0 for inst in instruments], dtype=dtype)
+
+        for column in TEXT_COLUMNS:
+            values = [str(inst.get(column) or '').upper().encode('utf-8') for inst in instruments]
+            width = max((len(v) for v in values), default=1) or 1
+            columns[column] = np.array(values, dtype=f'S{width}')
+
+        vocabularies: Dict[str, List[str]] = {}
+        for column in CATEGORY_COLUMNS:
+            vocabulary: Dict[str, int] = {}
+            codes = [vocabulary.setdefault(str(inst.get(column) or '').upper(), len(vocabulary))
+                     for inst in instruments]
+            if len(vocabulary) > 255:
+                raise ValueError(f"Too many distinct values for {column}")
+            columns[column] = np.array(codes, dtype=np.uint8)
+            vocabularies[column] = list(vocabulary)
+
+        indexes = {column: _ColumnIndex.build(columns[column].tolist()) for column in INDEXED_COLUMNS}
+        return cls(columns, vocabularies, indexes, as_of or date.today().isoformat())
+
+    def save(self, directory: str) -> None:
+        """Persist columns and indexes as .npy files under a dated snapshot"""
+        snapshot = os.path.join(directory, self.as_of)
+        os.makedirs(snapshot, exist_ok=True)
+        for column, values in self.columns.items():
+            np.save(os.path.join(snapshot, f'{column}.npy'), values)
+        for column, index in self.indexes.items():
+            for suffix, values in index.arrays().items():
+                np.save(os.path.join(snapshot, f'{column}.{suffix}.npy'), values)
+        with open(os.path.join(snapshot, META_FILE), 'w') as f:
+            json.dump({'as_of': self.as_of, 'count': len(self), 'vocabularies': self.vocabularies}, f)
+
+        # Switch the pointer last so readers never see a half-written snapshot,
+        # and never overwrite files that another master may still have mapped
+        pointer = os.path.join(directory, CURRENT_FILE)
+        with open(pointer + '.tmp', 'w') as f:
+            f.write(self.as_of)
+        os.replace(pointer + '.tmp', pointer)
+        for entry in os.listdir(directory):
+            path = os.path.join(directory, entry)
+            if entry != self.as_of and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    @classmethod
+    def open(cls, directory: str) -> Optional['InstrumentMaster']:
+        """Memory-map the current snapshot, or return None if absent"""
+        pointer = os.path.join(directory, CURRENT_FILE)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            snapshot = os.path.join(directory, f.read().strip())
+        with open(os.path.join(snapshot, META_FILE)) as f:
+            meta = json.load(f)
+
+        def load(name: str) -> np.ndarray:
+            # A plain ndarray view over the map avoids np.memmap's per-slice overhead
+            return np.load(os.path.join(snapshot, f'{name}.npy'), mmap_mode='r').view(np.ndarray)
+
+        columns = {c: load(c) for c in (*NUMERIC_COLUMNS, *TEXT_COLUMNS, *CATEGORY_COLUMNS)}
+        suffixes = ('keys', 'key_len', 'key_ptr', 'key_rows', 'grams', 'gram_ptr', 'gram_keys')
+        indexes = {
+            column: _ColumnIndex(**{suffix: load(f'{column}.{suffix}') for suffix in suffixes})
+            for column in INDEXED_COLUMNS
+        }
+        return cls(columns, meta['vocabularies'], indexes, meta['as_of'])
+
+    @classmethod
+    def refresh(cls, directory: str, instruments: List[Dict[str, Any]],
+                as_of: Optional[str] = None) -> Optional['InstrumentMaster']:
+        """Rebuild the store from a fresh instrument dump and map it"""
+        cls.build(instruments, as_of=as_of).save(directory)
+        logger.info(f"Instrument master refreshed with {len(instruments)} instruments")
+        return cls.open(directory)
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialise rows in the shape returned by the Kite API"""
+        fields: Dict[str, List[Any]] = {}
+        for column in NUMERIC_COLUMNS:
+            fields[column] = self.columns[column][rows].tolist()
+        for column in TEXT_COLUMNS:
+            fields[column] = [v.decode('utf-8') for v in self.columns[column][rows].tolist()]
+        for column in CATEGORY_COLUMNS:
+            vocabulary = self.vocabularies[column]
+            fields[column] = [vocabulary[code] for code in self.columns[column][rows].tolist()]
+        names = list(fields)
+        return [dict(zip(names, values)) for values in zip(*fields.values())]
+
+    def filter(self, **categories: str) -> np.ndarray:
+        """Rows whose category columns (exchange, segment, instrument_type) match"""
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in categories.items():
+            vocabulary = self.vocabularies[column]
+            value = value.upper()
+            if value not in vocabulary:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.columns[column] == vocabulary.index(value)
+        return np.flatnonzero(mask)
+
+    def search(self, query: str, filter_type: str = 'name', limit: int = 100) -> List[Dict[str, Any]]:
+        """Prefix matches first, topped up with fuzzy trigram matches"""
+        index = self.indexes[filter_type]
+        key = query.strip().upper().encode('utf-8')
+        if not key:
+            return []
+
+        rows = index.prefix(key, limit)
+        if len(rows) < limit:
+            fuzzy = index.fuzzy(key, limit + len(rows))
+            if len(fuzzy):
+                fuzzy = fuzzy[~np.isin(fuzzy, rows)]
+                rows = np.concatenate([rows, fuzzy[:limit - len(rows)]])
+
+        return self.records(rows)
@@ -0,0 +1,273 @@
+"""
+Order-update event stream
+
+Postback-style order updates (the order dicts Kite posts when an order
+changes) arrive from a pluggable source, update the agent's order book and
+risk totals through consumers, and are fanned out to asyncio subscribers as
+soon as they are received, so callers react to fills without polling
+get_orders.
+
+Sources: an in-process queue, newline-delimited JSON over a local TCP socket,
+and a minimal HTTP server that accepts postback POSTs. The HTTP server checks
+each postback's checksum against the Kite app secret; without a secret it
+only listens on a loopback address.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+OrderUpdate = Dict[str, Any]
+
+MAX_POSTBACK_SIZE = 1 << 20
+
+
+class OrderUpdateSource:
+    """Source of order-update dicts"""
+
+    async def updates(self) -> AsyncIterator[OrderUpdate]:
+        raise NotImplementedError
+        yield {}  # pragma: no cover
+
+    async def close(self) -> None:
+        pass
+
+
+class QueueOrderUpdateSource(OrderUpdateSource):
+    """Updates put() in-process; close() ends the stream"""
+
+    def __init__(self):
+        self._queue: 'asyncio.Queue[Optional[OrderUpdate]]' = asyncio.Queue()
+
+    def put(self, update: OrderUpdate) -> None:
+        self._queue.put_nowait(update)
+
+    async def updates(self) -> AsyncIterator[OrderUpdate]:
+        while True:
+            update = await self._queue.get()
+            if update is None:
+                return
+            yield update
+
+    async def close(self) -> None:
+        self._queue.put_nowait(None)
+
+
+def postback_checksum(order_id: str, order_timestamp: str, api_secret: str) -> str:
+    """Kite's postback checksum: SHA-256 of order_id + order_timestamp + api_secret"""
+    return hashlib.sha256(f"{order_id}{order_timestamp}{api_secret}".encode('utf-8')).hexdigest()
+
+
+def _is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _parse(payload: bytes) -> Optional[OrderUpdate]:
+    try:
+        update = json.loads(payload)
+    except ValueError as e:
+        logger.warning(f"Ignoring malformed order update: {e}")
+        return None
+    return update if isinstance(update, dict) and update.get('order_id') else None
+
+
+class SocketOrderUpdateSource(OrderUpdateSource):
+    """Newline-delimited JSON updates read from a local TCP socket"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def updates(self) -> AsyncIterator[OrderUpdate]:
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        async for line in reader:
+            update = _parse(line) if line.strip() else None
+            if update is not None:
+                yield update
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class PostbackServer(OrderUpdateSource):
+    """HTTP server accepting postback POSTs with a JSON order body
+
+    Only what a postback needs is implemented: one request per connection,
+    a Content-Length body, and an empty 200 response. port=0 picks a free
+    port, available as .port once the server is listening.
+
+    With an api_secret (Config.API_SECRET by default), postbacks whose
+    checksum does not match are answered 403 and dropped. Without one nothing
+    can be verified, so the server refuses to bind anywhere but loopback.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, path: str = '/postback',
+                 api_secret: Optional[str] = config.API_SECRET):
+        if not api_secret and not _is_loopback(host):
+            raise ValueError("PostbackServer needs an API secret to verify postbacks on a non-loopback host")
+        self.host = host
+        self.port = port
+        self.path = path
+        self.api_secret = api_secret
+        self.rejected = 0  # Postbacks dropped for a bad checksum
+        self._queue: 'asyncio.Queue[OrderUpdate]' = asyncio.Queue()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.listening = asyncio.Event()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        status = '400 Bad Request'
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            if len(request_line) < 2 or request_line[0] != 'POST' or request_line[1] != self.path:
+                status = '404 Not Found'
+            elif 0 < length <= MAX_POSTBACK_SIZE:
+                update = _parse(await reader.readexactly(length))
+                if update is not None and not self._verified(update):
+                    self.rejected += 1
+                    logger.warning(f"Rejected postback for order {update.get('order_id')}: checksum mismatch")
+                    status = '403 Forbidden'
+                elif update is not None:
+                    self._queue.put_nowait(update)
+                    status = '200 OK'
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            logger.warning(f"Bad postback request: {e}")
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _verified(self, update: OrderUpdate) -> bool:
+        if not self.api_secret:
+            return True
+        expected = postback_checksum(update['order_id'], update.get('order_timestamp') or '', self.api_secret)
+        return hmac.compare_digest(str(update.get('checksum', '')), expected)
+
+    async def start(self) -> None:
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self.listening.set()
+
+    async def updates(self) -> AsyncIterator[OrderUpdate]:
+        await self.start()
+        while True:
+            yield await self._queue.get()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class OrderUpdateStream:
+    """Pump order updates from a source into consumers and subscribers"""
+
+    def __init__(self, source: OrderUpdateSource):
+        self.source = source
+        self._subscribers: List[Any] = []
+        self._consumers: List[Callable[[OrderUpdate, float], Any]] = []
+        self.updates = 0
+        self.dropped_notifications = 0
+        self._dispatch_total = 0.0
+        self._dispatch_max = 0.0
+
+    def subscribe(self, order_ids: Optional[Iterable[str]] = None, symbols: Optional[Iterable[str]] = None,
+                  maxsize: int = 1024) -> 'asyncio.Queue[OrderUpdate]':
+        """Queue receiving each update, optionally filtered to order ids or tradingsymbols
+
+        When a subscriber falls behind, its oldest updates are dropped so the
+        stream never blocks or grows without bound.
+        """
+        queue: 'asyncio.Queue[OrderUpdate]' = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append((queue, set(order_ids) if order_ids is not None else None,
+                                  set(symbols) if symbols is not None else None))
+        return queue
+
+    def unsubscribe(self, queue: 'asyncio.Queue[OrderUpdate]') -> None:
+        self._subscribers = [s for s in self._subscribers if s[0] is not queue]
+
+    def add_consumer(self, consumer: Callable[[OrderUpdate, float], Any]) -> None:
+        """Call consumer(update, received) synchronously for every update, before subscribers see it"""
+        self._consumers.append(consumer)
+
+    async def wait_for(self, order_id: str, statuses: Iterable[str] = ('COMPLETE', 'CANCELLED', 'REJECTED'),
+                       timeout: Optional[float] = None) -> OrderUpdate:
+        """The first update of order_id reaching one of statuses"""
+        statuses = set(statuses)
+        queue = self.subscribe(order_ids=[order_id])
+        try:
+            async def first() -> OrderUpdate:
+                while True:
+                    update = await queue.get()
+                    if update.get('status') in statuses:
+                        return update
+            return await asyncio.wait_for(first(), timeout)
+        finally:
+            self.unsubscribe(queue)
+
+    def ingest(self, update: OrderUpdate) -> None:
+        """Process one update synchronously"""
+        started = time.perf_counter()
+        received = time.time()
+        for consumer in self._consumers:
+            try:
+                consumer(update, received)
+            except Exception as e:
+                logger.error(f"Order update consumer failed for {update.get('order_id')}: {e}")
+        for queue, order_ids, symbols in self._subscribers:
+            if order_ids is not None and update.get('order_id') not in order_ids:
+                continue
+            if symbols is not None and update.get('tradingsymbol') not in symbols:
+                continue
+            if queue.full():
+                queue.get_nowait()
+                self.dropped_notifications += 1
+            queue.put_nowait(update)
+        self.updates += 1
+        elapsed = time.perf_counter() - started
+        self._dispatch_total += elapsed
+        self._dispatch_max = max(self._dispatch_max, elapsed)
+
+    async def run(self) -> None:
+        """Consume the source until it is exhausted or the task is cancelled"""
+        try:
+            async for update in self.source.updates():
+                self.ingest(update)
+        finally:
+            await self.source.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'updates': self.updates,
+            'subscribers': len(self._subscribers),
+            'dropped_notifications': self.dropped_notifications,
+            'dispatch_ms_mean': self._dispatch_total / self.updates * 1000 if self.updates else 0.0,
+            'dispatch_ms_max': self._dispatch_max * 1000,
+        }
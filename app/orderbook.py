@@ -0,0 +1,111 @@
+"""
+Local order-book mirror
+
+Orders are kept by order_id with secondary indexes on status, symbol and
+order timestamp. A sync merges the fetched order list and only touches the
+orders that changed since the previous sync, and queries such as "open
+orders for INFY" intersect the index sets instead of scanning every order.
+"""
+
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .risk import OPEN_STATUSES
+
+_LAST = chr(0x10FFFF)  # Sorts after every order id
+
+
+def _timestamp(order: Dict[str, Any]) -> str:
+    # Kite timestamps are 'YYYY-MM-DD HH:MM:SS', so string order is time order
+    return str(order.get('order_timestamp') or '')
+
+
+class OrderBook:
+    """Orders indexed by id, status, symbol and timestamp"""
+
+    def __init__(self):
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_time: List[Tuple[str, str]] = []  # Sorted (timestamp, order_id)
+        self.synced_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self.orders.get(order_id)
+
+    def _unindex(self, order_id: str, order: Dict[str, Any]) -> None:
+        self._by_status[order.get('status')].discard(order_id)
+        self._by_symbol[order.get('tradingsymbol')].discard(order_id)
+        key = (_timestamp(order), order_id)
+        i = bisect.bisect_left(self._by_time, key)
+        if i < len(self._by_time) and self._by_time[i] == key:
+            del self._by_time[i]
+
+    def _index(self, order_id: str, order: Dict[str, Any]) -> None:
+        self._by_status.setdefault(order.get('status'), set()).add(order_id)
+        self._by_symbol.setdefault(order.get('tradingsymbol'), set()).add(order_id)
+        key = (_timestamp(order), order_id)
+        if not self._by_time or key > self._by_time[-1]:
+            self._by_time.append(key)  # New orders almost always arrive last
+        else:
+            bisect.insort(self._by_time, key)
+
+    def upsert(self, order: Dict[str, Any]) -> bool:
+        """Insert or update one order; returns whether anything changed"""
+        order_id = order.get('order_id')
+        if not order_id:
+            return False
+        current = self.orders.get(order_id)
+        if current == order:
+            return False
+        if current is not None:
+            self._unindex(order_id, current)
+        self.orders[order_id] = order
+        self._index(order_id, order)
+        return True
+
+    def merge(self, orders: Iterable[Dict[str, Any]], synced_at: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Merge a fetched order list and return the orders that changed"""
+        changed = [order for order in orders if self.upsert(order)]
+        if synced_at is not None:
+            self.synced_at = synced_at
+        return changed
+
+    def query(self, status: Optional[Iterable[str]] = None, symbol: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Orders matching every given filter, oldest first
+
+        status is one status or several; since and until bound the order
+        timestamp ('YYYY-MM-DD HH:MM:SS', inclusive); limit keeps the newest.
+        """
+        candidates: Optional[Set[str]] = None
+        if status is not None:
+            statuses = [status] if isinstance(status, str) else status
+            candidates = set().union(*(self._by_status.get(s, ()) for s in statuses))
+        if symbol is not None:
+            matching = self._by_symbol.get(symbol, set())
+            candidates = matching if candidates is None else candidates & matching
+
+        lo = bisect.bisect_left(self._by_time, (since, '')) if since else 0
+        hi = bisect.bisect_right(self._by_time, (until, _LAST)) if until else len(self._by_time)
+        if candidates is None or hi - lo <= len(candidates):
+            ids = [order_id for _, order_id in self._by_time[lo:hi] if candidates is None or order_id in candidates]
+        else:
+            # A few candidates in a wide window: sort just those
+            keys = sorted((_timestamp(self.orders[order_id]), order_id) for order_id in candidates)
+            ids = [order_id for timestamp, order_id in keys
+                   if (not since or timestamp >= since) and (not until or timestamp <= until)]
+        if limit is not None:
+            ids = ids[-limit:] if limit else []
+        return [self.orders[order_id] for order_id in ids]
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.query(status=OPEN_STATUSES, symbol=symbol)
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """The newest orders, oldest first"""
+        return [self.orders[order_id] for _, order_id in self._by_time[-limit:]] if limit else []
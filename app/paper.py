@@ -0,0 +1,496 @@
+"""
+Paper-trading exchange
+
+An in-process simulated exchange that plugs in behind the d94_* tool
+functions (see tools.set_backend), so the whole agent can run and be
+benchmarked offline.
+
+Each instrument has a price-time-priority limit order book. An incoming
+order first matches resting orders on the other side at their prices; what
+is left of a marketable order then fills at the instrument's last price
+(the simulated market), and the rest of a LIMIT order rests in the book.
+SL and SL-M orders wait in trigger heaps until the last price reaches their
+trigger and then enter as LIMIT and MARKET orders. Price updates (from
+update_price or a TickStream via on_ticks) trigger stops and fill resting
+orders the market has crossed, at their limit price.
+
+Fills update net positions, cash and the trade list. Responses are shaped
+like the tool responses the agent reads.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+OPEN = 'OPEN'
+COMPLETE = 'COMPLETE'
+CANCELLED = 'CANCELLED'
+REJECTED = 'REJECTED'
+TRIGGER_PENDING = 'TRIGGER PENDING'
+
+ORDER_TYPES = ('MARKET', 'LIMIT', 'SL', 'SL-M')
+
+ORDER_ID_BASE = 250000000000000  # Fixed-width ids, so string order is placement order
+
+
+class _Order:
+    __slots__ = ('order_id', 'seq', 'key', 'exchange', 'tradingsymbol', 'sign', 'quantity', 'filled',
+                 'value', 'price', 'trigger_price', 'order_type', 'product', 'variety', 'validity',
+                 'tag', 'status', 'status_message', 'placed_at', 'updated_at',
+                 'triggered')  # A stop order whose trigger was reached now works as its LIMIT/MARKET
+
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled
+
+    def to_dict(self) -> Dict[str, Any]:
+        cancelled = self.remaining if self.status in (CANCELLED, REJECTED) else 0
+        return {
+            'order_id': self.order_id,
+            'exchange': self.exchange,
+            'tradingsymbol': self.tradingsymbol,
+            'transaction_type': 'BUY' if self.sign > 0 else 'SELL',
+            'order_type': self.order_type,
+            'product': self.product,
+            'variety': self.variety,
+            'validity': self.validity,
+            'quantity': self.quantity,
+            'filled_quantity': self.filled,
+            'pending_quantity': self.remaining - cancelled,
+            'cancelled_quantity': cancelled,
+            'price': self.price or 0.0,
+            'trigger_price': self.trigger_price or 0.0,
+            'average_price': self.value / self.filled if self.filled else 0.0,
+            'status': self.status,
+            'status_message': self.status_message,
+            'tag': self.tag,
+            'order_timestamp': _format(self.placed_at),
+            'exchange_update_timestamp': _format(self.updated_at),
+        }
+
+
+def _format(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class _Book:
+    """Resting orders and pending stops of one instrument"""
+
+    __slots__ = ('bids', 'asks', 'buy_stops', 'sell_stops', 'last_price', 'open', 'high', 'low', 'close',
+                 'volume')
+
+    def __init__(self, last_price: float = 0.0):
+        self.bids: List[Tuple[float, int, _Order]] = []  # (-price, seq, order)
+        self.asks: List[Tuple[float, int, _Order]] = []  # (price, seq, order)
+        self.buy_stops: List[Tuple[float, int, _Order]] = []  # (trigger, seq, order): fire at price >= trigger
+        self.sell_stops: List[Tuple[float, int, _Order]] = []  # (-trigger, seq, order): fire at price <= trigger
+        self.last_price = last_price
+        self.open = self.high = self.low = self.close = last_price
+        self.volume = 0
+
+
+class _Position:
+    __slots__ = ('product', 'quantity', 'buy_quantity', 'buy_value', 'sell_quantity', 'sell_value')
+
+    def __init__(self, product: str):
+        self.product = product
+        self.quantity = 0
+        self.buy_quantity = 0
+        self.buy_value = 0.0
+        self.sell_quantity = 0
+        self.sell_value = 0.0
+
+
+class PaperExchange:
+    """Simulated exchange answering the d94_* tool calls
+
+    prices maps 'EXCHANGE:SYMBOL' to a starting last price, holdings are
+    Kite-shaped holding rows, and instruments (Kite instrument dump rows)
+    enable d94_get_instruments and token-keyed ticks.
+    """
+
+    def __init__(self, cash: float = 1_000_000.0, prices: Optional[Dict[str, float]] = None,
+                 holdings: Optional[List[Dict[str, Any]]] = None,
+                 instruments: Optional[List[Dict[str, Any]]] = None):
+        self._lock = threading.Lock()  # Tools are called from executor threads
+        self.cash = cash
+        self.blocked = 0.0  # Cash held for open buy orders
+        self.books: Dict[str, _Book] = {}
+        self.orders: Dict[str, _Order] = {}
+        self.positions: Dict[str, _Position] = {}
+        self.trades: List[Tuple[str, str, int, float, float]] = []  # (order id, key, signed qty, price, time)
+        self.holdings = [dict(row) for row in holdings or []]
+        self.instruments = list(instruments or [])
+        self.tokens = {row['instrument_token']: f"{row['exchange']}:{row['tradingsymbol']}"
+                       for row in self.instruments}
+        self.gtts: List[Dict[str, Any]] = []
+        self._ids = itertools.count(ORDER_ID_BASE)
+        self._seq = itertools.count()
+        for key, price in (prices or {}).items():
+            self.books[key] = _Book(price)
+
+    def _book(self, key: str) -> _Book:
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = _Book()
+        return book
+
+    # Matching
+
+    def _fill(self, order: _Order, quantity: int, price: float, now: float) -> None:
+        order.filled += quantity
+        order.value += quantity * price
+        order.updated_at = now
+        if order.filled == order.quantity:
+            order.status = COMPLETE
+        value = quantity * price
+        if order.sign > 0:
+            self.cash -= value
+            if order.price:
+                self.blocked -= quantity * order.price
+        else:
+            self.cash += value
+        position = self.positions.get(order.key)
+        if position is None:
+            position = self.positions[order.key] = _Position(order.product)
+        position.quantity += order.sign * quantity
+        if order.sign > 0:
+            position.buy_quantity += quantity
+            position.buy_value += value
+        else:
+            position.sell_quantity += quantity
+            position.sell_value += value
+        book = self.books[order.key]
+        book.volume += quantity
+        self.trades.append((order.order_id, order.key, order.sign * quantity, price, now))
+
+    def _execute(self, book: _Book, order: _Order, now: float) -> None:
+        """Match an active order, then fill at the market or rest it"""
+        limit = order.price if order.order_type in ('LIMIT', 'SL') else None
+        if order.sign > 0:
+            opposite, sign = book.asks, 1.0
+        else:
+            opposite, sign = book.bids, -1.0
+        while opposite and order.filled < order.quantity:
+            key, _, resting = opposite[0]
+            if resting.status != OPEN:
+                heapq.heappop(opposite)  # Cancelled or modified away
+                continue
+            price = key * sign
+            if limit is not None and (price > limit if order.sign > 0 else price < limit):
+                break
+            quantity = min(order.quantity - order.filled, resting.quantity - resting.filled)
+            self._fill(resting, quantity, price, now)
+            self._fill(order, quantity, price, now)
+            if resting.status == COMPLETE:
+                heapq.heappop(opposite)
+
+        remaining = order.quantity - order.filled
+        if not remaining:
+            return
+        market = book.last_price
+        if market > 0 and (limit is None or (market <= limit if order.sign > 0 else market >= limit)):
+            self._fill(order, remaining, market, now)
+        elif limit is None:
+            order.status = CANCELLED
+            order.status_message = 'No market price'
+        else:
+            order.status = OPEN
+            heapq.heappush(book.bids if order.sign > 0 else book.asks, (-limit if order.sign > 0 else limit,
+                                                                        order.seq, order))
+
+    def _trigger_stops(self, book: _Book, price: float, now: float) -> None:
+        while book.buy_stops and book.buy_stops[0][0] <= price:
+            _, _, order = heapq.heappop(book.buy_stops)
+            if order.status == TRIGGER_PENDING:
+                self._activate(book, order, now)
+        while book.sell_stops and -book.sell_stops[0][0] >= price:
+            _, _, order = heapq.heappop(book.sell_stops)
+            if order.status == TRIGGER_PENDING:
+                self._activate(book, order, now)
+
+    def _activate(self, book: _Book, order: _Order, now: float) -> None:
+        order.triggered = True
+        order.status = OPEN
+        self._execute(book, order, now)
+
+    def _cross_resting(self, book: _Book, price: float, now: float) -> None:
+        """Fill resting orders the market price has reached, at their limit"""
+        while book.bids and -book.bids[0][0] >= price:
+            _, _, order = heapq.heappop(book.bids)
+            if order.status == OPEN:
+                self._fill(order, order.quantity - order.filled, order.price, now)
+        while book.asks and book.asks[0][0] <= price:
+            _, _, order = heapq.heappop(book.asks)
+            if order.status == OPEN:
+                self._fill(order, order.quantity - order.filled, order.price, now)
+
+    def update_price(self, instrument: str, price: float) -> None:
+        """New market price for 'EXCHANGE:SYMBOL'"""
+        with self._lock:
+            self._update_price(instrument, price, time.time())
+
+    def _update_price(self, key: str, price: float, now: float) -> None:
+        book = self._book(key)
+        if not book.open:
+            book.open = book.high = book.low = book.close = price
+        book.last_price = price
+        book.high = max(book.high, price)
+        book.low = min(book.low, price)
+        if book.buy_stops or book.sell_stops:
+            self._trigger_stops(book, price, now)
+        if book.bids or book.asks:
+            self._cross_resting(book, price, now)
+
+    def on_ticks(self, ticks: np.ndarray, received: float) -> None:
+        """TickStream consumer: use streamed last prices as the market"""
+        with self._lock:
+            for token, price in zip(ticks['instrument_token'].tolist(), ticks['last_price'].tolist()):
+                key = self.tokens.get(token)
+                if key is not None and price > 0:
+                    self._update_price(key, price, received)
+
+    # Orders
+
+    def _reject(self, order: _Order, message: str) -> Dict[str, Any]:
+        order.status = REJECTED
+        order.status_message = message
+        return {'status': 'error', 'message': message, 'data': {'order_id': order.order_id}}
+
+    def d94_place_order(self, exchange: str, tradingsymbol: str, transaction_type: str, quantity: int,
+                        product: str, order_type: str, validity: str = 'DAY', variety: str = 'regular',
+                        price: Optional[float] = None, trigger_price: Optional[float] = None,
+                        tag: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        now = time.time()
+        order = _Order()
+        order.order_id = str(next(self._ids))
+        order.seq = next(self._seq)
+        order.key = f"{exchange}:{tradingsymbol}"
+        order.exchange = exchange
+        order.tradingsymbol = tradingsymbol
+        order.sign = 1 if transaction_type == 'BUY' else -1
+        order.quantity = int(quantity)
+        order.filled = 0
+        order.value = 0.0
+        order.price = float(price) if price else None
+        order.trigger_price = float(trigger_price) if trigger_price else None
+        order.order_type = order_type
+        order.triggered = False
+        order.product = product
+        order.variety = variety
+        order.validity = validity
+        order.tag = tag
+        order.status = OPEN
+        order.status_message = None
+        order.placed_at = order.updated_at = now
+
+        with self._lock:
+            self.orders[order.order_id] = order
+            if order_type not in ORDER_TYPES or transaction_type not in ('BUY', 'SELL'):
+                return self._reject(order, 'Invalid order type')
+            if order.quantity <= 0:
+                return self._reject(order, 'Quantity must be positive')
+            if order_type in ('LIMIT', 'SL') and not order.price:
+                return self._reject(order, 'Price required')
+            if order_type in ('SL', 'SL-M') and not order.trigger_price:
+                return self._reject(order, 'Trigger price required')
+            book = self._book(order.key)
+            if order_type == 'MARKET' and book.last_price <= 0:
+                return self._reject(order, 'No market price')
+            if order.sign > 0:
+                required = order.quantity * (order.price or book.last_price or order.trigger_price or 0.0)
+                if required > self.cash - self.blocked:
+                    return self._reject(order, 'Insufficient funds')
+                if order.price:
+                    self.blocked += order.quantity * order.price
+
+            if order_type in ('SL', 'SL-M'):
+                trigger = order.trigger_price
+                reached = book.last_price > 0 and (book.last_price >= trigger if order.sign > 0
+                                                   else book.last_price <= trigger)
+                if reached:
+                    self._activate(book, order, now)
+                else:
+                    order.status = TRIGGER_PENDING
+                    heapq.heappush(book.buy_stops if order.sign > 0 else book.sell_stops,
+                                   (trigger if order.sign > 0 else -trigger, order.seq, order))
+            else:
+                self._execute(book, order, now)
+            if order.status == CANCELLED and order.sign > 0 and order.price:
+                self.blocked -= (order.quantity - order.filled) * order.price
+        return {'status': 'success', 'data': {'order_id': order.order_id}}
+
+    def d94_modify_order(self, order_id: str, quantity: Optional[int] = None, price: Optional[float] = None,
+                         trigger_price: Optional[float] = None, order_type: Optional[str] = None,
+                         **kwargs: Any) -> Dict[str, Any]:
+        """Modify an open order; it loses its time priority, as on an exchange"""
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status not in (OPEN, TRIGGER_PENDING):
+                return {'status': 'error', 'message': f"Order {order_id} is not open"}
+            now = time.time()
+            book = self.books[order.key]
+            if order.sign > 0 and order.price:
+                self.blocked -= (order.quantity - order.filled) * order.price
+            # The old book entry is skipped lazily; the order re-enters with a new sequence
+            order.status = CANCELLED
+            replacement = _Order()
+            for name in _Order.__slots__:
+                setattr(replacement, name, getattr(order, name))
+            self.orders[order_id] = replacement
+            if quantity is not None:
+                replacement.quantity = max(int(quantity), replacement.filled)
+            if price is not None:
+                replacement.price = float(price)
+            if trigger_price is not None:
+                replacement.trigger_price = float(trigger_price)
+            if order_type is not None and order_type != replacement.order_type:
+                replacement.order_type = order_type
+                replacement.triggered = False
+            replacement.seq = next(self._seq)
+            replacement.updated_at = now
+            replacement.status = OPEN
+            if replacement.sign > 0 and replacement.price:
+                self.blocked += (replacement.quantity - replacement.filled) * replacement.price
+            if replacement.filled >= replacement.quantity:
+                replacement.status = COMPLETE
+            elif replacement.order_type in ('SL', 'SL-M') and not replacement.triggered:
+                replacement.status = TRIGGER_PENDING
+                trigger = replacement.trigger_price or 0.0
+                heapq.heappush(book.buy_stops if replacement.sign > 0 else book.sell_stops,
+                               (trigger if replacement.sign > 0 else -trigger, replacement.seq, replacement))
+                if book.last_price:
+                    self._trigger_stops(book, book.last_price, now)
+            else:
+                self._execute(book, replacement, now)
+        return {'status': 'success', 'data': {'order_id': order_id}}
+
+    def d94_cancel_order(self, order_id: str, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None or order.status not in (OPEN, TRIGGER_PENDING):
+                return {'status': 'error', 'message': f"Order {order_id} is not open"}
+            order.status = CANCELLED
+            order.updated_at = time.time()
+            if order.sign > 0 and order.price:
+                self.blocked -= (order.quantity - order.filled) * order.price
+        return {'status': 'success', 'data': {'order_id': order_id}}
+
+    def d94_get_orders(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            return {'status': 'success', 'data': [order.to_dict() for order in self.orders.values()]}
+
+    def d94_get_trades(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            trades = list(self.trades)
+        data = []
+        for trade_id, (order_id, key, quantity, price, at) in enumerate(trades, 1):
+            exchange, tradingsymbol = key.split(':', 1)
+            data.append({
+                'trade_id': str(trade_id), 'order_id': order_id, 'exchange': exchange,
+                'tradingsymbol': tradingsymbol, 'transaction_type': 'BUY' if quantity > 0 else 'SELL',
+                'quantity': abs(quantity), 'average_price': price, 'fill_timestamp': _format(at),
+            })
+        return {'status': 'success', 'data': data}
+
+    # Account
+
+    def d94_login(self, **kwargs: Any) -> Dict[str, Any]:
+        return {'status': 'success', 'data': {'user_id': 'PAPER'}}
+
+    def d94_get_profile(self, **kwargs: Any) -> Dict[str, Any]:
+        return {'status': 'success', 'data': {'user_id': 'PAPER', 'user_name': 'Paper Trading',
+                                              'exchanges': sorted({key.split(':')[0] for key in self.books})}}
+
+    def d94_get_positions(self, **kwargs: Any) -> Dict[str, Any]:
+        """Net positions as a list of rows (the shape the portfolio code reads)"""
+        with self._lock:
+            rows = []
+            for key, position in self.positions.items():
+                exchange, tradingsymbol = key.split(':', 1)
+                last_price = self.books[key].last_price
+                buy_average = position.buy_value / position.buy_quantity if position.buy_quantity else 0.0
+                sell_average = position.sell_value / position.sell_quantity if position.sell_quantity else 0.0
+                rows.append({
+                    'exchange': exchange,
+                    'tradingsymbol': tradingsymbol,
+                    'product': position.product,
+                    'quantity': position.quantity,
+                    'average_price': buy_average if position.quantity >= 0 else sell_average,
+                    'last_price': last_price,
+                    'buy_quantity': position.buy_quantity,
+                    'buy_value': position.buy_value,
+                    'sell_quantity': position.sell_quantity,
+                    'sell_value': position.sell_value,
+                    'pnl': position.sell_value - position.buy_value + position.quantity * last_price,
+                })
+        return {'status': 'success', 'data': rows}
+
+    def d94_get_holdings(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            rows = []
+            for row in self.holdings:
+                book = self.books.get(f"{row.get('exchange')}:{row.get('tradingsymbol')}")
+                last_price = book.last_price if book is not None and book.last_price else row.get('last_price', 0)
+                quantity = row.get('quantity', 0)
+                rows.append(dict(row, last_price=last_price,
+                                 pnl=(last_price - row.get('average_price', 0)) * quantity))
+        return {'status': 'success', 'data': rows}
+
+    def d94_get_margins(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            available = self.cash - self.blocked
+            return {'status': 'success', 'data': {'equity': {
+                'enabled': True,
+                'net': available,
+                'available': {'cash': available, 'live_balance': available},
+                'utilised': {'debits': self.blocked},
+            }}}
+
+    def d94_get_mf_holdings(self, **kwargs: Any) -> Dict[str, Any]:
+        return {'status': 'success', 'data': []}
+
+    # Market data
+
+    def d94_get_quotes(self, instruments: Iterable[str] = (), **kwargs: Any) -> Dict[str, Any]:
+        data = {}
+        with self._lock:
+            for instrument in instruments:
+                book = self.books.get(instrument)
+                if book is None or not book.last_price:
+                    continue
+                change = book.last_price - book.close
+                data[instrument] = {
+                    'last_price': book.last_price,
+                    'volume': book.volume,
+                    'net_change': change,
+                    'change_percent': change * 100 / book.close if book.close else 0.0,
+                    'ohlc': {'open': book.open, 'high': book.high, 'low': book.low, 'close': book.close},
+                }
+        return {'status': 'success', 'data': data}
+
+    def d94_get_instruments(self, **kwargs: Any) -> Dict[str, Any]:
+        return {'status': 'success', 'data': self.instruments}
+
+    def d94_search_instruments(self, query: str = '', filter_on: str = 'tradingsymbol',
+                               **kwargs: Any) -> Dict[str, Any]:
+        query = query.upper()
+        return {'status': 'success', 'data': [row for row in self.instruments
+                                              if query in str(row.get(filter_on, '')).upper()]}
+
+    def d94_get_historical_data(self, **kwargs: Any) -> Dict[str, Any]:
+        return {'status': 'success', 'data': []}
+
+    def d94_place_gtt_order(self, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            trigger_id = len(self.gtts) + 1
+            self.gtts.append(dict(kwargs, id=trigger_id, status='active'))
+        return {'status': 'success', 'data': {'trigger_id': trigger_id}}
+
+    def d94_get_gtts(self, **kwargs: Any) -> Dict[str, Any]:
+        return {'status': 'success', 'data': list(self.gtts)}
@@ -0,0 +1,183 @@
+"""
+Vectorized portfolio metrics
+
+Holdings and positions are converted once into struct-of-arrays numpy buffers
+and every metric - invested value, current value, P&L, return and the
+per-sector breakdown - is computed with array operations instead of a Python
+loop over the holding dicts.
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from .config import config
+
+UNKNOWN_SECTOR = 'UNKNOWN'
+
+
+def symbol_key(exchange: str, tradingsymbol: str) -> str:
+    return f"{exchange.upper()}:{tradingsymbol.upper()}"
+
+
+def _column(rows: List[Dict[str, Any]], field: str) -> np.ndarray:
+    """Extract one numeric field from every row as float64"""
+    try:
+        # Fast path when every row carries a numeric value
+        return np.fromiter(map(itemgetter(field), rows), dtype=np.float64, count=len(rows))
+    except (KeyError, TypeError, ValueError):
+        return np.array([row.get(field) or 0 for row in rows], dtype=np.float64)
+
+
+def _rows(section: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The list of row dicts in an API response section"""
+    if section and isinstance(section.get('data'), list):
+        rows = section['data']
+        if all(type(row) is dict for row in rows):
+            return rows
+        return [row for row in rows if isinstance(row, dict)]
+    return []
+
+
+class PortfolioArrays:
+    """Struct-of-arrays view of a list of holdings"""
+
+    def __init__(self, rows: List[Dict[str, Any]], sector_map: Optional[Dict[str, str]] = None):
+        self.rows = rows
+        self._positions: Optional[Dict[str, int]] = None
+        self.quantity = _column(rows, 'quantity')
+        self.average_price = _column(rows, 'average_price')
+        self.last_price = _column(rows, 'last_price')
+        self.pnl = _column(rows, 'pnl')
+
+        # Sectors are stored as integer codes into self.sectors; the pass over
+        # the rows is skipped entirely when there is no sector information
+        self.sectors = [UNKNOWN_SECTOR]
+        self.sector_codes = np.zeros(len(rows), dtype=np.int32)
+        if sector_map or (rows and 'sector' in rows[0]):
+            sector_map = sector_map or {}
+            codes: Dict[str, int] = {}
+            self.sector_codes = np.array([
+                codes.setdefault(
+                    row.get('sector') or sector_map.get(row.get('tradingsymbol', ''), UNKNOWN_SECTOR),
+                    len(codes)
+                )
+                for row in rows
+            ], dtype=np.int32)
+            self.sectors = list(codes)
+
+    def __len__(self) -> int:
+        return len(self.quantity)
+
+    def update_last_prices(self, prices: Mapping[str, float]) -> None:
+        """Re-price holdings in place from an 'EXCHANGE:TRADINGSYMBOL' -> last price mapping
+
+        Quotes between portfolio fetches update the existing buffers instead
+        of rebuilding them from the holding dicts.
+        """
+        if self._positions is None:
+            self._positions = {
+                symbol_key(row.get('exchange') or config.DEFAULT_EXCHANGE, row.get('tradingsymbol', '')): i
+                for i, row in enumerate(self.rows)
+            }
+        matched = [(self._positions[s], p) for s, p in prices.items() if s in self._positions]
+        if not matched:
+            return
+        index, values = zip(*matched)
+        self.last_price[list(index)] = values
+        self.pnl = (self.last_price - self.average_price) * self.quantity
+
+    def invested(self) -> np.ndarray:
+        return self.average_price * self.quantity
+
+    def current(self) -> np.ndarray:
+        return self.last_price * self.quantity
+
+
+def available_margin(margins: Optional[Dict[str, Any]]) -> float:
+    """Available equity cash from a margins response"""
+    margin_data = (margins or {}).get('data')
+    if isinstance(margin_data, dict):
+        equity_data = margin_data.get('equity')
+        if isinstance(equity_data, dict):
+            available_data = equity_data.get('available')
+            if isinstance(available_data, dict):
+                return float(available_data.get('cash', 0))
+    return 0.0
+
+
+def sector_breakdown(holdings: PortfolioArrays) -> Dict[str, Dict[str, float]]:
+    """Invested value, current value, P&L, return and weight per sector"""
+    if not len(holdings):
+        return {}
+    bins = len(holdings.sectors)
+    invested = np.bincount(holdings.sector_codes, weights=holdings.invested(), minlength=bins)
+    current = np.bincount(holdings.sector_codes, weights=holdings.current(), minlength=bins)
+    pnl = np.bincount(holdings.sector_codes, weights=holdings.pnl, minlength=bins)
+    total_current = current.sum()
+    returns = np.divide(pnl * 100, invested, out=np.zeros(bins), where=invested > 0)
+    weights = current / total_current * 100 if total_current > 0 else np.zeros(bins)
+    return {
+        sector: {
+            'invested': float(invested[i]),
+            'current_value': float(current[i]),
+            'pnl': float(pnl[i]),
+            'return_percentage': float(returns[i]),
+            'weight': float(weights[i]),
+        }
+        for i, sector in enumerate(holdings.sectors)
+    }
+
+
+def calculate_metrics(holdings: PortfolioArrays, positions_pnl: np.ndarray,
+                      margin: float) -> Dict[str, Any]:
+    """Portfolio summary from prebuilt arrays"""
+    total_invested = float(holdings.invested().sum())
+    current_value = float(holdings.current().sum())
+    total_pnl = float(holdings.pnl.sum() + positions_pnl.sum())
+    return {
+        'total_invested': total_invested,
+        'current_value': current_value,
+        'total_pnl': total_pnl,
+        'return_percentage': (total_pnl / total_invested * 100) if total_invested > 0 else 0,
+        'available_margin': margin,
+        'sectors': sector_breakdown(holdings),
+    }
+
+
+def calculate_portfolio_metrics(holdings: Dict[str, Any], positions: Dict[str, Any],
+                                margins: Dict[str, Any],
+                                sector_map: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Portfolio summary from raw holdings, positions and margins responses"""
+    return calculate_metrics(
+        PortfolioArrays(_rows(holdings), sector_map),
+        _column(_rows(positions), 'pnl'),
+        available_margin(margins)
+    )
+
+
+def merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Consolidate per-account summaries into one"""
+    totals = {key: 0.0 for key in ('total_invested', 'current_value', 'total_pnl', 'available_margin')}
+    sectors: Dict[str, Dict[str, float]] = {}
+    for summary in summaries:
+        for key in totals:
+            totals[key] += summary.get(key, 0.0)
+        for sector, values in summary.get('sectors', {}).items():
+            merged = sectors.setdefault(sector, {'invested': 0.0, 'current_value': 0.0, 'pnl': 0.0})
+            for key in merged:
+                merged[key] += values[key]
+
+    total_current = totals['current_value']
+    for values in sectors.values():
+        invested = values['invested']
+        values['return_percentage'] = (values['pnl'] / invested * 100) if invested > 0 else 0.0
+        values['weight'] = (values['current_value'] / total_current * 100) if total_current > 0 else 0.0
+
+    invested = totals['total_invested']
+    return dict(
+        totals,
+        return_percentage=(totals['total_pnl'] / invested * 100) if invested > 0 else 0,
+        sectors=sectors
+    )
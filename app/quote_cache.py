@@ -0,0 +1,89 @@
+"""
+Short-lived quote cache with request coalescing
+
+Quotes are cached per instrument for a fixed TTL. While a fetch for an
+instrument is in flight, other callers asking for the same instrument wait on
+that fetch instead of issuing their own (single-flight).
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+QuoteFetcher = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+
+class QuoteCache:
+    """Per-instrument TTL cache for live quotes"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._inflight: Dict[str, 'asyncio.Future[Optional[Dict[str, Any]]]'] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, instruments: List[str], fetch: QuoteFetcher) -> Dict[str, Any]:
+        """Return quotes for instruments, fetching only those not cached or in flight"""
+        now = time.monotonic()
+        found: Dict[str, Any] = {}
+        waiting: Dict[str, 'asyncio.Future[Optional[Dict[str, Any]]]'] = {}
+        to_fetch: List[str] = []
+
+        for instrument in dict.fromkeys(instruments):
+            entry = self._entries.get(instrument)
+            if entry is not None and now - entry[0] < self.ttl:
+                found[instrument] = entry[1]
+                self.hits += 1
+            elif instrument in self._inflight:
+                waiting[instrument] = self._inflight[instrument]
+                self.coalesced += 1
+            else:
+                to_fetch.append(instrument)
+                self.misses += 1
+
+        if to_fetch:
+            loop = asyncio.get_running_loop()
+            futures = {instrument: loop.create_future() for instrument in to_fetch}
+            self._inflight.update(futures)
+            fetched: Dict[str, Any] = {}
+            try:
+                fetched = await fetch(to_fetch) or {}
+            finally:
+                # Always release waiters; on failure they simply see no quote
+                stamp = time.monotonic()
+                for instrument, future in futures.items():
+                    del self._inflight[instrument]
+                    quote = fetched.get(instrument)
+                    if quote is not None:
+                        self._entries[instrument] = (stamp, quote)
+                        found[instrument] = quote
+                    future.set_result(quote)
+
+        for instrument, future in waiting.items():
+            # Shield so a cancelled caller does not cancel the shared fetch
+            quote = await asyncio.shield(future)
+            if quote is not None:
+                found[instrument] = quote
+
+        return {instrument: found[instrument] for instrument in instruments if instrument in found}
+
+    def invalidate(self, instruments: Optional[List[str]] = None) -> None:
+        """Drop cached quotes for instruments, or all of them"""
+        if instruments is None:
+            self._entries.clear()
+        else:
+            for instrument in instruments:
+                self._entries.pop(instrument, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and coalescing counters"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'cached_instruments': len(self._entries),
+        }
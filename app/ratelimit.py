@@ -0,0 +1,176 @@
+"""
+Async rate-limit scheduler for Kite API calls
+
+Each endpoint class has its own token bucket. Callers queue in one of three
+priority lanes; whenever a bucket has capacity it is handed to the oldest
+waiter of the highest lane, so order placement never waits behind a backlog
+of quote or historical refreshes sharing the scheduler.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Priority lanes, highest first
+ORDER_LANE = 0
+INTERACTIVE_LANE = 1
+BULK_LANE = 2
+LANE_NAMES = ('order', 'interactive', 'bulk')
+
+# Tool name -> (rate-limit endpoint, priority lane)
+ENDPOINTS: Dict[str, Tuple[str, int]] = {
+    'd94_place_order': ('order', ORDER_LANE),
+    'd94_modify_order': ('order', ORDER_LANE),
+    'd94_cancel_order': ('order', ORDER_LANE),
+    'd94_place_gtt_order': ('default', ORDER_LANE),
+    'd94_get_quotes': ('quote', BULK_LANE),
+    'd94_get_historical_data': ('historical', BULK_LANE),
+    'd94_get_instruments': ('default', BULK_LANE),
+}
+DEFAULT_ENDPOINT = ('default', INTERACTIVE_LANE)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> bool:
+        """Take one token if available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until the next token is available"""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _Waiter:
+    __slots__ = ('endpoint', 'future', 'enqueued')
+
+    def __init__(self, endpoint: str, future: 'asyncio.Future[None]', enqueued: float):
+        self.endpoint = endpoint
+        self.future = future
+        self.enqueued = enqueued
+
+
+class RateLimiter:
+    """Per-endpoint token buckets with priority lanes"""
+
+    def __init__(self, rates: Dict[str, float], window: float = 1.0):
+        # A bucket may burst up to one window's worth of requests
+        self._buckets = {
+            endpoint: TokenBucket(rate, capacity=max(1.0, rate * window))
+            for endpoint, rate in rates.items()
+        }
+        self._lanes: List[Deque[_Waiter]] = [deque() for _ in LANE_NAMES]
+        self._queued: Dict[str, int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._metrics = [
+            {'requests': 0, 'queued': 0, 'max_depth': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for _ in LANE_NAMES
+        ]
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        return self._buckets.get(endpoint) or self._buckets['default']
+
+    def try_acquire(self, endpoint: str, lane: int = INTERACTIVE_LANE) -> bool:
+        """Take a token for endpoint only if one is free now and nobody is queued for it"""
+        if not self._queued.get(endpoint) and self._bucket(endpoint).try_take(time.monotonic()):
+            self._record(lane, 0.0)
+            return True
+        return False
+
+    async def acquire(self, endpoint: str, lane: int = INTERACTIVE_LANE) -> None:
+        """Wait until a request to endpoint may be sent"""
+        if self.try_acquire(endpoint, lane):
+            return
+
+        now = time.monotonic()
+        waiter = _Waiter(endpoint, asyncio.get_running_loop().create_future(), now)
+        self._lanes[lane].append(waiter)
+        self._queued[endpoint] = self._queued.get(endpoint, 0) + 1
+        metrics = self._metrics[lane]
+        metrics['max_depth'] = max(metrics['max_depth'], len(self._lanes[lane]))
+        self._dispatch()
+        try:
+            await waiter.future
+        finally:
+            if not waiter.future.done() or waiter.future.cancelled():
+                # Cancelled while queued: drop out of the lane
+                self._remove(lane, waiter)
+
+    def _remove(self, lane: int, waiter: _Waiter) -> None:
+        try:
+            self._lanes[lane].remove(waiter)
+            self._queued[waiter.endpoint] -= 1
+        except ValueError:
+            pass
+
+    def _record(self, lane: int, wait: float) -> None:
+        metrics = self._metrics[lane]
+        metrics['requests'] += 1
+        metrics['total_wait'] += wait
+        metrics['max_wait'] = max(metrics['max_wait'], wait)
+        if wait > 0:
+            metrics['queued'] += 1
+
+    def _dispatch(self) -> None:
+        """Hand free tokens to queued waiters, highest lane first"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        exhausted = set()
+        next_wake: Optional[float] = None
+
+        for lane, waiters in enumerate(self._lanes):
+            remaining: Deque[_Waiter] = deque()
+            for waiter in waiters:
+                if waiter.future.done():
+                    self._queued[waiter.endpoint] -= 1
+                    continue
+                if waiter.endpoint not in exhausted:
+                    bucket = self._bucket(waiter.endpoint)
+                    if bucket.try_take(now):
+                        self._queued[waiter.endpoint] -= 1
+                        self._record(lane, now - waiter.enqueued)
+                        waiter.future.set_result(None)
+                        continue
+                    # Lower lanes and later waiters must not overtake this one
+                    exhausted.add(waiter.endpoint)
+                    wait = bucket.wait_time(now)
+                    next_wake = wait if next_wake is None else min(next_wake, wait)
+                remaining.append(waiter)
+            self._lanes[lane] = remaining
+
+        if next_wake is not None:
+            self._timer = asyncio.get_running_loop().call_later(next_wake, self._dispatch)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait-time metrics per priority lane"""
+        lanes: Dict[str, Any] = {}
+        for name, waiters, metrics in zip(LANE_NAMES, self._lanes, self._metrics):
+            requests = metrics['requests']
+            lanes[name] = {
+                'depth': len(waiters),
+                'max_depth': metrics['max_depth'],
+                'requests': requests,
+                'queued_requests': metrics['queued'],
+                'avg_wait': metrics['total_wait'] / requests if requests else 0.0,
+                'max_wait': metrics['max_wait'],
+            }
+        return lanes
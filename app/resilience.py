@@ -0,0 +1,221 @@
+"""
+Retries, hedged requests and circuit breakers for idempotent reads
+
+Each read endpoint keeps a window of recent latencies. A call that is still
+running when the window's p95 has elapsed gets a second (hedged) request,
+and whichever answers first wins, which cuts tail latency for a few percent
+more requests. Failed attempts are retried with exponential backoff and full
+jitter, up to MAX_RETRIES, each bounded by API_TIMEOUT. After repeated
+failures an endpoint's circuit breaker opens and calls fail fast until a
+trial call succeeds.
+
+Callers that are rate limited pass acquire, which is awaited for a token
+before every attempt and is not counted in latencies or timeouts, and
+try_acquire: a hedge is only sent if a token is free right away, so hedges
+never queue for, or use up, capacity the first request is waiting on.
+
+Only use this for reads: a hedged or retried order could be placed twice.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one trial call through after reset_timeout"""
+
+    def __init__(self, failure_threshold: int = config.CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = config.CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def abandon(self) -> None:
+        """A call let through by allow() was cancelled before it had a result"""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_running = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"Circuit opened after {self.failures} failures")
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyWindow:
+    """Recent latencies of one endpoint with a cached percentile"""
+
+    def __init__(self, size: int = config.HEDGE_WINDOW, percentile: float = config.HEDGE_PERCENTILE):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.percentile = percentile
+        self._cached: Optional[float] = None
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._cached = None
+
+    def value(self) -> Optional[float]:
+        """The percentile in seconds, or None until enough samples exist"""
+        if len(self.samples) < config.HEDGE_MIN_SAMPLES:
+            return None
+        if self._cached is None:
+            ordered = sorted(self.samples)
+            self._cached = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+        return self._cached
+
+
+class _Endpoint:
+    __slots__ = ('breaker', 'latency', 'calls', 'retries', 'hedges', 'hedge_wins', 'hedges_skipped',
+                 'failures', 'rejected')
+
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyWindow()
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self.failures = 0
+        self.rejected = 0
+
+
+class Resilience:
+    """Per-endpoint retry, hedging and circuit breaking"""
+
+    def __init__(self, max_retries: int = config.MAX_RETRIES, timeout: float = config.API_TIMEOUT,
+                 backoff_base: float = config.RETRY_BACKOFF_BASE, backoff_max: float = config.RETRY_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.endpoints: Dict[str, _Endpoint] = {}
+
+    def _endpoint(self, name: str) -> _Endpoint:
+        endpoint = self.endpoints.get(name)
+        if endpoint is None:
+            endpoint = self.endpoints[name] = _Endpoint()
+        return endpoint
+
+    async def call(self, name: str, request: Callable[[], Awaitable[T]], hedge: bool = True,
+                   acquire: Optional[Callable[[], Awaitable[None]]] = None,
+                   try_acquire: Optional[Callable[[], bool]] = None) -> T:
+        """Run request() for endpoint name with retries, hedging and the circuit breaker
+        
+        acquire() is awaited before every attempt and try_acquire() must grant
+        each hedge; see the module docstring.
+        """
+        endpoint = self._endpoint(name)
+        endpoint.calls += 1
+        for attempt in range(self.max_retries + 1):
+            if not endpoint.breaker.allow():
+                endpoint.rejected += 1
+                raise CircuitOpenError(f"{name} is unavailable (circuit open)")
+            try:
+                if acquire is not None:
+                    await acquire()
+                started = time.monotonic()
+                result = await asyncio.wait_for(self._attempt(endpoint, request, hedge, try_acquire), self.timeout)
+            except asyncio.CancelledError:
+                endpoint.breaker.abandon()
+                raise
+            except Exception as e:
+                endpoint.failures += 1
+                endpoint.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                endpoint.retries += 1
+                logger.warning(f"{name} failed ({e or type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            endpoint.breaker.record_success()
+            endpoint.latency.add(time.monotonic() - started)
+            return result
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def _attempt(self, endpoint: _Endpoint, request: Callable[[], Awaitable[T]], hedge: bool,
+                       try_acquire: Optional[Callable[[], bool]]) -> T:
+        tasks = [asyncio.ensure_future(request())]
+        try:
+            threshold = endpoint.latency.value() if hedge else None
+            if threshold is None:
+                return await tasks[0]
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if not done:
+                if try_acquire is None or try_acquire():
+                    # Slower than p95 so far: race a second request against the first
+                    endpoint.hedges += 1
+                    tasks.append(asyncio.ensure_future(request()))
+                else:
+                    endpoint.hedges_skipped += 1
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not tasks[0]:
+                            endpoint.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                'calls': endpoint.calls,
+                'retries': endpoint.retries,
+                'failures': endpoint.failures,
+                'hedges': endpoint.hedges,
+                'hedge_wins': endpoint.hedge_wins,
+                'hedges_skipped': endpoint.hedges_skipped,
+                'rejected': endpoint.rejected,
+                'p95_ms': (endpoint.latency.value() or 0.0) * 1000,
+                'circuit': endpoint.breaker.state,
+            }
+            for name, endpoint in self.endpoints.items()
+        }
@@ -0,0 +1,240 @@
+"""
+Pre-trade risk engine
+
+Exposure, per-symbol positions and open-order notional are kept as running
+totals that are adjusted on every order, fill and price event, so checking
+an order against all limits is a handful of dict lookups and never needs
+holdings or positions to be fetched again.
+
+Limits (from Config):
+* MAX_ORDER_VALUE - larger orders need explicit confirmation;
+* MAX_POSITION_SIZE - a symbol's projected position (including open orders)
+  may not exceed this fraction of the portfolio value;
+* MAX_EXPOSURE - gross exposure plus open-order notional, as a multiple of
+  the portfolio value;
+* MAX_OPEN_ORDER_VALUE - total notional of working orders.
+
+The portfolio-relative limits apply once the engine has been seeded with a
+portfolio. Orders without any price to value them at (a MARKET order before
+the first quote) skip the value-based limits and are left to the broker.
+
+reserve() checks an order and counts it as working in the same step, so
+orders validated before earlier ones are submitted (a basket, or concurrent
+place_order calls) are checked against each other. A reservation becomes an
+order with commit() once placed, or is dropped with release().
+"""
+
+import itertools
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+from .config import config
+from .portfolio import _rows, available_margin, symbol_key
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('OPEN', 'TRIGGER PENDING', 'AMO REQ RECEIVED', 'PUT ORDER REQ RECEIVED',
+                 'VALIDATION PENDING', 'OPEN PENDING', 'MODIFY PENDING', 'MODIFY VALIDATION PENDING')
+
+
+class RiskDecision(NamedTuple):
+    allowed: bool
+    requires_confirmation: bool = False
+    reason: Optional[str] = None
+    order_value: float = 0.0
+    reservation: Optional[str] = None  # Set by reserve() for allowed orders
+
+
+class _OpenOrder:
+    __slots__ = ('symbol', 'sign', 'pending', 'filled', 'price')
+
+    def __init__(self, symbol: str, sign: int, pending: int, price: float):
+        self.symbol = symbol
+        self.sign = sign
+        self.pending = pending
+        self.filled = 0
+        self.price = price
+
+
+class PreTradeRiskEngine:
+    """Running account, symbol and open-order totals with O(1) order checks"""
+
+    def __init__(self, max_order_value: float = config.MAX_ORDER_VALUE,
+                 max_position_size: float = config.MAX_POSITION_SIZE,
+                 max_exposure: float = config.MAX_EXPOSURE,
+                 max_open_order_value: float = config.MAX_OPEN_ORDER_VALUE):
+        self.max_order_value = max_order_value
+        self.max_position_size = max_position_size
+        self.max_exposure = max_exposure
+        self.max_open_order_value = max_open_order_value
+        self.portfolio_value = 0.0
+        self.positions: Dict[str, int] = {}  # Net quantity per symbol
+        self.prices: Dict[str, float] = {}  # Reference price per symbol
+        self.pending: Dict[str, int] = {}  # Signed quantity of working orders per symbol
+        self.exposure = 0.0  # Sum of |position| * price
+        self.open_order_value = 0.0  # Sum of pending quantity * order price
+        self.orders: Dict[str, _OpenOrder] = {}
+        self._reservation_ids = itertools.count(1)
+
+    # Running totals
+
+    def _contribution(self, symbol: str) -> float:
+        return abs(self.positions.get(symbol, 0)) * self.prices.get(symbol, 0.0)
+
+    def _set_position(self, symbol: str, quantity: int, price: Optional[float] = None) -> None:
+        self.exposure -= self._contribution(symbol)
+        self.positions[symbol] = quantity
+        if price:
+            self.prices[symbol] = price
+        self.exposure += self._contribution(symbol)
+
+    def update_price(self, symbol: str, price: float) -> None:
+        """New reference price for a symbol (e.g. from a quote or tick)"""
+        if price > 0:
+            self._set_position(symbol, self.positions.get(symbol, 0), price)
+
+    def seed(self, holdings: Dict[str, Any], positions: Dict[str, Any], margins: Dict[str, Any]) -> None:
+        """Reset positions and portfolio value from fetched portfolio sections"""
+        position_data = (positions or {}).get('data')
+        if isinstance(position_data, dict):
+            # Kite reports positions as {'net': [...], 'day': [...]}
+            positions = {'data': position_data.get('net') or []}
+        net: Dict[str, int] = {}
+        for row in _rows(holdings) + _rows(positions):
+            if not row.get('tradingsymbol'):
+                continue
+            symbol = symbol_key(row.get('exchange') or config.DEFAULT_EXCHANGE, row['tradingsymbol'])
+            net[symbol] = net.get(symbol, 0) + int(row.get('quantity') or 0)
+            price = float(row.get('last_price') or 0)
+            if price > 0:
+                self.prices[symbol] = price
+
+        self.positions.clear()
+        self.exposure = 0.0
+        for symbol, quantity in net.items():
+            self._set_position(symbol, quantity)
+        holdings_value = sum(float(row.get('quantity') or 0) * float(row.get('last_price') or 0)
+                             for row in _rows(holdings))
+        self.portfolio_value = holdings_value + available_margin(margins)
+
+    # Order lifecycle
+
+    def on_order_placed(self, order_id: str, symbol: str, transaction_type: str,
+                        quantity: int, price: float) -> None:
+        if not order_id or order_id in self.orders:
+            return
+        sign = 1 if transaction_type == 'BUY' else -1
+        self.orders[order_id] = _OpenOrder(symbol, sign, quantity, price)
+        self.pending[symbol] = self.pending.get(symbol, 0) + sign * quantity
+        self.open_order_value += quantity * price
+
+    def on_fill(self, order_id: str, quantity: int, price: float) -> None:
+        """Move filled quantity from the working order into the position"""
+        order = self.orders.get(order_id)
+        if order is None or quantity <= 0:
+            return
+        quantity = min(quantity, order.pending)
+        self._release(order, quantity)
+        order.filled += quantity
+        self._set_position(order.symbol, self.positions.get(order.symbol, 0) + order.sign * quantity, price)
+        if not order.pending:
+            del self.orders[order_id]
+
+    def on_order_closed(self, order_id: str) -> None:
+        """Release what is left of a cancelled, rejected or completed order"""
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self._release(order, order.pending)
+
+    def _release(self, order: _OpenOrder, quantity: int) -> None:
+        order.pending -= quantity
+        self.pending[order.symbol] = self.pending.get(order.symbol, 0) - order.sign * quantity
+        self.open_order_value -= quantity * order.price
+
+    def apply_order_update(self, order: Dict[str, Any]) -> None:
+        """Fold a Kite order (from the order book or a postback) into the totals"""
+        order_id = order.get('order_id')
+        tracked = self.orders.get(order_id)
+        if tracked is None:
+            return
+        filled = int(order.get('filled_quantity') or 0)
+        if filled > tracked.filled:
+            price = float(order.get('average_price') or 0) or tracked.price
+            self.on_fill(order_id, filled - tracked.filled, price)
+        if order.get('status') not in OPEN_STATUSES:
+            self.on_order_closed(order_id)
+
+    # Reservations
+
+    def reserve(self, symbol: str, transaction_type: str, quantity: int,
+                price: Optional[float] = None, confirmed: bool = False) -> RiskDecision:
+        """check() an order and, if it is allowed, count it as working until commit() or release()"""
+        decision = self.check(symbol, transaction_type, quantity, price, confirmed)
+        if decision.allowed:
+            reservation = f"reservation{next(self._reservation_ids)}"
+            self.on_order_placed(reservation, symbol, transaction_type, quantity,
+                                 price or self.prices.get(symbol, 0.0))
+            decision = decision._replace(reservation=reservation)
+        return decision
+
+    def commit(self, reservation: str, order_id: Optional[str]) -> None:
+        """The reserved order was placed as order_id"""
+        order = self.orders.pop(reservation, None)
+        if order is None:
+            return
+        if not order_id or order_id in self.orders:
+            # Order updates could never be matched to it, so it would never be released
+            self._release(order, order.pending)
+        else:
+            self.orders[order_id] = order
+
+    def release(self, reservation: str) -> None:
+        """The reserved order was not placed"""
+        self.on_order_closed(reservation)
+
+    # Checks
+
+    def check(self, symbol: str, transaction_type: str, quantity: int,
+              price: Optional[float] = None, confirmed: bool = False) -> RiskDecision:
+        """Check an order against every limit in constant time"""
+        if quantity <= 0:
+            return RiskDecision(False, reason="Quantity must be positive")
+        price = price or self.prices.get(symbol, 0.0)
+        if price <= 0:
+            logger.warning(f"No reference price for {symbol}; skipping value-based risk checks")
+            return RiskDecision(True)
+
+        sign = 1 if transaction_type == 'BUY' else -1
+        value = quantity * price
+        position = self.positions.get(symbol, 0)
+        pending = self.pending.get(symbol, 0)
+        projected = position + pending + sign * quantity
+        increases = abs(projected) > abs(position + pending)
+
+        if self.open_order_value + value > self.max_open_order_value:
+            return RiskDecision(False, reason=f"Open order value would exceed ₹{self.max_open_order_value:,.0f}",
+                                order_value=value)
+        if self.portfolio_value > 0 and increases:
+            limit = self.max_position_size * self.portfolio_value
+            if abs(projected) * price > limit:
+                return RiskDecision(False, reason=f"Position in {symbol} would exceed "
+                                                  f"{self.max_position_size:.0%} of portfolio (₹{limit:,.0f})",
+                                    order_value=value)
+            exposure_limit = self.max_exposure * self.portfolio_value
+            if self.exposure + self.open_order_value + value > exposure_limit:
+                return RiskDecision(False, reason=f"Exposure would exceed ₹{exposure_limit:,.0f}",
+                                    order_value=value)
+        if value > self.max_order_value and not confirmed:
+            return RiskDecision(False, requires_confirmation=True,
+                                reason=f"Order value ₹{value:,.2f} exceeds ₹{self.max_order_value:,.0f}",
+                                order_value=value)
+        return RiskDecision(True, order_value=value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'portfolio_value': self.portfolio_value,
+            'exposure': self.exposure,
+            'open_order_value': self.open_order_value,
+            'open_orders': len(self.orders),
+            'symbols': len(self.positions),
+        }
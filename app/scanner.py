@@ -0,0 +1,130 @@
+"""
+Full-universe market scanner
+
+Every instrument of one type on an exchange (NSE equities by default) is
+ranked into top gainers, losers, volume spikes and gap-ups. Quotes come from
+the agent's tick stream when one is attached, and otherwise (or for
+instruments it does not carry) from get_live_quotes, which batches the
+requests and shares the quote cache.
+Rankings use heap-based top-K selection, so a scan is O(n log k) rather than
+a full sort of the universe.
+
+A volume spike is today's volume relative to the instrument's average daily
+volume over the cached daily candles; instruments without cached history are
+compared with the median volume of the universe instead.
+"""
+
+import heapq
+import logging
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .candle_cache import to_epoch
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+RANKINGS = ('gainers', 'losers', 'volume_spikes', 'gap_ups')
+
+
+class MarketScanner:
+    """Top movers across a whole exchange segment"""
+
+    def __init__(self, agent: Any, exchange: str = config.SCANNER_EXCHANGE,
+                 instrument_type: str = config.SCANNER_INSTRUMENT_TYPE, top_k: int = config.SCANNER_TOP_K):
+        self.agent = agent
+        self.exchange = exchange
+        self.instrument_type = instrument_type
+        self.top_k = top_k
+        self._universe: List[str] = []
+        self._tokens: Dict[int, str] = {}
+        self._baseline = np.zeros(0)
+        self._universe_date: Optional[date] = None
+
+    async def _load_universe(self) -> None:
+        """Instrument identifiers and average daily volumes, refreshed once a day"""
+        today = date.today()
+        if self._universe_date == today:
+            return
+        instruments = await self.agent.get_instrument_universe(self.exchange, self.instrument_type)
+        self._universe = [f"{i['exchange']}:{i['tradingsymbol']}" for i in instruments]
+        self._tokens = {i['instrument_token']: identifier for i, identifier in zip(instruments, self._universe)}
+
+        # Only the local candle cache is read here; the scan never waits on history
+        end = to_epoch(datetime.combine(today, datetime.min.time()))
+        start = end - config.SCANNER_VOLUME_LOOKBACK_DAYS * 86400
+        baseline = np.full(len(instruments), np.nan)
+        for i, instrument in enumerate(instruments):
+            candles = self.agent.candle_cache.read_array(instrument['instrument_token'], 'day', start, end)
+            if len(candles):
+                baseline[i] = candles['volume'].mean()
+        self._baseline = baseline
+        self._universe_date = today
+        logger.info(f"Scanner universe: {len(self._universe)} {self.exchange} {self.instrument_type} instruments")
+
+    def _top(self, values: List[float], identifiers: List[str], rows: Dict[str, Any], field: str,
+             largest: bool = True, signed: bool = True) -> List[Dict[str, Any]]:
+        """Top-K rows by value; signed rankings only consider moves in their direction"""
+        if largest:
+            candidates = (i for i, v in enumerate(values) if v > 0 or (not signed and v == v))
+            best = heapq.nlargest(self.top_k, candidates, key=values.__getitem__)
+        else:
+            candidates = (i for i, v in enumerate(values) if v < 0)
+            best = heapq.nsmallest(self.top_k, candidates, key=values.__getitem__)
+        return [dict(rows[identifiers[i]], **{field: values[i]}) for i in best]
+
+    async def _quotes(self) -> Dict[str, Any]:
+        stream = getattr(self.agent, 'tick_stream', None)
+        quotes: Dict[str, Any] = stream.quotes(self._tokens) if stream is not None else {}
+        missing = [identifier for identifier in self._universe if identifier not in quotes]
+        if missing:
+            quotes.update(await self.agent.get_live_quotes(missing))
+        return quotes
+
+    async def scan(self) -> Dict[str, Any]:
+        """Quote the universe and rank it; also reports elapsed seconds and instruments scanned"""
+        started = time.perf_counter()
+        await self._load_universe()
+        quotes = await self._quotes()
+
+        identifiers: List[str] = []
+        baseline: List[float] = []
+        for i, identifier in enumerate(self._universe):
+            if isinstance(quotes.get(identifier), dict):
+                identifiers.append(identifier)
+                baseline.append(self._baseline[i])
+
+        n = len(identifiers)
+        ohlc = [quotes[identifier].get('ohlc') or {} for identifier in identifiers]
+        last = np.fromiter((quotes[i].get('last_price') or 0 for i in identifiers), dtype=np.float64, count=n)
+        volume = np.fromiter((quotes[i].get('volume') or 0 for i in identifiers), dtype=np.float64, count=n)
+        opened = np.fromiter((o.get('open') or 0 for o in ohlc), dtype=np.float64, count=n)
+        previous = np.fromiter((o.get('close') or 0 for o in ohlc), dtype=np.float64, count=n)
+
+        valid = previous > 0
+        change = np.divide((last - previous) * 100, previous, out=np.full(n, np.nan), where=valid)
+        gap = np.divide((opened - previous) * 100, previous, out=np.full(n, np.nan), where=valid & (opened > 0))
+        average = np.array(baseline, dtype=np.float64)
+        if n:
+            median = np.median(volume[volume > 0]) if (volume > 0).any() else 0.0
+            average = np.where(np.isnan(average) | (average <= 0), median, average)
+        spike = np.divide(volume, average, out=np.full(n, np.nan), where=average > 0)
+
+        rows = {
+            identifier: {'instrument': identifier, 'last_price': p, 'change_percent': c, 'volume': v}
+            for identifier, p, c, v in zip(identifiers, last.tolist(), change.tolist(), volume.tolist())
+        }
+        change_list = change.tolist()
+        gap_list = gap.tolist()
+        return {
+            'gainers': self._top(change_list, identifiers, rows, 'change_percent'),
+            'losers': self._top(change_list, identifiers, rows, 'change_percent', largest=False),
+            'volume_spikes': self._top(spike.tolist(), identifiers, rows, 'volume_ratio', signed=False),
+            'gap_ups': self._top(gap_list, identifiers, rows, 'gap_percent'),
+            'scanned': n,
+            'universe': len(self._universe),
+            'elapsed': time.perf_counter() - started,
+        }
@@ -0,0 +1,152 @@
+"""
+Batch recommendation and risk scoring
+
+The rules behind ZerodhaAgent._generate_recommendation and
+RiskManager.get_risk_assessment, evaluated for a whole universe of quotes in
+one vectorized pass. Results are small integer codes; the label tables turn
+a code into the human-readable string only for the rows that are displayed.
+
+A missing (NaN) price move or volume never scores as low risk: without the
+data there is no recommendation and the risk is reported as unknown.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Recommendation codes, indexes into RECOMMENDATION_LABELS
+STRONG_BULLISH = 0
+BULLISH = 1
+STRONG_BEARISH = 2
+BEARISH = 3
+NEUTRAL = 4
+INSUFFICIENT_DATA = 5
+
+RECOMMENDATION_LABELS = (
+    "Strong Bullish - High volume with significant price increase",
+    "Bullish - Positive momentum",
+    "Strong Bearish - High volume with significant price decrease",
+    "Bearish - Negative momentum",
+    "Neutral - Sideways movement",
+    "Insufficient data for recommendation",
+)
+
+# Risk codes, indexes into RISK_LABELS
+HIGH_RISK = 0
+MEDIUM_RISK_VOLATILITY = 1
+MEDIUM_RISK_LIQUIDITY = 2
+LOW_RISK = 3
+UNKNOWN_RISK = 4
+
+RISK_LABELS = (
+    "🔴 High Risk - Extreme volatility",
+    "🟡 Medium Risk - High volatility",
+    "🟡 Medium Risk - Low liquidity",
+    "🟢 Low Risk - Normal conditions",
+    "⚪ Unknown Risk - Insufficient data",
+)
+
+STRONG_MOVE_PERCENT = 5
+MOVE_PERCENT = 2
+HIGH_VOLUME = 100000
+EXTREME_VOLATILITY_PERCENT = 10
+HIGH_VOLATILITY_PERCENT = 5
+LOW_LIQUIDITY_VOLUME = 10000
+
+
+def recommendation_code(change_percent: float, volume: float) -> int:
+    """Recommendation code for one quote"""
+    if change_percent != change_percent or volume != volume:
+        return INSUFFICIENT_DATA
+    if change_percent > STRONG_MOVE_PERCENT and volume > HIGH_VOLUME:
+        return STRONG_BULLISH
+    if change_percent > MOVE_PERCENT:
+        return BULLISH
+    if change_percent < -STRONG_MOVE_PERCENT and volume > HIGH_VOLUME:
+        return STRONG_BEARISH
+    if change_percent < -MOVE_PERCENT:
+        return BEARISH
+    return NEUTRAL
+
+
+def risk_code(change_percent: float, volume: float) -> int:
+    """Risk code for one quote"""
+    if change_percent != change_percent or volume != volume:
+        return UNKNOWN_RISK
+    if abs(change_percent) > EXTREME_VOLATILITY_PERCENT:
+        return HIGH_RISK
+    if abs(change_percent) > HIGH_VOLATILITY_PERCENT:
+        return MEDIUM_RISK_VOLATILITY
+    if volume < LOW_LIQUIDITY_VOLUME:
+        return MEDIUM_RISK_LIQUIDITY
+    return LOW_RISK
+
+
+def recommendation_codes(change_percent: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Recommendation code per row; rows with NaN inputs get INSUFFICIENT_DATA"""
+    change_percent = np.asarray(change_percent, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    high_volume = volume > HIGH_VOLUME
+    return np.select(
+        [
+            np.isnan(change_percent) | np.isnan(volume),
+            (change_percent > STRONG_MOVE_PERCENT) & high_volume,
+            change_percent > MOVE_PERCENT,
+            (change_percent < -STRONG_MOVE_PERCENT) & high_volume,
+            change_percent < -MOVE_PERCENT,
+        ],
+        [INSUFFICIENT_DATA, STRONG_BULLISH, BULLISH, STRONG_BEARISH, BEARISH],
+        default=NEUTRAL,
+    ).astype(np.uint8)
+
+
+def risk_codes(change_percent: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Risk code per row; rows with NaN inputs get UNKNOWN_RISK"""
+    move = np.abs(np.asarray(change_percent, dtype=np.float64))
+    volume = np.asarray(volume, dtype=np.float64)
+    return np.select(
+        [np.isnan(move) | np.isnan(volume), move > EXTREME_VOLATILITY_PERCENT, move > HIGH_VOLATILITY_PERCENT,
+         volume < LOW_LIQUIDITY_VOLUME],
+        [UNKNOWN_RISK, HIGH_RISK, MEDIUM_RISK_VOLATILITY, MEDIUM_RISK_LIQUIDITY],
+        default=LOW_RISK,
+    ).astype(np.uint8)
+
+
+def score(change_percent: np.ndarray, volume: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Recommendation and risk codes for every row"""
+    return recommendation_codes(change_percent, volume), risk_codes(change_percent, volume)
+
+
+def score_quotes(quotes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Codes for a structured array of quotes
+
+    Accepts either change_percent and volume fields, or decoded ticks
+    (decoder.TICK_DTYPE), whose change_percent is derived from change and close.
+    """
+    if 'change_percent' in quotes.dtype.names:
+        change_percent = quotes['change_percent']
+    else:
+        close = quotes['close']
+        change_percent = np.divide(quotes['change'] * 100, close, out=np.full(len(quotes), np.nan),
+                                   where=close > 0)
+    return score(change_percent, quotes['volume'])
+
+
+def quote_columns(quotes: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """change_percent and volume arrays from quote dicts; unusable values become NaN"""
+    def number(value: Any) -> float:
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return float('nan')
+
+    change_percent = np.fromiter((number(q.get('change_percent')) for q in quotes), dtype=np.float64,
+                                 count=len(quotes))
+    volume = np.fromiter((number(q.get('volume')) for q in quotes), dtype=np.float64, count=len(quotes))
+    return change_percent, volume
+
+
+def labels(codes: np.ndarray, table: Sequence[str], rows: Optional[Sequence[int]] = None) -> List[str]:
+    """Label strings for the given rows (all rows by default)"""
+    selected = codes if rows is None else codes[np.asarray(rows, dtype=np.int64)]
+    return [table[code] for code in selected.tolist()]
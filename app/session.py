@@ -0,0 +1,93 @@
+"""
+Persistent session-token cache
+
+The Kite access token is stored on local disk together with its expiry
+(Kite tokens are valid until 06:00 IST the next morning), so a new process
+reuses it instead of logging in again.
+
+The file is plain JSON, protected only by file permissions: it is created
+owner-read/write only (0600) in a directory only the owner can enter
+(0700). Anyone who can read it as this user can use the token until it
+expires, exactly as with the token in memory; it is not encrypted. On
+Windows the permission bits are not enforced and the file relies on the
+ACL of the user's profile directory.
+
+Each account has its own file (see session_path), so several agents in one
+process never load or overwrite each other's tokens.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def token_expiry(issued: Optional[float] = None) -> float:
+    """Epoch seconds of the SESSION_EXPIRY_HOUR (IST) following issued"""
+    moment = datetime.fromtimestamp(issued if issued is not None else time.time(), IST)
+    expiry = moment.replace(hour=config.SESSION_EXPIRY_HOUR, minute=0, second=0, microsecond=0)
+    if expiry <= moment:
+        expiry += timedelta(days=1)
+    return expiry.timestamp()
+
+
+def session_path(account_id: Optional[str] = None) -> str:
+    """Session file of an account; SESSION_FILE itself for the default account"""
+    if account_id is None:
+        return config.SESSION_FILE
+    return f"{config.SESSION_FILE}-{re.sub(r'[^A-Za-z0-9_-]', '_', account_id)}"
+
+
+class SessionStore:
+    """Owner-only session file holding the access token and its expiry"""
+
+    def __init__(self, path: str = config.SESSION_FILE):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The stored session if it exists, is readable and has not expired"""
+        try:
+            with open(self.path, 'rb') as f:
+                session = json.loads(f.read())
+        except OSError:
+            return None
+        except ValueError:
+            logger.warning("Ignoring a session file that could not be read")
+            return None
+        if not isinstance(session, dict) or session.get('expires_at', 0) <= time.time():
+            return None
+        return session
+
+    def save(self, access_token: Optional[str], user_id: Optional[str] = None,
+             expires_at: Optional[float] = None) -> Dict[str, Any]:
+        session = {
+            'access_token': access_token,
+            'user_id': user_id,
+            'expires_at': expires_at or token_expiry(),
+        }
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(session, f)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logger.warning(f"Could not store session: {e}")
+        return session
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,351 @@
+"""
+Streaming tick ingestion
+
+Binary tick frames in the Kite ticker format arrive from a pluggable source.
+Each frame is decoded into a tick array (see decoder.py), written into
+fixed-size per-instrument ring buffers that are preallocated up front (so
+memory stays bounded and ticks are stored without allocating), and then
+announced to asyncio subscribers.
+"""
+
+import asyncio
+import logging
+import struct
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+from .config import config
+from .decoder import TICK_DTYPE, decode_frame, to_quotes
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct('>I')  # Length prefix used by the socket and file stand-ins
+
+
+def occurrence_rank(rows: np.ndarray) -> np.ndarray:
+    """How many earlier elements share each element's value (0 for the first)
+
+    Splitting a batch by rank gives sub-batches with unique rows, so each can
+    be applied with a single scatter while preserving per-row order.
+    """
+    order = np.argsort(rows, kind='stable')
+    sorted_rows = rows[order]
+    starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]])
+    run_start = np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    rank = np.empty(len(rows), dtype=np.int64)
+    rank[order] = np.arange(len(rows)) - run_start
+    return rank
+
+
+def unique_batches(rows: np.ndarray) -> Iterator[np.ndarray]:
+    """Index arrays splitting rows into in-order batches without repeats"""
+    if len(np.unique(rows)) == len(rows):
+        yield np.arange(len(rows))
+        return
+    rank = occurrence_rank(rows)
+    for r in range(int(rank.max()) + 1):
+        yield np.flatnonzero(rank == r)
+
+
+class TokenIndex:
+    """Instrument token -> dense row mapping with a fixed capacity
+
+    Rows are assigned on first sight. Batches are looked up with a sorted
+    token array so the per-frame cost stays vectorized.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.rows: Dict[int, int] = {}
+        self.dropped = 0
+        self._sorted_tokens = np.zeros(0, dtype=np.int64)
+        self._sorted_rows = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, instrument_token: int) -> Optional[int]:
+        """Row for a token, registering it if there is room"""
+        row = self.rows.get(instrument_token)
+        if row is None:
+            if len(self.rows) >= self.capacity:
+                self.dropped += 1
+                return None
+            row = self.rows[instrument_token] = len(self.rows)
+            self._sorted_tokens = np.zeros(0, dtype=np.int64)  # Rebuilt on next lookup
+        return row
+
+    def rows_for(self, instrument_tokens: np.ndarray) -> np.ndarray:
+        """Rows for tokens, registering new ones (-1 where the index is full)"""
+        if len(self._sorted_tokens) != len(self.rows):
+            tokens = np.fromiter(self.rows, dtype=np.int64, count=len(self.rows))
+            rows = np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows))
+            order = np.argsort(tokens)
+            self._sorted_tokens, self._sorted_rows = tokens[order], rows[order]
+
+        rows = np.full(len(instrument_tokens), -1, dtype=np.int64)
+        if len(self._sorted_tokens):
+            index = np.searchsorted(self._sorted_tokens, instrument_tokens)
+            index[index == len(self._sorted_tokens)] = 0
+            known = self._sorted_tokens[index] == instrument_tokens
+            rows[known] = self._sorted_rows[index[known]]
+        else:
+            known = np.zeros(len(instrument_tokens), dtype=bool)
+        if not known.all():
+            for i in np.flatnonzero(~known).tolist():
+                row = self.row(int(instrument_tokens[i]))
+                rows[i] = -1 if row is None else row
+        return rows
+
+
+class TickRingBuffer:
+    """Latest ticks per instrument in preallocated fixed-size rings
+
+    Storage is struct-of-arrays: one (max_instruments x size) array per field.
+    Each instrument is assigned a row on first sight; a write only stores
+    values into existing slots and advances that row's head.
+    """
+
+    FIELDS = {
+        'timestamp': np.float64,
+        'last_price': np.float64,
+        'last_quantity': np.int64,
+        'volume': np.int64,
+    }
+
+    def __init__(self, max_instruments: int, size: int):
+        self.max_instruments = max_instruments
+        self.size = size
+        self.columns = {name: np.zeros((max_instruments, size), dtype=dtype)
+                        for name, dtype in self.FIELDS.items()}
+        self.head = np.zeros(max_instruments, dtype=np.int64)  # Next write position
+        self.count = np.zeros(max_instruments, dtype=np.int64)  # Ticks written, capped at size
+        self.index = TokenIndex(max_instruments)
+
+    @property
+    def rows(self) -> Dict[int, int]:
+        return self.index.rows
+
+    @property
+    def dropped(self) -> int:
+        return self.index.dropped
+
+    def append(self, instrument_token: int, **values: Any) -> None:
+        """Store one tick"""
+        row = self.index.row(instrument_token)
+        if row is None:
+            return
+        position = self.head[row]
+        for name, value in values.items():
+            self.columns[name][row, position] = value
+        self.head[row] = (position + 1) % self.size
+        self.count[row] = min(self.count[row] + 1, self.size)
+
+    def extend(self, ticks: np.ndarray, received: float) -> np.ndarray:
+        """Store decoded ticks, returning their buffer rows (-1 where dropped)
+
+        Ticks without an exchange timestamp are stamped with the receive time.
+        """
+        rows = self.index.rows_for(ticks['instrument_token'])
+        stored = rows >= 0
+        if not stored.all():
+            ticks, rows_kept = ticks[stored], rows[stored]
+        else:
+            rows_kept = rows
+        if not len(rows_kept):
+            return rows
+
+        exchange_ts = ticks['exchange_timestamp']
+        values = {
+            'timestamp': np.where(exchange_ts > 0, exchange_ts, received),
+            'last_price': ticks['last_price'],
+            'last_quantity': ticks['last_quantity'],
+            'volume': ticks['volume'],
+        }
+        # Usually one tick per instrument, so a single scatter per field
+        for batch in unique_batches(rows_kept):
+            batch_rows = rows_kept[batch]
+            positions = self.head[batch_rows]
+            for name, column in values.items():
+                self.columns[name][batch_rows, positions] = column[batch]
+            self.head[batch_rows] = (positions + 1) % self.size
+            self.count[batch_rows] = np.minimum(self.count[batch_rows] + 1, self.size)
+        return rows
+
+    def latest(self, instrument_token: int) -> Optional[Dict[str, Any]]:
+        """The most recent tick for an instrument"""
+        row = self.rows.get(instrument_token)
+        if row is None or not self.count[row]:
+            return None
+        position = (self.head[row] - 1) % self.size
+        return {name: self.columns[name][row, position].item() for name in self.FIELDS}
+
+    def history(self, instrument_token: int) -> Dict[str, np.ndarray]:
+        """Buffered ticks for an instrument, oldest first"""
+        row = self.rows.get(instrument_token)
+        if row is None:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in self.FIELDS.items()}
+        count = int(self.count[row])
+        order = (np.arange(self.head[row] - count, self.head[row])) % self.size
+        return {name: self.columns[name][row, order] for name in self.FIELDS}
+
+
+class TickSource:
+    """Source of raw binary tick frames"""
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        raise NotImplementedError
+        yield b''  # pragma: no cover
+
+    async def close(self) -> None:
+        pass
+
+
+async def _read_records(reader: asyncio.StreamReader) -> AsyncIterator[bytes]:
+    """Length-prefixed records from a stream until EOF"""
+    while True:
+        try:
+            header = await reader.readexactly(RECORD_HEADER.size)
+            yield await reader.readexactly(RECORD_HEADER.unpack(header)[0])
+        except asyncio.IncompleteReadError:
+            return
+
+
+def encode_record(frame: bytes) -> bytes:
+    """Length-prefix a frame for the socket and file stand-ins"""
+    return RECORD_HEADER.pack(len(frame)) + frame
+
+
+class SocketTickSource(TickSource):
+    """Length-prefixed frames read from a local TCP socket"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        async for frame in _read_records(reader):
+            yield frame
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class FileTickSource(TickSource):
+    """Length-prefixed frames replayed from a recording"""
+
+    def __init__(self, path: str, chunk_size: int = 1 << 20):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        with open(self.path, 'rb') as f:
+            data = memoryview(f.read())
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            (length,) = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            yield bytes(data[offset:offset + length])
+            offset += length
+            if offset % self.chunk_size < length + RECORD_HEADER.size:
+                await asyncio.sleep(0)  # Let subscribers run during long replays
+
+
+class TickStream:
+    """Pump frames from a source into ring buffers and subscribers"""
+
+    def __init__(self, source: TickSource,
+                 max_instruments: int = config.STREAM_MAX_INSTRUMENTS,
+                 buffer_size: int = config.STREAM_BUFFER_SIZE):
+        self.source = source
+        self.buffer = TickRingBuffer(max_instruments, buffer_size)
+        self.snapshot = np.zeros(max_instruments, dtype=TICK_DTYPE)  # Latest full tick per row
+        self._subscribers: List[Any] = []
+        self._consumers: List[Callable[[np.ndarray, float], Any]] = []
+        self.frames = 0
+        self.ticks = 0
+        self.dropped_notifications = 0
+        self.last_received: Optional[float] = None  # Receive time of the latest frame
+        self._started: Optional[float] = None
+
+    def subscribe(self, instrument_tokens: Optional[Iterable[int]] = None,
+                  maxsize: int = 1024) -> 'asyncio.Queue[np.ndarray]':
+        """Queue receiving the decoded ticks of each frame, optionally filtered to tokens
+
+        When a subscriber falls behind, its oldest batches are dropped so the
+        stream never blocks or grows without bound.
+        """
+        queue: 'asyncio.Queue[np.ndarray]' = asyncio.Queue(maxsize=maxsize)
+        tokens = np.fromiter(instrument_tokens, dtype=np.int64) if instrument_tokens is not None else None
+        self._subscribers.append((queue, tokens))
+        return queue
+
+    def unsubscribe(self, queue: 'asyncio.Queue[np.ndarray]') -> None:
+        self._subscribers = [(q, t) for q, t in self._subscribers if q is not queue]
+
+    def add_consumer(self, consumer: Callable[[np.ndarray, float], Any]) -> None:
+        """Call consumer(ticks, received) synchronously for every decoded frame"""
+        self._consumers.append(consumer)
+
+    def _publish(self, ticks: np.ndarray) -> None:
+        for queue, tokens in self._subscribers:
+            delivered = ticks
+            if tokens is not None:
+                delivered = ticks[np.isin(ticks['instrument_token'], tokens)]
+                if not len(delivered):
+                    continue
+            if queue.full():
+                queue.get_nowait()
+                self.dropped_notifications += 1
+            queue.put_nowait(delivered)
+
+    def ingest(self, frame: bytes) -> np.ndarray:
+        """Process one frame synchronously"""
+        ticks = decode_frame(frame)
+        if len(ticks):
+            received = self.last_received = time.time()
+            rows = self.buffer.extend(ticks, received)
+            stored = rows >= 0
+            self.snapshot[rows[stored]] = ticks[stored]
+            for consumer in self._consumers:
+                consumer(ticks, received)
+            self.frames += 1
+            self.ticks += len(ticks)
+            if self._subscribers:
+                self._publish(ticks)
+        return ticks
+
+    def quotes(self, symbols: Mapping[int, str]) -> Dict[str, Dict[str, Any]]:
+        """Latest quote per streamed instrument in symbols, keyed by symbol"""
+        rows = [self.buffer.rows[token] for token in symbols if token in self.buffer.rows]
+        return to_quotes(self.snapshot[rows], symbols)
+
+    def idle(self) -> float:
+        """Seconds since the latest frame (infinite before the first)"""
+        return time.time() - self.last_received if self.last_received is not None else float('inf')
+
+    async def run(self) -> None:
+        """Consume the source until it is exhausted or the task is cancelled"""
+        self._started = time.perf_counter()
+        try:
+            async for frame in self.source.frames():
+                self.ingest(frame)
+        finally:
+            await self.source.close()
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            'frames': self.frames,
+            'ticks': self.ticks,
+            'ticks_per_second': self.ticks / elapsed if elapsed else 0.0,
+            'instruments': len(self.buffer.rows),
+            'dropped_instruments': self.buffer.dropped,
+            'dropped_notifications': self.dropped_notifications,
+        }
@@ -3,84 +3,127 @@ Tools module for Zerodha API integration
 This module provides wrapper functions for the Zerodha Kite API tools
 """
 
+import functools
+from typing import Any, Callable, Optional
+
+# Object answering the d94_ calls instead of the environment (e.g. paper.PaperExchange)
+_backend: Optional[Any] = None
+
+
+def set_backend(backend: Optional[Any]) -> None:
+    """Route every d94_ tool to backend's method of the same name (None restores the environment)"""
+    global _backend
+    _backend = backend
+
+
+def _tool(func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    def call(**kwargs: Any) -> Any:
+        if _backend is not None:
+            return getattr(_backend, func.__name__)(**kwargs)
+        return func(**kwargs)
+    return call
+
 # Import all the d94_ tools that are available
 # These tools are provided by the environment and handle Zerodha API calls
 
+@_tool
 def d94_login():
     """Login to Kite API"""
     # This will be handled by the environment's d94_login tool
     pass
 
+@_tool
 def d94_get_holdings(**kwargs):
     """Get holdings"""
     # This will be handled by the environment's d94_get_holdings tool
     pass
 
+@_tool
 def d94_get_positions():
     """Get positions"""
     # This will be handled by the environment's d94_get_positions tool
     pass
 
+@_tool
 def d94_get_margins():
     """Get margins"""
     # This will be handled by the environment's d94_get_margins tool
     pass
 
+@_tool
 def d94_get_mf_holdings():
     """Get mutual fund holdings"""
     # This will be handled by the environment's d94_get_mf_holdings tool
     pass
 
+@_tool
 def d94_search_instruments(**kwargs):
     """Search instruments"""
     # This will be handled by the environment's d94_search_instruments tool
     pass
 
+@_tool
+def d94_get_instruments(**kwargs):
+    """Get the full instrument dump"""
+    # This will be handled by the environment's d94_get_instruments tool
+    pass
+
+@_tool
 def d94_get_quotes(**kwargs):
     """Get market quotes"""
     # This will be handled by the environment's d94_get_quotes tool
     pass
 
+@_tool
 def d94_place_order(**kwargs):
     """Place an order"""
     # This will be handled by the environment's d94_place_order tool
     pass
 
+@_tool
 def d94_modify_order(**kwargs):
     """Modify an order"""
     # This will be handled by the environment's d94_modify_order tool
     pass
 
+@_tool
 def d94_cancel_order(**kwargs):
     """Cancel an order"""
     # This will be handled by the environment's d94_cancel_order tool
     pass
 
+@_tool
 def d94_get_orders():
     """Get all orders"""
     # This will be handled by the environment's d94_get_orders tool
     pass
 
+@_tool
 def d94_get_historical_data(**kwargs):
     """Get historical data"""
     # This will be handled by the environment's d94_get_historical_data tool
     pass
 
+@_tool
 def d94_place_gtt_order(**kwargs):
     """Place GTT order"""
     # This will be handled by the environment's d94_place_gtt_order tool
     pass
 
+@_tool
 def d94_get_gtts():
     """Get GTT orders"""
     # This will be handled by the environment's d94_get_gtts tool
     pass
 
+@_tool
 def d94_get_trades():
     """Get trades"""
     # This will be handled by the environment's d94_get_trades tool
     pass
 
+@_tool
 def d94_get_profile():
     """Get profile"""
     # This will be handled by the environment's d94_get_profile tool
@@ -0,0 +1,192 @@
+"""
+Tool transports
+
+ZerodhaAgent sends every d94_ call through a ToolBackend:
+
+* ThreadedToolBackend runs the synchronous functions in tools.py on the
+  default executor (the original behaviour, and the path used with
+  tools.set_backend);
+* AiohttpToolBackend POSTs the call as JSON to a tool server over one pooled
+  aiohttp session with keep-alive and per-host connection limits, so calls
+  never block the event loop or open a connection each;
+* MockToolServer serves any object's d94_ methods (e.g. a PaperExchange)
+  over HTTP on localhost, for tests and benchmarks of the HTTP path.
+
+aiohttp is imported when an HTTP session or server is first created, so
+the default threaded path never pays for loading it.
+"""
+
+import asyncio
+import functools
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from . import tools
+from .config import config
+
+if TYPE_CHECKING:
+    import aiohttp
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class ToolBackend:
+    """Executes d94_ tool calls"""
+
+    async def call(self, tool_name: str, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+    def set_session(self, access_token: Optional[str]) -> None:
+        """Authenticate later calls with access_token (backends that carry credentials)"""
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class ThreadedToolBackend(ToolBackend):
+    """The blocking functions in tools.py, run off the event loop"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def call(self, tool_name: str, **kwargs: Any) -> Any:
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(getattr(tools, tool_name), **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {'calls': self.calls}
+
+
+class AiohttpToolBackend(ToolBackend):
+    """JSON tool calls over a pooled keep-alive aiohttp session
+
+    POST {base_url}/{tool_name} with the keyword arguments as the JSON body;
+    the JSON response is the tool result. Error responses with a JSON body
+    (e.g. {'status': 'error', 'message': ...}) are returned like results,
+    while server errors raise aiohttp.ClientResponseError.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = config.HTTP_POOL_SIZE,
+                 pool_size_per_host: int = config.HTTP_POOL_SIZE_PER_HOST,
+                 keepalive_timeout: float = config.HTTP_KEEPALIVE_TIMEOUT,
+                 timeout: float = config.API_TIMEOUT, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    def _trace(self) -> 'aiohttp.TraceConfig':
+        import aiohttp
+
+        trace = aiohttp.TraceConfig()
+
+        async def created(session: Any, context: Any, params: Any) -> None:
+            self.connections_created += 1
+
+        async def reused(session: Any, context: Any, params: Any) -> None:
+            self.connections_reused += 1
+
+        trace.on_connection_create_end.append(created)
+        trace.on_connection_reuseconn.append(reused)
+        return trace
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        # Created lazily so it belongs to the running event loop
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout), trace_configs=[self._trace()],
+            )
+        return self._session
+
+    def set_session(self, access_token: Optional[str]) -> None:
+        if access_token:
+            self.headers['Authorization'] = f"token {access_token}"
+        else:
+            self.headers.pop('Authorization', None)
+        if self._session is not None:
+            self._session.headers.update(self.headers)
+            if not access_token:
+                self._session.headers.pop('Authorization', None)
+
+    async def call(self, tool_name: str, **kwargs: Any) -> Any:
+        self.requests += 1
+        async with self._get_session().post(f"{self.base_url}/{tool_name}", json=kwargs) as response:
+            if response.status >= 500:
+                response.raise_for_status()
+            if response.content_type == 'application/json':
+                return await response.json()
+            response.raise_for_status()
+            return None
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'connections_created': self.connections_created,
+            'connections_reused': self.connections_reused,
+            'reuse_ratio': self.connections_reused / self.requests if self.requests else 0.0,
+        }
+
+
+class MockToolServer:
+    """Local HTTP server answering POST /{tool_name} with target's method of that name"""
+
+    def __init__(self, target: Any, host: str = '127.0.0.1', port: int = 0):
+        self.target = target
+        self.host = host
+        self.port = port
+        self._runner: Optional['web.AppRunner'] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, request: 'web.Request') -> 'web.Response':
+        from aiohttp import web
+
+        tool = getattr(self.target, request.match_info['tool'], None)
+        if tool is None or not request.match_info['tool'].startswith('d94_'):
+            return web.json_response({'status': 'error', 'message': 'Unknown tool'}, status=404)
+        kwargs = await request.json() if request.can_read_body else {}
+        try:
+            return web.json_response(tool(**kwargs))
+        except Exception as e:
+            logger.error(f"Mock tool {request.match_info['tool']} failed: {e}")
+            return web.json_response({'status': 'error', 'message': str(e)}, status=500)
+
+    async def start(self) -> str:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post('/{tool}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -245,14 +245,9 @@ class RiskManager:
     @staticmethod
     def get_risk_assessment(change_percent: float, volume: int) -> str:
         """Get risk assessment based on price movement and volume"""
-        if abs(change_percent) > 10:
-            return "🔴 High Risk - Extreme volatility"
-        elif abs(change_percent) > 5:
-            return "🟡 Medium Risk - High volatility"
-        elif volume < 10000:
-            return "🟡 Medium Risk - Low liquidity"
-        else:
-            return "🟢 Low Risk - Normal conditions"
+        # Imported here: app.scoring loads numpy, which importing utils should not
+        from .scoring import RISK_LABELS, risk_code
+        return RISK_LABELS[risk_code(change_percent, volume)]
 
 class Logger:
     """Enhanced logging utilities"""
@@ -300,6 +295,10 @@ def safe_int(value: Any, default: int = 0) -> int:
     except (ValueError, TypeError):
         return default
 
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
 def format_large_number(num: Union[int, float]) -> str:
     """Format large numbers with appropriate suffixes"""
     if num >= 10000000:  # 1 crore
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Zerodha AI Agent hot paths
+Run from the repository root, e.g. ``python -m benchmarks.bench_instruments``
+"""
@@ -0,0 +1,80 @@
+"""
+Benchmark: vectorized frame decoder vs field-by-field struct.unpack
+
+Reports packets/sec for LTP, quote and full (with depth) frames, plus a
+frame mixing all three modes.
+
+Usage: python -m benchmarks.bench_decoder [--per-frame 250] [--repeat 200]
+"""
+
+import argparse
+import struct
+from typing import Dict, List
+
+from app.decoder import FULL_MODE, LTP_MODE, MODE_NAMES, QUOTE_MODE, decode_frame, encode_frame, encode_packets
+
+from .common import measure
+from .generators import make_ticks
+
+_HEADER = struct.Struct('>H')
+_INT = struct.Struct('>i')
+_SHORT = struct.Struct('>h')
+
+
+def struct_decode(frame: bytes) -> List[Dict[str, object]]:
+    """Reference decoder unpacking one field at a time into dicts"""
+    (count,) = _HEADER.unpack_from(frame, 0)
+    offset = 2
+    ticks = []
+    for _ in range(count):
+        (length,) = _HEADER.unpack_from(frame, offset)
+        offset += 2
+        fields = [_INT.unpack_from(frame, offset + 4 * i)[0] for i in range(min(length, 64) // 4)]
+        tick: Dict[str, object] = {'instrument_token': fields[0], 'last_price': fields[1] / 100}
+        if length >= 44:
+            tick.update(last_quantity=fields[2], average_price=fields[3] / 100, volume=fields[4],
+                        buy_quantity=fields[5], sell_quantity=fields[6],
+                        ohlc={'open': fields[7] / 100, 'high': fields[8] / 100,
+                              'low': fields[9] / 100, 'close': fields[10] / 100})
+        if length == 184:
+            depth = []
+            for level in range(10):
+                base = offset + 64 + 12 * level
+                depth.append({'quantity': _INT.unpack_from(frame, base)[0],
+                              'price': _INT.unpack_from(frame, base + 4)[0] / 100,
+                              'orders': _SHORT.unpack_from(frame, base + 8)[0]})
+            tick['depth'] = {'buy': depth[:5], 'sell': depth[5:]}
+        ticks.append(tick)
+        offset += length
+    return ticks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--per-frame', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    ticks = make_ticks(args.per_frame)
+    frames = {MODE_NAMES[mode]: encode_frame(encode_packets(ticks, mode))
+              for mode in (LTP_MODE, QUOTE_MODE, FULL_MODE)}
+    third = args.per_frame // 3
+    frames['mixed'] = encode_frame(
+        encode_packets(ticks[:third], LTP_MODE)
+        + encode_packets(ticks[third:2 * third], QUOTE_MODE)
+        + encode_packets(ticks[2 * third:], FULL_MODE)
+    )
+
+    print(f"{args.per_frame} packets per frame")
+    for name, frame in frames.items():
+        assert len(decode_frame(frame)) == len(struct_decode(frame)) == args.per_frame
+        vectorized = measure(lambda: decode_frame(frame), repeat=args.repeat)
+        reference = measure(lambda: struct_decode(frame), repeat=args.repeat)
+        rate = args.per_frame / vectorized['mean_us'] * 1e6
+        reference_rate = args.per_frame / reference['mean_us'] * 1e6
+        print(f"{name:<8} decoder {rate:>14,.0f} packets/s   struct.unpack {reference_rate:>12,.0f} packets/s   "
+              f"({reference['mean_us'] / vectorized['mean_us']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: agent and utility hot paths against a stored JSON baseline
+
+Synthetic holdings, positions, quotes, orders and candles are generated at
+each size and run through portfolio metrics, market analysis and
+recommendations, every DataFormatter method, TradingUtils parsing and
+validation, order validation and cached historical reads. Quotes and
+candles are pre-loaded into the agent's caches, and every quoted
+instrument's daily indicators are seeded, so no tool calls are made and
+market analysis runs the steady-state indicator path.
+Each case's fastest run is compared with the baseline file; the run fails
+if any case got slower than the tolerance allows. --save records the run
+as the new baseline (timings only compare on the machine that recorded
+them).
+
+Usage: python -m benchmarks.bench_hot_paths [--sizes 10 1000 100000 1000000] [--save]
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from app.agent import ZerodhaAgent
+from app.candle_cache import request_range
+from app.quote_cache import QuoteCache
+from app.utils import DataFormatter, TradingUtils
+
+from .common import compare_baseline, measure, report, save_baseline, scratch_agent
+from .generators import make_candles, make_holdings, make_margins, make_orders, make_positions, make_quotes
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'hot_paths.json')
+CANDLE_TOKEN = 408065
+
+
+def warm_indicators(agent: ZerodhaAgent, quotes: Dict[str, Dict[str, Any]], days: int = 30) -> None:
+    """Seed every instrument's indicator state as today's first analysis would"""
+    state = agent.indicator_state
+    rows = np.array([state.row(instrument) for instrument in quotes])
+    close = np.array([quote['ohlc']['close'] for quote in quotes.values()])
+    volume = np.array([float(quote['volume']) for quote in quotes.values()])
+    rng = np.random.default_rng(31)
+    for _ in range(days):
+        close = close * np.exp(rng.normal(0, 0.01, len(close)))
+        state.update(rows, close, close * 1.01, close * 0.99, volume)
+    today = date.today()
+    agent._indicator_dates.update(dict.fromkeys(quotes, today))
+
+
+def build_cases(agent: ZerodhaAgent, loop: asyncio.AbstractEventLoop, size: int) -> Dict[str, Callable[[], Any]]:
+    """Generate size rows of each kind and return the cases that run over them"""
+    holdings = {'data': make_holdings(size)}
+    positions = {'data': make_positions(size)}
+    margins = make_margins()
+    quotes = make_quotes(size)
+    instruments = list(quotes)
+    quote_rows = list(quotes.values())
+    orders = make_orders(size)
+    candles = make_candles(size)
+    identifiers = [instrument if i % 2 else instrument.split(':')[1] for i, instrument in enumerate(instruments)]
+    symbols = [order['tradingsymbol'] for order in orders]
+    summary = {'summary': agent._calculate_portfolio_metrics(holdings, positions, margins)}
+
+    async def fetch(missing: List[str]) -> Dict[str, Any]:
+        return {instrument: quotes[instrument] for instrument in missing}
+
+    # Warm caches: analysis and historical reads are measured without fetching
+    agent.quote_cache = QuoteCache(ttl=float('inf'))
+    loop.run_until_complete(agent.quote_cache.get(instruments, fetch))
+    from_date, to_date = candles[0]['date'], candles[-1]['date']
+    start, end = request_range(from_date, to_date)
+    agent.candle_cache.store(CANDLE_TOKEN, 'minute', candles, start, end)
+    warm_indicators(agent, quotes)
+
+    def validate_orders() -> None:
+        for order in orders:
+            agent._order_params(order['exchange'], order['tradingsymbol'], order['transaction_type'],
+                                order['quantity'], order['order_type'], order['product'],
+                                order['price'], order['trigger_price'])
+
+    return {
+        'portfolio_metrics': lambda: agent._calculate_portfolio_metrics(holdings, positions, margins),
+        'analyze_market_data': lambda: loop.run_until_complete(agent.analyze_market_data(instruments)),
+        'generate_recommendation': lambda: [agent._generate_recommendation(row) for row in quote_rows],
+        'format_portfolio_summary': lambda: DataFormatter.format_portfolio_summary(summary),
+        'format_holdings_table': lambda: DataFormatter.format_holdings_table(holdings['data']),
+        'format_market_quotes': lambda: DataFormatter.format_market_quotes(quotes),
+        'format_orders_table': lambda: DataFormatter.format_orders_table(orders),
+        'parse_instrument_identifier': lambda: [TradingUtils.parse_instrument_identifier(identifier)
+                                                for identifier in identifiers],
+        'validate_trading_symbol': lambda: [TradingUtils.validate_trading_symbol(symbol) for symbol in symbols],
+        'order_validation': validate_orders,
+        'historical_data_cached': lambda: loop.run_until_complete(
+            agent.get_historical_data(CANDLE_TOKEN, from_date, to_date, 'minute')),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=100, help='runs per case at the smallest sizes')
+    parser.add_argument('--rows', type=int, default=1000000, help='rows processed per case before repeats stop')
+    parser.add_argument('--cases', nargs='+', help='only run these cases')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown as a fraction')
+    parser.add_argument('--save', action='store_true', help='record this run as the baseline')
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    results: Dict[str, Dict[str, float]] = {}
+    for size in args.sizes:
+        with scratch_agent() as agent:
+            cases = build_cases(agent, loop, size)
+            repeat = max(3, min(args.repeat, args.rows // size))
+            print(f"\n{size} rows, {repeat} runs per case")
+            for name, case in cases.items():
+                if args.cases and name not in args.cases:
+                    continue
+                # As in timeit: collections triggered by earlier cases' garbage would add noise
+                gc.collect()
+                gc.disable()
+                try:
+                    stats = measure(case, repeat=repeat)
+                finally:
+                    gc.enable()
+                report(name, stats)
+                results[f"{name}/{size}"] = stats
+    loop.close()
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nno baseline at {args.baseline}; run with --save to record one")
+        return
+    regressions = compare_baseline(args.baseline, results, args.tolerance)
+    for regression in regressions:
+        print(f"FAIL: {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"\nOK: no case slower than the baseline by more than {args.tolerance:.0%}")
+
+
+if __name__ == '__main__':
+    main()
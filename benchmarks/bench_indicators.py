@@ -0,0 +1,54 @@
+"""
+Benchmark: indicator engine in batch and incremental mode
+
+Compares recomputing every indicator from full histories on each refresh
+with evaluating the new bar against seeded IndicatorState.
+
+Usage: python -m benchmarks.bench_indicators [--symbols 500] [--bars 250]
+"""
+
+import argparse
+
+import numpy as np
+
+from app.indicators import IndicatorState, compute
+
+from .common import measure, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    shape = (args.symbols, args.bars)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, shape), axis=1))
+    high = close * (1 + rng.uniform(0, 0.01, shape))
+    low = close * (1 - rng.uniform(0, 0.01, shape))
+    volume = rng.integers(1000, 100000, shape).astype(np.float64)
+
+    print(f"{args.symbols} symbols x {args.bars} daily bars")
+    report('batch, one 2-D pass', measure(lambda: compute(close, high, low, volume), repeat=args.repeat))
+    report('batch, per symbol', measure(
+        lambda: [compute(close[i], high[i], low[i], volume[i]) for i in range(args.symbols)],
+        repeat=max(1, args.repeat // 4)))
+
+    state = IndicatorState(capacity=args.symbols)
+    for i in range(args.symbols):
+        state.seed(f"S{i}", close[i, :-1], high[i, :-1], low[i, :-1], volume[i, :-1])
+    rows = np.arange(args.symbols)
+    last = (close[:, -1], high[:, -1], low[:, -1], volume[:, -1])
+    report('incremental peek (refresh)', measure(lambda: state.peek(rows, *last), repeat=args.repeat * 10))
+    report('incremental peek + records', measure(lambda: state.records(state.peek(rows, *last)),
+                                                 repeat=args.repeat * 10))
+
+    expected = compute(close, high, low, volume)
+    values = state.peek(rows, *last)
+    assert all(np.allclose(values[name], expected[name][:, -1], equal_nan=True) for name in values)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: local instrument master search vs the remote search path
+
+The remote path is simulated with a fixed round-trip latency plus a linear scan
+over the dump, which is what every search costs when it goes to
+d94_search_instruments.
+
+Usage: python -m benchmarks.bench_instruments [--count 100000] [--remote-latency-ms 30]
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from app import tools
+from app.instruments import InstrumentMaster
+from app.ratelimit import RateLimiter
+
+from .common import measure, report, scratch_agent
+from .generators import make_instruments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--remote-latency-ms', type=float, default=30.0)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    instruments = make_instruments(args.count)
+    sample = instruments[len(instruments) // 2]
+    queries = (
+        ('INF', 'name'),
+        ('TATA MOT', 'name'),
+        ('RELIANSE', 'name'),  # misspelt, answered by the trigram index
+        (sample['tradingsymbol'][:4], 'tradingsymbol'),
+        (sample['tradingsymbol'], 'tradingsymbol'),
+    )
+    tools.d94_get_instruments = lambda **kwargs: {'data': instruments}
+    loop = asyncio.new_event_loop()
+    with scratch_agent() as agent:
+        # Measure the round trip itself, not the broker's rate limit
+        agent.rate_limiter = RateLimiter({'default': 1e9})
+        start = time.perf_counter()
+        master = loop.run_until_complete(agent._get_instrument_master())
+        print(f"Built and mapped {len(master)} instruments in {time.perf_counter() - start:.2f}s")
+
+        start = time.perf_counter()
+        master = InstrumentMaster.open(agent.instrument_cache_dir)
+        print(f"Re-opened memory-mapped store in {(time.perf_counter() - start) * 1e3:.2f}ms\n")
+
+        for query, filter_type in queries:
+            hits = len(master.search(query, filter_type))
+            stats = measure(lambda: master.search(query, filter_type), repeat=args.repeat)
+            report(f"local {filter_type}:{query!r} ({hits} hits)", stats)
+
+        # Remote path through the agent with no local master available
+        def remote_search(query: str, filter_on: str) -> Dict[str, Any]:
+            time.sleep(args.remote_latency_ms / 1000)
+            needle = query.upper()
+            data: List[Dict[str, Any]] = [i for i in instruments if needle in str(i.get(filter_on, '')).upper()]
+            return {'data': data}
+
+        tools.d94_search_instruments = remote_search
+        agent._get_instrument_master = lambda: asyncio.sleep(0)  # type: ignore[assignment]
+        print()
+        for query, filter_type in queries:
+            stats = measure(lambda: loop.run_until_complete(agent.search_instruments(query, filter_type)), repeat=20)
+            report(f"remote {filter_type}:{query!r}", stats)
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: fill-to-reaction latency through the order-update stream
+
+Fills are POSTed to a local PostbackServer one at a time; latency is measured
+from sending the request to a subscriber receiving the update, with the
+checksum verified and the agent's order book and risk totals updated on the way.
+
+Usage: python -m benchmarks.bench_order_updates [--updates 500]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.agent import ZerodhaAgent
+from app.order_updates import OrderUpdateStream, PostbackServer, postback_checksum
+
+from .common import scratch_agent
+
+API_SECRET = 'benchmark-secret'
+
+
+async def _post(port: int, body: bytes) -> None:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"POST /postback HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+async def run(args: argparse.Namespace, agent: ZerodhaAgent) -> None:
+    source = PostbackServer(api_secret=API_SECRET)
+    stream = OrderUpdateStream(source)
+    agent.attach_order_updates(stream)
+    pump = asyncio.create_task(stream.run())
+    await source.listening.wait()
+    queue = stream.subscribe()
+
+    samples = []
+    for i in range(args.updates):
+        order_timestamp = '2026-10-18 10:00:00'
+        body = json.dumps({
+            'order_id': str(i), 'exchange': 'NSE', 'tradingsymbol': 'INFY', 'transaction_type': 'BUY',
+            'status': 'COMPLETE', 'quantity': 1, 'filled_quantity': 1, 'average_price': 1500.0,
+            'order_timestamp': order_timestamp, 'checksum': postback_checksum(str(i), order_timestamp, API_SECRET),
+        }).encode()
+        start = time.perf_counter()
+        await _post(source.port, body)
+        await queue.get()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    pump.cancel()
+    samples.sort()
+    print(f"{'postback to subscriber':<28} {len(samples):>6} updates  "
+          f"p50 {samples[len(samples) // 2]:.3f}ms  p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))]:.3f}ms  "
+          f"dispatch mean {stream.stats()['dispatch_ms_mean']:.3f}ms")
+    print(f"{'polling get_orders':<28} waits up to {args.poll_interval:.0f}s (one polling interval)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--updates', type=int, default=500)
+    parser.add_argument('--poll-interval', type=float, default=30.0)
+    args = parser.parse_args()
+    with scratch_agent() as agent:
+        asyncio.run(run(args, agent))
+
+
+if __name__ == '__main__':
+    main()
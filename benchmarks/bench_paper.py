@@ -0,0 +1,84 @@
+"""
+Benchmark: paper-exchange matching throughput and end-to-end agent orders
+
+The matching engine is driven directly with a random mix of LIMIT and MARKET
+orders around a moving price, then a basket is placed through
+ZerodhaAgent.place_orders with the paper exchange installed as the tool
+backend and the API rate limits lifted.
+
+Usage: python -m benchmarks.bench_paper [--orders 200000] [--basket 2000]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from app import tools
+from app.agent import ZerodhaAgent
+from app.paper import PaperExchange
+from app.ratelimit import RateLimiter
+
+from .common import scratch_agent
+
+
+def make_orders(count: int, instruments: int, seed: int = 11) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(count):
+        order_type = 'MARKET' if rng.random() < 0.2 else 'LIMIT'
+        orders.append({
+            'exchange': 'NSE',
+            'tradingsymbol': f"SYM{rng.randrange(instruments)}",
+            'transaction_type': rng.choice(('BUY', 'SELL')),
+            'quantity': rng.randint(1, 100),
+            'product': 'MIS',
+            'order_type': order_type,
+            'price': round(rng.gauss(1000, 5), 1) if order_type == 'LIMIT' else None,
+        })
+    return orders
+
+
+def prices(instruments: int) -> Dict[str, float]:
+    return {f"NSE:SYM{i}": 1000.0 for i in range(instruments)}
+
+
+async def run_agent(args: argparse.Namespace, agent: ZerodhaAgent) -> None:
+    exchange = PaperExchange(cash=1e15, prices=prices(args.instruments))
+    tools.set_backend(exchange)
+    unlimited = {endpoint: 1e9 for endpoint in ('order', 'quote', 'historical', 'default')}
+    agent.rate_limiter = RateLimiter(unlimited)
+    agent.risk_engine.max_order_value = agent.risk_engine.max_open_order_value = float('inf')
+    basket = [dict(order, trading_symbol=order.pop('tradingsymbol'))
+              for order in make_orders(args.basket, args.instruments, seed=12)]
+    start = time.perf_counter()
+    result = await agent.place_orders(basket)
+    elapsed = time.perf_counter() - start
+    tools.set_backend(None)
+    print(f"{'agent place_orders':<24} {len(basket):>8} orders in {elapsed:.3f}s  "
+          f"{len(basket) / elapsed:>10,.0f} orders/s  failed {result.get('failed', len(basket))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--basket', type=int, default=2000)
+    parser.add_argument('--instruments', type=int, default=100)
+    args = parser.parse_args()
+
+    exchange = PaperExchange(cash=1e15, prices=prices(args.instruments))
+    orders = make_orders(args.orders, args.instruments)
+    start = time.perf_counter()
+    for order in orders:
+        exchange.d94_place_order(**order)
+    elapsed = time.perf_counter() - start
+    print(f"{'matching engine':<24} {args.orders:>8} orders in {elapsed:.3f}s  "
+          f"{args.orders / elapsed:>10,.0f} orders/s  trades {len(exchange.trades)}")
+
+    with scratch_agent() as agent:
+        asyncio.run(run_agent(args, agent))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: vectorized portfolio metrics vs the per-holding Python loop
+
+Usage: python -m benchmarks.bench_portfolio_metrics [--sizes 10000 100000]
+"""
+
+import argparse
+from typing import Any, Dict
+
+from app.portfolio import PortfolioArrays, _column, calculate_metrics, calculate_portfolio_metrics, symbol_key
+
+from .common import measure, report
+from .generators import make_holdings, make_margins, make_positions
+
+
+def loop_metrics(holdings: Dict[str, Any], positions: Dict[str, Any], margins: Dict[str, Any]) -> Dict[str, Any]:
+    """The original one-holding-at-a-time implementation, kept as the reference"""
+    total_invested = 0.0
+    current_value = 0.0
+    total_pnl = 0.0
+    for holding in holdings['data']:
+        if isinstance(holding, dict):
+            quantity = holding.get('quantity', 0)
+            total_invested += float(holding.get('average_price', 0) or 0) * float(quantity or 0)
+            current_value += float(holding.get('last_price', 0) or 0) * float(quantity or 0)
+            total_pnl += float(holding.get('pnl', 0) or 0)
+    for position in positions['data']:
+        total_pnl += float(position.get('pnl', 0))
+    return {
+        'total_invested': total_invested,
+        'current_value': current_value,
+        'total_pnl': total_pnl,
+        'return_percentage': (total_pnl / total_invested * 100) if total_invested > 0 else 0,
+        'available_margin': float(margins['data']['equity']['available'].get('cash', 0)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with_sectors = make_holdings(size)
+        # The loop has no sector breakdown, so compare against rows without sectors
+        holdings = {'data': [{k: v for k, v in row.items() if k != 'sector'} for row in with_sectors]}
+        positions = {'data': make_positions(size // 10)}
+        margins = make_margins()
+
+        expected = loop_metrics(holdings, positions, margins)
+        actual = calculate_portfolio_metrics(holdings, positions, margins)
+        assert abs(expected['current_value'] - actual['current_value']) < 1e-6 * max(1.0, expected['current_value'])
+
+        arrays = PortfolioArrays(holdings['data'])
+        positions_pnl = _column(positions['data'], 'pnl')
+
+        print(f"\n{size} holdings, {size // 10} positions")
+        loop = measure(lambda: loop_metrics(holdings, positions, margins), repeat=args.repeat)
+        report('python loop', loop)
+        full = measure(lambda: calculate_portfolio_metrics(holdings, positions, margins), repeat=args.repeat)
+        report('vectorized incl. conversion', full)
+        sectors = measure(lambda: calculate_portfolio_metrics({'data': with_sectors}, positions, margins),
+                          repeat=args.repeat)
+        report('vectorized incl. conversion + sectors', sectors)
+        compute = measure(lambda: calculate_metrics(arrays, positions_pnl, 0.0), repeat=args.repeat)
+        report('vectorized on prebuilt arrays', compute)
+        prices = {symbol_key(row['exchange'], row['tradingsymbol']): row['last_price'] * 1.01
+                  for row in holdings['data'][::10]}
+        reprice = measure(lambda: (arrays.update_last_prices(prices), calculate_metrics(arrays, positions_pnl, 0.0)),
+                          repeat=args.repeat)
+        report('re-price 10% + recompute', reprice)
+        print(f"speed-up: {loop['mean_us'] / full['mean_us']:.1f}x incl. conversion, "
+              f"{loop['mean_us'] / compute['mean_us']:.1f}x on prebuilt arrays, "
+              f"{loop['mean_us'] / reprice['mean_us']:.1f}x for a re-price refresh")
+
+
+if __name__ == '__main__':
+    main()
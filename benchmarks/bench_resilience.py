@@ -0,0 +1,57 @@
+"""
+Benchmark: tail latency of reads with and without hedged requests
+
+Reads go to a simulated endpoint whose latency is usually short but has a
+slow tail, and which occasionally fails. Plain calls (with retries only) are
+compared with hedged calls through the same Resilience layer.
+
+Usage: python -m benchmarks.bench_resilience [--calls 2000] [--slow 0.04]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+
+from app.resilience import Resilience
+
+
+async def _endpoint(rng: random.Random, slow: float, failure: float) -> Dict[str, str]:
+    await asyncio.sleep(0.05 if rng.random() < slow else rng.uniform(0.001, 0.003))
+    if rng.random() < failure:
+        raise ConnectionError("connection reset")
+    return {'status': 'success'}
+
+
+async def _measure(layer: Resilience, hedge: bool, args: argparse.Namespace) -> List[float]:
+    rng = random.Random(3)
+    samples = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        await layer.call('quote', lambda: _endpoint(rng, args.slow, args.failure), hedge=hedge)
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)
+
+
+async def run(args: argparse.Namespace) -> None:
+    for name, hedge in (('retries only', False), ('hedged', True)):
+        layer = Resilience(backoff_base=0.001)
+        samples = await _measure(layer, hedge, args)
+        stats = layer.stats()['quote']
+        print(f"{name:<14} p50 {samples[len(samples) // 2]:>6.2f}ms  "
+              f"p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))]:>6.2f}ms  "
+              f"hedges {stats['hedges']:>4}  retries {stats['retries']:>3}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--slow', type=float, default=0.04)
+    parser.add_argument('--failure', type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
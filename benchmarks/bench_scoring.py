@@ -0,0 +1,61 @@
+"""
+Benchmark: per-instrument recommendation/risk strings vs batch scoring
+
+Usage: python -m benchmarks.bench_scoring [--count 10000] [--display 20]
+"""
+
+import argparse
+import random
+from typing import Any, Dict, List
+
+from app import scoring
+from app.utils import RiskManager
+
+from .common import measure, report, scratch_agent
+
+
+def make_quotes(count: int, seed: int = 5) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [{'change_percent': rng.uniform(-12, 12), 'volume': rng.randint(0, 500000)} for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--display', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with scratch_agent() as agent:
+        quotes = make_quotes(args.count)
+
+        def per_instrument() -> List[Any]:
+            return [(agent._generate_recommendation(q), RiskManager.get_risk_assessment(q['change_percent'], q['volume']))
+                    for q in quotes]
+
+        change_percent, volume = scoring.quote_columns(quotes)
+        display = list(range(args.display))
+
+        def batch() -> Any:
+            recommendations, risks = scoring.score(*scoring.quote_columns(quotes))
+            return (scoring.labels(recommendations, scoring.RECOMMENDATION_LABELS, display),
+                    scoring.labels(risks, scoring.RISK_LABELS, display))
+
+        expected = per_instrument()
+        recommendations, risks = scoring.score(change_percent, volume)
+        assert expected == list(zip(scoring.labels(recommendations, scoring.RECOMMENDATION_LABELS),
+                                    scoring.labels(risks, scoring.RISK_LABELS)))
+
+        print(f"{args.count} quotes, {args.display} displayed")
+        loop = measure(per_instrument, repeat=args.repeat)
+        report('per instrument', loop)
+        full = measure(batch, repeat=args.repeat)
+        report('batch incl. dict extraction', full)
+        arrays = measure(lambda: scoring.score(change_percent, volume), repeat=args.repeat)
+        report('batch on arrays', arrays)
+        print(f"speed-up: {loop['mean_us'] / full['mean_us']:.1f}x from dicts, "
+              f"{loop['mean_us'] / arrays['mean_us']:.1f}x on arrays")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: cold start of main.py and demo.py, failing when it regresses
+
+Each script is started in a fresh interpreter and timed until its first
+prompt (main.py) or first line of output (demo.py) appears. A separate
+`python -X importtime` run lists what the script imports before that point;
+the run fails if the median time exceeds the budget or if any module that
+should load on first use (numpy, pandas, aiohttp, asyncio, the agent) is
+imported at startup.
+
+Usage: python -m benchmarks.bench_startup [--runs 10] [--budget-ms 100]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Script -> output that marks it as ready for the user
+SCRIPTS = {
+    'main': 'Enter your choice',
+    'demo': 'COMPREHENSIVE DEMO',
+}
+
+# Modules that must not be imported before the first prompt
+DEFERRED = ('numpy', 'pandas', 'aiohttp', 'asyncio', 'app.agent', 'app.scanner')
+
+
+def time_to_prompt(script: str, marker: str) -> float:
+    """Milliseconds from process start until marker is printed"""
+    env = dict(os.environ, PYTHONIOENCODING='utf-8')
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, f"{script}.py"], cwd=ROOT, env=env,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    output = b''
+    try:
+        while marker.encode('utf-8') not in output:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"{script}.py exited before printing {marker!r}")
+            output += chunk
+        return (time.perf_counter() - start) * 1000
+    finally:
+        process.kill()
+        process.communicate()
+
+
+def import_times(script: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module `import script` loads"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {script}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def check(script: str, marker: str, runs: int, budget_ms: float, top: int) -> List[str]:
+    """Print the startup profile of script and return its failures"""
+    samples = sorted(time_to_prompt(script, marker) for _ in range(runs))
+    median = samples[len(samples) // 2]
+    modules = import_times(script)
+    total_ms = sum(own for _, own, _ in modules) / 1000
+    print(f"{script + '.py':<10} first prompt p50 {median:>7.1f}ms  max {samples[-1]:>7.1f}ms  "
+          f"imports {total_ms:>6.1f}ms ({len(modules)} modules)")
+    for name, _, cumulative in sorted(modules, key=lambda module: -module[2])[:top]:
+        print(f"    {name:<40} {cumulative / 1000:>7.1f}ms")
+
+    failures = []
+    if median > budget_ms:
+        failures.append(f"{script}.py took {median:.1f}ms to its first prompt (budget {budget_ms:.0f}ms)")
+    loaded = {name for name, _, _ in modules}
+    eager = [name for name in DEFERRED if name in loaded]
+    if eager:
+        failures.append(f"{script}.py imports {', '.join(eager)} at startup")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=100.0)
+    parser.add_argument('--top', type=int, default=5, help='slowest imports to list per script')
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for script, marker in SCRIPTS.items():
+        failures.extend(check(script, marker, args.runs, args.budget_ms, args.top))
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: cold start within budget")
+
+
+if __name__ == '__main__':
+    main()
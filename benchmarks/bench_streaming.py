@@ -0,0 +1,76 @@
+"""
+Benchmark: tick ingestion throughput through the streaming subsystem
+
+A recording of quote-mode frames is replayed from a file and from a local
+socket into a TickStream with one subscriber draining notifications.
+
+Usage: python -m benchmarks.bench_streaming [--frames 2000] [--per-frame 250]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+from app.streaming import FileTickSource, SocketTickSource, TickStream, encode_record
+
+from .generators import make_tick_frames
+
+
+async def _drain(queue: 'asyncio.Queue') -> None:
+    while True:
+        await queue.get()
+
+
+async def _replay(stream: TickStream) -> float:
+    consumer = asyncio.create_task(_drain(stream.subscribe()))
+    start = time.perf_counter()
+    await stream.run()
+    elapsed = time.perf_counter() - start
+    consumer.cancel()
+    return elapsed
+
+
+async def _serve(frames: List[bytes]) -> asyncio.AbstractServer:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(b''.join(encode_record(frame) for frame in frames))
+        await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+
+def _report(name: str, stream: TickStream, elapsed: float) -> None:
+    print(f"{name:<20} {stream.ticks:>9} ticks in {elapsed:.3f}s  "
+          f"{stream.ticks / elapsed:>12,.0f} ticks/s  "
+          f"dropped notifications {stream.dropped_notifications}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    frames = make_tick_frames(args.frames, args.instruments, args.per_frame)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ticks.bin')
+        with open(path, 'wb') as f:
+            f.write(b''.join(encode_record(frame) for frame in frames))
+        stream = TickStream(FileTickSource(path))
+        _report('file replay', stream, await _replay(stream))
+
+    server = await _serve(frames)
+    port = server.sockets[0].getsockname()[1]
+    stream = TickStream(SocketTickSource('127.0.0.1', port))
+    _report('local socket', stream, await _replay(stream))
+    server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--instruments', type=int, default=500)
+    parser.add_argument('--per-frame', type=int, default=250)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
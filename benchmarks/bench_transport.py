@@ -0,0 +1,66 @@
+"""
+Benchmark: tool calls over HTTP with a pooled session vs a connection per call
+
+A MockToolServer serves a PaperExchange on localhost. Quote calls are made
+concurrently through AiohttpToolBackend (one keep-alive pool) and through a
+new session per call, and the pooled backend's connection reuse is reported.
+
+Usage: python -m benchmarks.bench_transport [--calls 2000] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+from app.paper import PaperExchange
+from app.transport import AiohttpToolBackend, MockToolServer
+
+INSTRUMENTS = [f"NSE:SYM{i}" for i in range(50)]
+
+
+async def _gather(call, calls: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    server = MockToolServer(PaperExchange(prices={instrument: 100.0 for instrument in INSTRUMENTS}))
+    url = await server.start()
+
+    backend = AiohttpToolBackend(url, pool_size_per_host=args.concurrency)
+    elapsed = await _gather(lambda: backend.call('d94_get_quotes', instruments=INSTRUMENTS),
+                            args.calls, args.concurrency)
+    stats = backend.stats()
+    await backend.close()
+    print(f"{'pooled keep-alive':<22} {args.calls / elapsed:>8,.0f} calls/s  "
+          f"connections {stats['connections_created']}  reuse {stats['reuse_ratio']:.1%}")
+
+    async def fresh() -> None:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{url}/d94_get_quotes", json={'instruments': INSTRUMENTS}) as response:
+                await response.json()
+
+    elapsed = await _gather(fresh, args.calls, args.concurrency)
+    print(f"{'connection per call':<22} {args.calls / elapsed:>8,.0f} calls/s  connections {args.calls}")
+    await server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Shared timing helpers for the benchmark scripts
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List
+
+if TYPE_CHECKING:
+    from app.agent import ZerodhaAgent
+
+
+def measure(func: Callable[[], Any], repeat: int = 1000) -> Dict[str, float]:
+    """Time func() repeat times and return latency statistics in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'mean_us': sum(samples) / len(samples),
+        'min_us': samples[0],
+        'p50_us': samples[len(samples) // 2],
+        'p99_us': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+@contextmanager
+def scratch_agent() -> Iterator['ZerodhaAgent']:
+    """A ZerodhaAgent whose session, candle and instrument caches live in a temporary directory
+
+    Benchmarks log in through stub tools; this keeps them from overwriting the
+    real session and caches under ~/.kite-agent.
+    """
+    from app.agent import ZerodhaAgent
+    from app.candle_cache import CandleCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        agent = ZerodhaAgent(session_file=os.path.join(directory, 'session'))
+        agent.candle_cache = CandleCache(os.path.join(directory, 'candles'))
+        agent.instrument_cache_dir = os.path.join(directory, 'instruments')
+        yield agent
+
+
+def report(name: str, stats: Dict[str, float]) -> None:
+    """Print one result line"""
+    print(f"{name:<40} mean {stats['mean_us']:>10.1f}us  "
+          f"p50 {stats['p50_us']:>10.1f}us  p99 {stats['p99_us']:>10.1f}us")
+
+
+def machine() -> str:
+    """Identifies where a baseline was recorded"""
+    return f"{platform.python_implementation()} {platform.python_version()} {platform.system()} {platform.machine()}"
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Write results to the JSON baseline at path, keeping entries that were not re-measured"""
+    baseline: Dict[str, Any] = {'results': {}}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    baseline['machine'] = machine()
+    baseline['results'].update(results)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare_baseline(path: str, results: Dict[str, Dict[str, float]], tolerance: float = 0.5,
+                     min_delta_us: float = 10.0, stat: str = 'min_us') -> List[str]:
+    """Regressions of results against the JSON baseline at path
+
+    A case regresses when stat is more than tolerance (a fraction) and more
+    than min_delta_us above the baseline. The fastest run is compared by
+    default because it is the least disturbed by other load on the machine.
+    Cases missing from the baseline are not compared.
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != machine():
+        print(f"note: baseline was recorded on {baseline.get('machine')}")
+    regressions = []
+    for name, stats in results.items():
+        expected = baseline['results'].get(name, {}).get(stat)
+        if expected is None:
+            continue
+        if stats[stat] > max(expected * (1 + tolerance), expected + min_delta_us):
+            regressions.append(f"{name}: {stat} {stats[stat]:.1f}us vs baseline {expected:.1f}us "
+                               f"(+{stats[stat] / expected * 100 - 100:.0f}%)")
+    return regressions
@@ -0,0 +1,209 @@
+"""
+Synthetic data generators for the benchmarks
+"""
+
+import random
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.candle_cache import format_timestamp, parse_datetime, to_epoch
+from app.decoder import FULL_MODE, QUOTE_MODE, TICK_DTYPE, encode_frame, encode_packets
+
+EXCHANGE_MIX = (('NSE', 'EQ', 0.25), ('BSE', 'EQ', 0.15), ('NFO', 'CE', 0.25),
+                ('NFO', 'PE', 0.25), ('MCX', 'FUT', 0.10))
+NAME_WORDS = ('INFOSYS', 'TATA', 'RELIANCE', 'HDFC', 'BANK', 'MOTORS', 'STEEL', 'POWER',
+              'CONSULTANCY', 'SERVICES', 'INDUSTRIES', 'PHARMA', 'CHEMICALS', 'CEMENT',
+              'FINANCE', 'CAPITAL', 'ENERGY', 'INFRA', 'TECH', 'LIFE', 'AUTO', 'GOLD', 'SILVER')
+
+
+def make_instruments(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Instrument dump rows shaped like the Kite instruments CSV"""
+    rng = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    token = 100000
+    underlyings = [
+        ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(rng.randint(3, 10)))
+        for _ in range(max(1, count // 40))
+    ]
+    for i in range(count):
+        exchange, instrument_type, _ = rng.choices(EXCHANGE_MIX, weights=[m[2] for m in EXCHANGE_MIX])[0]
+        underlying = underlyings[i % len(underlyings)]
+        name = ' '.join(rng.sample(NAME_WORDS, rng.randint(1, 3)))
+        if instrument_type in ('CE', 'PE'):
+            strike = rng.randrange(100, 50000, 50)
+            symbol = f"{underlying}24DEC{strike}{instrument_type}"
+            expiry = '2024-12-26'
+        elif instrument_type == 'FUT':
+            strike = 0
+            symbol = f"{underlying}{i}24DECFUT"
+            expiry = '2024-12-19'
+        else:
+            strike = 0
+            symbol = f"{underlying}{i}" if i >= len(underlyings) else underlying
+            expiry = ''
+        token += 1
+        rows.append({
+            'instrument_token': token,
+            'exchange_token': token // 256,
+            'tradingsymbol': symbol,
+            'name': name,
+            'last_price': 0.0,
+            'expiry': expiry,
+            'strike': float(strike),
+            'tick_size': 0.05,
+            'lot_size': 1 if instrument_type == 'EQ' else 50,
+            'instrument_type': instrument_type,
+            'segment': exchange if instrument_type == 'EQ' else f"{exchange}-OPT",
+            'exchange': exchange,
+        })
+    return rows
+
+
+SECTORS = ('IT', 'BANKING', 'ENERGY', 'AUTO', 'PHARMA', 'FMCG', 'METALS', 'TELECOM')
+
+
+def make_holdings(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """Holdings rows shaped like d94_get_holdings data"""
+    rng = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        average_price = round(rng.uniform(10, 5000), 2)
+        last_price = round(average_price * rng.uniform(0.6, 1.6), 2)
+        quantity = rng.randint(1, 1000)
+        rows.append({
+            'tradingsymbol': f"SYM{i}",
+            'exchange': 'NSE',
+            'instrument_token': 100000 + i,
+            'quantity': quantity,
+            'average_price': average_price,
+            'last_price': last_price,
+            'pnl': round((last_price - average_price) * quantity, 2),
+            'sector': SECTORS[i % len(SECTORS)],
+        })
+    return rows
+
+
+def make_positions(count: int, seed: int = 13) -> List[Dict[str, Any]]:
+    """Position rows shaped like d94_get_positions data"""
+    rng = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        quantity = rng.randint(-500, 500)
+        average_price = round(rng.uniform(10, 5000), 2)
+        last_price = round(average_price * rng.uniform(0.95, 1.05), 2)
+        rows.append({
+            'tradingsymbol': f"POS{i}",
+            'exchange': 'NFO',
+            'product': 'NRML',
+            'quantity': quantity,
+            'average_price': average_price,
+            'last_price': last_price,
+            'pnl': round((last_price - average_price) * quantity, 2),
+        })
+    return rows
+
+
+def make_margins(cash: float = 250000.0) -> Dict[str, Any]:
+    """Margins response shaped like d94_get_margins"""
+    return {'data': {'equity': {'available': {'cash': cash}}}}
+
+
+def make_quotes(count: int, seed: int = 19) -> Dict[str, Dict[str, Any]]:
+    """Quotes keyed by 'NSE:SYMn', shaped like d94_get_quotes data (with instrument_token)"""
+    rng = random.Random(seed)
+    quotes: Dict[str, Dict[str, Any]] = {}
+    for i in range(count):
+        close = round(rng.uniform(10, 5000), 2)
+        last_price = round(close * rng.uniform(0.9, 1.1), 2)
+        quotes[f"NSE:SYM{i}"] = {
+            'instrument_token': 256 * (1000 + i) + 1,
+            'last_price': last_price,
+            'net_change': round(last_price - close, 2),
+            'change_percent': (last_price - close) * 100 / close,
+            'volume': rng.randint(0, 2000000),
+            'ohlc': {'open': close, 'high': max(close, last_price), 'low': min(close, last_price), 'close': close},
+        }
+    return quotes
+
+
+ORDER_STATUSES = ('COMPLETE', 'COMPLETE', 'OPEN', 'CANCELLED', 'REJECTED', 'TRIGGER PENDING')
+
+
+def make_orders(count: int, seed: int = 23) -> List[Dict[str, Any]]:
+    """Order rows shaped like d94_get_orders data, one second apart, oldest first"""
+    rng = random.Random(seed)
+    first = to_epoch(parse_datetime('2024-12-02 09:15:00'))
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        order_type = rng.choice(('MARKET', 'LIMIT', 'LIMIT', 'SL', 'SL-M'))
+        price = round(rng.uniform(10, 5000), 1)
+        rows.append({
+            'order_id': f"{240000000000000 + i}",
+            'exchange': 'NSE',
+            'tradingsymbol': f"SYM{rng.randrange(max(1, count // 10))}",
+            'transaction_type': rng.choice(('BUY', 'SELL')),
+            'quantity': rng.randint(1, 500),
+            'product': rng.choice(('CNC', 'MIS', 'NRML')),
+            'order_type': order_type,
+            'price': price if order_type in ('LIMIT', 'SL') else 0.0,
+            'trigger_price': price if order_type in ('SL', 'SL-M') else 0.0,
+            'status': rng.choice(ORDER_STATUSES),
+            'order_timestamp': format_timestamp(first + i),
+        })
+    return rows
+
+
+def make_candles(count: int, start: str = '2024-01-01 09:15:00', seed: int = 29) -> List[Dict[str, Any]]:
+    """Consecutive minute candles shaped like d94_get_historical_data data"""
+    rng = random.Random(seed)
+    first = to_epoch(parse_datetime(start))
+    price = 1000.0
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        open_price = price
+        price = round(max(1.0, price * (1 + rng.gauss(0, 0.001))), 2)
+        rows.append({
+            'date': format_timestamp(first + 60 * i),
+            'open': open_price,
+            'high': round(max(open_price, price) * (1 + rng.uniform(0, 0.0005)), 2),
+            'low': round(min(open_price, price) * (1 - rng.uniform(0, 0.0005)), 2),
+            'close': price,
+            'volume': rng.randint(100, 50000),
+        })
+    return rows
+
+
+def make_ticks(count: int, instruments: int = 500, seed: int = 17) -> np.ndarray:
+    """Decoded full-mode ticks cycling over instruments with a random-walk price"""
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(count, dtype=TICK_DTYPE)
+    index = np.arange(count) % instruments
+    base = rng.uniform(10, 5000, instruments)
+    steps = rng.normal(0, 0.0005, count).reshape(-1, 1) if count else np.zeros((0, 1))
+    price = np.round(base[index] * np.exp(np.cumsum(steps[:, 0])) * 20) / 20
+    ticks['instrument_token'] = 256 * (1000 + index) + 1
+    ticks['mode'] = FULL_MODE
+    ticks['last_price'] = price
+    ticks['last_quantity'] = rng.integers(1, 500, count)
+    ticks['volume'] = np.cumsum(ticks['last_quantity'])
+    ticks['average_price'] = price
+    ticks['open'] = ticks['close'] = np.round(base[index] * 20) / 20
+    ticks['high'] = np.maximum(price, ticks['open'])
+    ticks['low'] = np.minimum(price, ticks['open'])
+    ticks['buy_quantity'] = rng.integers(1000, 100000, count)
+    ticks['sell_quantity'] = rng.integers(1000, 100000, count)
+    levels = np.arange(1, 6) * 0.05
+    ticks['bid_price'] = price[:, None] - levels
+    ticks['ask_price'] = price[:, None] + levels
+    ticks['bid_quantity'] = rng.integers(1, 1000, (count, 5))
+    ticks['ask_quantity'] = rng.integers(1, 1000, (count, 5))
+    ticks['bid_orders'] = ticks['ask_orders'] = 3
+    return ticks
+
+
+def make_tick_frames(frames: int, instruments: int = 500, per_frame: int = 250,
+                     mode: int = QUOTE_MODE, seed: int = 17) -> List[bytes]:
+    """Binary ticker frames of single-mode packets"""
+    packets = encode_packets(make_ticks(frames * per_frame, instruments, seed), mode)
+    return [encode_frame(packets[i:i + per_frame]) for i in range(0, len(packets), per_frame)]
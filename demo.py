@@ -2,10 +2,12 @@
 Example script demonstrating Zerodha AI Agent capabilities
 """
 
-import asyncio
-import json
 from datetime import datetime, timedelta
-from app.agent import zerodha_agent
+
+def agent():
+    """The shared ZerodhaAgent; app.agent is imported on first use so the demo starts quickly"""
+    from app.agent import get_agent
+    return get_agent()
 
 async def demo_portfolio_analysis():
     """Demonstrate portfolio analysis capabilities"""
@@ -13,7 +15,7 @@ async def demo_portfolio_analysis():
     print("="*40)
     
     # Get portfolio summary
-    portfolio = await zerodha_agent.get_portfolio_summary()
+    portfolio = await agent().get_portfolio_summary()
     
     if 'error' not in portfolio:
         summary = portfolio.get('summary', {})
@@ -37,7 +39,7 @@ async def demo_market_data():
     # Popular stocks for demo
     popular_stocks = ["NSE:INFY", "NSE:TCS", "NSE:RELIANCE", "NSE:HDFCBANK"]
     
-    quotes = await zerodha_agent.get_live_quotes(popular_stocks)
+    quotes = await agent().get_live_quotes(popular_stocks)
     
     if quotes:
         for symbol, data in quotes.items():
@@ -61,7 +63,7 @@ async def demo_instrument_search():
     search_terms = ["INFY", "TCS", "WIPRO"]
     
     for term in search_terms:
-        instruments = await zerodha_agent.search_instruments(term)
+        instruments = await agent().search_instruments(term)
         if instruments:
             instrument = instruments[0]  # Take first result
             print(f"🔍 {term}: {instrument.get('name', 'N/A')} ({instrument.get('exchange', 'N/A')})")
@@ -74,7 +76,7 @@ async def demo_market_analysis():
     # Analyze some popular stocks
     stocks_to_analyze = ["NSE:INFY", "NSE:TCS", "NSE:WIPRO"]
     
-    analysis = await zerodha_agent.analyze_market_data(stocks_to_analyze)
+    analysis = await agent().analyze_market_data(stocks_to_analyze)
     
     if analysis:
         for symbol, data in analysis.items():
@@ -134,13 +136,10 @@ async def demo_historical_data():
 
 async def run_comprehensive_demo():
     """Run comprehensive demo of all features"""
-    print("🚀 ZERODHA AI AGENT - COMPREHENSIVE DEMO")
-    print("="*50)
-    
     try:
         # Initialize agent
         print("🔧 Initializing Zerodha AI Agent...")
-        success = await zerodha_agent.initialize()
+        success = await agent().initialize()
         
         if not success:
             print("❌ Failed to initialize. Running in demo mode...")
@@ -175,6 +174,13 @@ async def run_comprehensive_demo():
         print("ℹ️  This might be due to missing Zerodha credentials")
 
 if __name__ == "__main__":
+    print("🚀 ZERODHA AI AGENT - COMPREHENSIVE DEMO")
+    print("="*50)
+    
+    # Imported after the banner so the first output does not wait for them
+    import asyncio
+    import logging
+    logging.basicConfig(level=logging.INFO)
     try:
         asyncio.run(run_comprehensive_demo())
     except KeyboardInterrupt:
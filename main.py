@@ -2,22 +2,46 @@
 Main entry point for the Zerodha AI Agent
 """
 
-import asyncio
-import json
-from app.agent import zerodha_agent
+from app.config import config
 
-async def main():
+# Nothing heavy is imported before the menu is shown: asyncio, logging and the
+# agent (which pulls in numpy) are set up with the first menu action
+_loop = None
+_agent = None
+_scanner = None
+
+def agent():
+    """The shared ZerodhaAgent, created on first use"""
+    global _agent
+    if _agent is None:
+        from app.agent import get_agent
+        _agent = get_agent()
+    return _agent
+
+def scanner():
+    """The market scanner, created on first use"""
+    global _scanner
+    if _scanner is None:
+        from app.scanner import MarketScanner
+        _scanner = MarketScanner(agent())
+    return _scanner
+
+def run(coroutine_function):
+    """Run one menu action on the event loop shared by all actions"""
+    global _loop
+    if _loop is None:
+        import asyncio
+        import logging
+        logging.basicConfig(level=logging.INFO)
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coroutine_function())
+
+def main():
     """Main function to demonstrate the Zerodha AI Agent capabilities"""
     
-    print("🚀 Initializing Zerodha AI Agent...")
-    
-    # Initialize the agent
-    success = await zerodha_agent.initialize()
-    if not success:
-        print("❌ Failed to initialize agent. Please check your Zerodha credentials.")
-        return
-    
-    print("✅ Agent initialized successfully!")
+    # Login happens on first use, reusing the stored session while it is valid
+    print("✅ Zerodha AI Agent ready!")
     
     # Menu-driven interface
     while True:
@@ -32,40 +56,48 @@ async def main():
         print("6. 📈 Get Historical Data")
         print("7. ⏰ GTT Orders")
         print("8. 🔄 Market Analysis")
-        print("9. ❌ Exit")
+        print("9. 🛰️  Market Scanner")
+        print("10. ❌ Exit")
         print("="*50)
         
-        choice = input("Enter your choice (1-9): ").strip()
+        choice = input("Enter your choice (1-10): ").strip()
         
         try:
             if choice == "1":
-                await handle_portfolio_summary()
+                run(handle_portfolio_summary)
             elif choice == "2":
-                await handle_search_instruments()
+                run(handle_search_instruments)
             elif choice == "3":
-                await handle_live_market_data()
+                run(handle_live_market_data)
             elif choice == "4":
-                await handle_place_order()
+                run(handle_place_order)
             elif choice == "5":
-                await handle_view_orders()
+                run(handle_view_orders)
             elif choice == "6":
-                await handle_historical_data()
+                run(handle_historical_data)
             elif choice == "7":
-                await handle_gtt_orders()
+                run(handle_gtt_orders)
             elif choice == "8":
-                await handle_market_analysis()
+                run(handle_market_analysis)
             elif choice == "9":
+                run(handle_market_scanner)
+            elif choice == "10":
                 print("👋 Thank you for using Zerodha AI Agent!")
+                if _agent is not None:
+                    run(_agent.close)
                 break
             else:
                 print("❌ Invalid choice. Please try again.")
         except Exception as e:
             print(f"❌ Error: {e}")
+    
+    if _loop is not None:
+        _loop.close()
 
 async def handle_portfolio_summary():
     """Handle portfolio summary display"""
     print("\n📊 Fetching Portfolio Summary...")
-    portfolio = await zerodha_agent.get_portfolio_summary()
+    portfolio = await agent().get_portfolio_summary()
     
     if 'error' in portfolio:
         print(f"❌ Error: {portfolio['error']}")
@@ -75,6 +107,9 @@ async def handle_portfolio_summary():
     print("📈 PORTFOLIO SUMMARY")
     print("="*40)
     
+    if portfolio.get('stale_sections'):
+        print(f"⚠️  Showing last known data for: {', '.join(portfolio['stale_sections'])}")
+    
     if 'summary' in portfolio:
         summary = portfolio['summary']
         print(f"💰 Total Invested: ₹{summary.get('total_invested', 0):,.2f}")
@@ -94,7 +129,7 @@ async def handle_search_instruments():
         return
     
     print(f"🔍 Searching for '{query}'...")
-    instruments = await zerodha_agent.search_instruments(query)
+    instruments = await agent().search_instruments(query)
     
     if not instruments:
         print("❌ No instruments found.")
@@ -114,7 +149,7 @@ async def handle_live_market_data():
     instruments = [s.strip() for s in symbols.split(',')]
     print(f"📊 Fetching live data for {instruments}...")
     
-    quotes = await zerodha_agent.get_live_quotes(instruments)
+    quotes = await agent().get_live_quotes(instruments)
     
     if not quotes:
         print("❌ No data found.")
@@ -204,7 +239,7 @@ async def handle_place_order():
         return
     
     print("📤 Placing order...")
-    result = await zerodha_agent.place_order(
+    result = await agent().place_order(
         exchange=exchange,
         trading_symbol=symbol,
         transaction_type=transaction_type,
@@ -215,6 +250,24 @@ async def handle_place_order():
         trigger_price=trigger_price
     )
     
+    if result.get('requires_confirmation'):
+        print(f"⚠️  {result['error']}")
+        confirm = input("⚠️  Place this high-value order anyway? (yes/no): ").strip().lower()
+        if confirm != 'yes':
+            print("❌ Order cancelled.")
+            return
+        result = await agent().place_order(
+            exchange=exchange,
+            trading_symbol=symbol,
+            transaction_type=transaction_type,
+            quantity=quantity,
+            order_type=order_type,
+            product=product,
+            price=price,
+            trigger_price=trigger_price,
+            confirmed=True
+        )
+    
     if 'error' in result:
         print(f"❌ Order failed: {result['error']}")
     else:
@@ -225,14 +278,14 @@ async def handle_place_order():
 async def handle_view_orders():
     """Handle viewing orders"""
     print("\n📋 Fetching Orders...")
-    orders = await zerodha_agent.get_orders()
+    orders = await agent().query_orders(limit=config.MAX_DISPLAY_INSTRUMENTS, max_age=0)
     
     if not orders:
         print("❌ No orders found.")
         return
     
     print("\n" + "="*80)
-    print("📋 ORDERS")
+    print(f"📋 ORDERS (latest {len(orders)} of {len(agent().order_book)})")
     print("="*80)
     
     for order in orders:
@@ -250,10 +303,10 @@ async def handle_historical_data():
         token = int(input("Instrument Token: ").strip())
         from_date = input("From Date (YYYY-MM-DD): ").strip()
         to_date = input("To Date (YYYY-MM-DD): ").strip()
-        interval = input("Interval (minute/day/5minute/15minute/30minute/60minute) [day]: ").strip() or "day"
+        interval = input("Interval (minute/day/3minute/5minute/15minute/30minute/60minute) [day]: ").strip() or "day"
         
         print("📊 Fetching historical data...")
-        data = await zerodha_agent.get_historical_data(token, from_date, to_date, interval)
+        data = await agent().get_historical_data(token, from_date, to_date, interval)
         
         if not data:
             print("❌ No data found.")
@@ -280,7 +333,7 @@ async def handle_gtt_orders():
     
     if choice == "1":
         print("📋 Fetching GTT orders...")
-        gtt_orders = await zerodha_agent.get_gtt_orders()
+        gtt_orders = await agent().get_gtt_orders()
         
         if not gtt_orders:
             print("❌ No GTT orders found.")
@@ -292,7 +345,45 @@ async def handle_gtt_orders():
                   f"Type: {gtt.get('trigger_type', 'N/A')} | Status: {gtt.get('status', 'N/A')}")
     
     elif choice == "2":
-        print("📊 GTT Order placement is complex. Please use the API documentation for detailed implementation.")
+        exchange = input("Exchange (NSE/BSE) [NSE]: ").strip().upper() or "NSE"
+        symbol = input("Trading Symbol: ").strip().upper()
+        trigger_type = input("Type (single/two-leg) [single]: ").strip().lower() or "single"
+        transaction_type = input("Transaction Type (BUY/SELL): ").strip().upper()
+        product = input("Product (CNC/MIS/NRML) [CNC]: ").strip().upper() or "CNC"
+        try:
+            quantity = int(input("Quantity: ").strip())
+            last_price = float(input("Current Price: ").strip())
+            if trigger_type == "two-leg":
+                legs = [
+                    (float(input("Stop-loss Trigger: ").strip()), float(input("Stop-loss Limit Price: ").strip())),
+                    (float(input("Target Trigger: ").strip()), float(input("Target Limit Price: ").strip())),
+                ]
+            else:
+                legs = [(float(input("Trigger Price: ").strip()), float(input("Limit Price: ").strip()))]
+        except ValueError:
+            print("❌ Invalid number.")
+            return
+        
+        print(f"\n📋 GTT: {transaction_type} {quantity} {exchange}:{symbol} ({trigger_type})")
+        for trigger, limit in legs:
+            print(f"  ⚡ Trigger ₹{trigger} → LIMIT ₹{limit}")
+        if input("\n⚠️  Confirm GTT placement? (yes/no): ").strip().lower() != 'yes':
+            print("❌ GTT cancelled.")
+            return
+        
+        result = await agent().place_gtt_order(
+            trigger_type=trigger_type,
+            exchange=exchange,
+            tradingsymbol=symbol,
+            trigger_values=[trigger for trigger, _ in legs],
+            last_price=last_price,
+            orders=[{'transaction_type': transaction_type, 'quantity': quantity, 'order_type': 'LIMIT',
+                     'product': product, 'price': limit} for _, limit in legs]
+        )
+        if 'error' in result:
+            print(f"❌ GTT failed: {result['error']}")
+        else:
+            print(f"✅ GTT placed: {result.get('data', {}).get('trigger_id', result.get('message', ''))}")
 
 async def handle_market_analysis():
     """Handle market analysis"""
@@ -304,7 +395,7 @@ async def handle_market_analysis():
     instruments = [s.strip() for s in symbols.split(',')]
     print("🔍 Analyzing market data...")
     
-    analysis = await zerodha_agent.analyze_market_data(instruments)
+    analysis = await agent().analyze_market_data(instruments)
     
     if not analysis:
         print("❌ No analysis data available.")
@@ -320,10 +411,48 @@ async def handle_market_analysis():
         print(f"  📊 Change: ₹{data.get('change', 0)} ({data.get('change_percent', 0):.2f}%)")
         print(f"  📦 Volume: {data.get('volume', 0):,}")
         print(f"  💡 Recommendation: {data.get('recommendation', 'N/A')}")
+        print(f"  ⚖️  Risk: {data.get('risk', 'N/A')}")
+
+async def handle_market_scanner():
+    """Handle the full-universe market scanner"""
+    import asyncio
+    
+    cycles = input(f"\n🛰️  Number of scan cycles, every {config.MARKET_DATA_REFRESH_INTERVAL}s [1]: ").strip()
+    cycles = int(cycles) if cycles.isdigit() and int(cycles) > 0 else 1
+    
+    titles = {
+        'gainers': ('🚀 TOP GAINERS', 'change_percent', '%'),
+        'losers': ('🔻 TOP LOSERS', 'change_percent', '%'),
+        'volume_spikes': ('📦 VOLUME SPIKES', 'volume_ratio', 'x'),
+        'gap_ups': ('⬆️  GAP-UPS', 'gap_percent', '%'),
+    }
+    for cycle in range(cycles):
+        started = asyncio.get_running_loop().time()
+        print(f"\n🔍 Scanning {config.SCANNER_EXCHANGE} {config.SCANNER_INSTRUMENT_TYPE}...")
+        result = await scanner().scan()
+        
+        if not result['scanned']:
+            print("❌ No market data available.")
+            return
+        
+        print("\n" + "="*60)
+        print(f"🛰️  MARKET SCANNER - {result['scanned']}/{result['universe']} instruments in {result['elapsed']:.2f}s")
+        print("="*60)
+        for ranking, (title, field, unit) in titles.items():
+            print(f"\n{title}")
+            if not result[ranking]:
+                print("  -")
+            for row in result[ranking]:
+                symbol = row['instrument'].split(':')[-1]
+                print(f"  {symbol:<15} ₹{row['last_price']:<10.2f} {row[field]:+.2f}{unit}")
+        
+        if cycle < cycles - 1:
+            elapsed = asyncio.get_running_loop().time() - started
+            await asyncio.sleep(max(0.0, config.MARKET_DATA_REFRESH_INTERVAL - elapsed))
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
     except Exception as e:
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from app.agent import ZerodhaAgent
+from app.candle_cache import CandleCache
+
+
+@pytest.fixture
+def agent(tmp_path):
+    """An agent whose session and caches live in tmp_path"""
+    agent = ZerodhaAgent(session_file=os.path.join(tmp_path, 'session'))
+    agent.candle_cache = CandleCache(os.path.join(tmp_path, 'candles'))
+    agent.instrument_cache_dir = os.path.join(tmp_path, 'instruments')
+    return agent
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from app.accounts import MultiAccountAggregator
+from app.agent import ZerodhaAgent
+from app.config import config
+from app.transport import ToolBackend
+
+
+class AccountBackend(ToolBackend):
+    def __init__(self, holdings, cash, fail=False):
+        self.holdings = holdings
+        self.cash = cash
+        self.fail = fail
+
+    async def call(self, tool_name, **kwargs):
+        if self.fail:
+            raise ConnectionError('account unreachable')
+        if tool_name == 'd94_get_holdings':
+            return {'status': 'success', 'data': self.holdings}
+        if tool_name == 'd94_get_margins':
+            return {'status': 'success', 'data': {'equity': {'available': {'cash': self.cash}}}}
+        return {'status': 'success', 'data': []}
+
+
+def holding(tradingsymbol, quantity, average_price, last_price):
+    return {'exchange': 'NSE', 'tradingsymbol': tradingsymbol, 'quantity': quantity,
+            'average_price': average_price, 'last_price': last_price,
+            'pnl': (last_price - average_price) * quantity}
+
+
+def account(tmp_path, account_id, backend):
+    agent = ZerodhaAgent(session_file=os.path.join(tmp_path, f'session-{account_id}'))
+    agent.backend = backend
+    agent.is_logged_in = True
+    agent.sector_map = {'INFY': 'IT', 'SBIN': 'BANKING'}
+    return agent
+
+
+def test_accounts_sharing_a_session_file_are_refused(tmp_path):
+    shared = os.path.join(tmp_path, 'session')
+    with pytest.raises(ValueError):
+        MultiAccountAggregator({'A': ZerodhaAgent(session_file=shared), 'B': ZerodhaAgent(session_file=shared)})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('pool_min_rows', [config.ACCOUNT_POOL_MIN_ROWS, 0])
+async def test_refresh_consolidates_accounts_and_flags_unreachable_ones_stale(tmp_path, monkeypatch, pool_min_rows):
+    monkeypatch.setattr(config, 'ACCOUNT_POOL_MIN_ROWS', pool_min_rows)
+    monkeypatch.setattr(config, 'API_TIMEOUT', 1)
+    aggregator = MultiAccountAggregator({
+        'A': account(tmp_path, 'A', AccountBackend([holding('INFY', 10, 100.0, 110.0)], 1000.0)),
+        'B': account(tmp_path, 'B', AccountBackend([holding('SBIN', 5, 200.0, 180.0)], 500.0)),
+        'C': account(tmp_path, 'C', AccountBackend([], 0.0, fail=True)),
+    }, workers=1)
+    try:
+        result = await aggregator.refresh()
+    finally:
+        aggregator.close()
+
+    assert result['accounts']['A']['summary']['total_pnl'] == 100.0
+    consolidated = result['consolidated']
+    assert consolidated['total_invested'] == 2000.0
+    assert consolidated['total_pnl'] == 0.0
+    assert consolidated['available_margin'] == 1500.0
+    assert consolidated['sectors']['BANKING']['pnl'] == -100.0
+    assert consolidated['sectors']['IT']['weight'] == pytest.approx(1100 / 2000 * 100)
+    # A failed account serves empty stale sections rather than failing the refresh
+    assert sorted(result['accounts']['C']['stale_sections']) == ['holdings', 'margins', 'mutual_funds', 'positions']
+    assert result['failed_accounts'] == []
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.bars import IST_OFFSET, BarAggregator
+from app.candle_cache import to_epoch
+from app.decoder import TICK_DTYPE
+
+TOKEN = 408065
+DAY = datetime(2026, 10, 19)
+
+
+def ist(hour, minute, second=0):
+    return to_epoch(DAY.replace(hour=hour, minute=minute, second=second))
+
+
+def ticks(*rows):
+    """Ticks from (IST epoch seconds, last price, cumulative volume) rows"""
+    frame = np.zeros(len(rows), dtype=TICK_DTYPE)
+    for tick, (ts, price, volume) in zip(frame, rows):
+        tick['instrument_token'] = TOKEN
+        tick['exchange_timestamp'] = ts - IST_OFFSET
+        tick['last_price'] = price
+        tick['volume'] = volume
+    return frame
+
+
+def test_ticks_build_and_close_minute_bars():
+    aggregator = BarAggregator(['minute'], 8)
+    assert aggregator.update(ticks((ist(9, 15, 5), 100.0, 10), (ist(9, 15, 30), 102.0, 15),
+                                   (ist(9, 15, 50), 99.0, 40)), 0.0) == []
+    closed = aggregator.update(ticks((ist(9, 16, 1), 101.0, 50)), 0.0)
+
+    assert [(bar['open'], bar['high'], bar['low'], bar['close'], bar['volume']) for bar in closed] == [
+        (100.0, 102.0, 99.0, 99.0, 30)]
+    bars = aggregator.bars(TOKEN, 'minute', ist(9, 15), ist(9, 17))
+    assert [bar['date'] for bar in bars] == ['2026-10-19T09:15:00', '2026-10-19T09:16:00']
+    assert bars[1]['volume'] == 10
+
+
+def test_late_ticks_do_not_reopen_closed_bars():
+    aggregator = BarAggregator(['minute'], 8)
+    aggregator.update(ticks((ist(9, 15, 5), 100.0, 10), (ist(9, 16, 5), 101.0, 20)), 0.0)
+    aggregator.update(ticks((ist(9, 15, 55), 90.0, 25)), 0.0)
+
+    first = aggregator.bars(TOKEN, 'minute', ist(9, 15), ist(9, 16))[0]
+    assert first['low'] == 100.0
+
+
+def test_stream_started_mid_bar_does_not_cover_that_bar():
+    aggregator = BarAggregator(['minute', '5minute'], 8)
+    aggregator.update(ticks((ist(9, 15, 40), 100.0, 10)), 0.0)
+
+    assert not aggregator.covers(TOKEN, 'minute', ist(9, 15))
+    assert not aggregator.covers(TOKEN, 'minute', to_epoch(DAY))
+    assert aggregator.covers(TOKEN, 'minute', ist(9, 16))
+    assert aggregator.covers(TOKEN, 'minute', ist(9, 15, 30))  # bars() starts at 09:16
+    assert not aggregator.covers(TOKEN, '5minute', ist(9, 15))
+    assert aggregator.covers(TOKEN, '5minute', ist(9, 16))  # bars() starts at 09:20
+
+
+def test_stream_started_before_the_open_covers_the_session():
+    aggregator = BarAggregator(['minute'], 8)
+    aggregator.update(ticks((ist(9, 10), 100.0, 0)), 0.0)
+
+    assert aggregator.covers(TOKEN, 'minute', to_epoch(DAY))
+    assert not aggregator.covers(TOKEN, 'minute', to_epoch(DAY.replace(day=20)))
+    assert not aggregator.covers(TOKEN + 1, 'minute', to_epoch(DAY))
@@ -0,0 +1,77 @@
+import pytest
+
+from app.transport import ToolBackend
+
+
+class OrderBackend(ToolBackend):
+    """Accepts every order; with lose_responses, the next responses are lost after the order is placed"""
+
+    def __init__(self):
+        self.placed = []
+        self.lose_responses = 0
+
+    async def call(self, tool_name, **kwargs):
+        if tool_name == 'd94_place_order':
+            order_id = f"order{len(self.placed) + 1}"
+            self.placed.append(dict(kwargs, order_id=order_id, status='OPEN', filled_quantity=0))
+            if self.lose_responses:
+                self.lose_responses -= 1
+                raise ConnectionError('connection reset')
+            return {'status': 'success', 'data': {'order_id': order_id}}
+        if tool_name == 'd94_get_orders':
+            return {'status': 'success', 'data': list(self.placed)}
+        return {'status': 'success', 'data': {}}
+
+
+def basket(*quantities):
+    return [{'exchange': 'NSE', 'trading_symbol': symbol, 'transaction_type': 'BUY', 'quantity': quantity,
+             'order_type': 'LIMIT', 'product': 'CNC', 'price': 100.0}
+            for symbol, quantity in zip(['INFY', 'TCS', 'SBIN'], quantities)]
+
+
+@pytest.fixture
+def backend(agent):
+    backend = agent.backend = OrderBackend()
+    agent.is_logged_in = True
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_basket_places_each_order_once(agent, backend):
+    orders = basket(1, 2, 3)
+    first = await agent.place_orders(orders)
+    assert first['status'] == 'success'
+    assert len(backend.placed) == 3
+
+    again = await agent.place_orders(orders)
+    assert again['status'] == 'success'
+    assert [result['duplicate'] for result in again['results']] == [True, True, True]
+    assert [result['order_id'] for result in again['results']] == ['order1', 'order2', 'order3']
+    assert len(backend.placed) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_after_a_lost_response_finds_the_order_by_tag(agent, backend):
+    orders = basket(1)
+    backend.lose_responses = 1
+    first = await agent.place_orders(orders)
+    assert first['status'] == 'error'
+    assert len(backend.placed) == 1
+    assert agent.risk_engine.open_order_value == 0
+
+    retry = await agent.place_orders(orders)
+    assert retry['results'][0]['status'] == 'success'
+    assert retry['results'][0]['duplicate']
+    assert retry['results'][0]['order_id'] == 'order1'
+    assert len(backend.placed) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('quantity', ['5', None, 2.5, 0, -1, True])
+async def test_invalid_quantity_rejects_the_basket(agent, backend, quantity):
+    result = await agent.place_orders(basket(1, quantity))
+    assert result['status'] == 'error'
+    assert [error['index'] for error in result['errors']] == [1]
+    assert 'quantity' in result['errors'][0]['error']
+    assert backend.placed == []
+    assert agent.risk_engine.open_order_value == 0
@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.candle_cache import CandleCache, from_epoch, parse_datetime, request_range, to_epoch
+
+TOKEN = 408065
+DAY = 86400
+
+
+def candles(first, days, close=100.0):
+    return [{'date': (first + timedelta(days=i)).isoformat(), 'open': close, 'high': close + 1,
+             'low': close - 1, 'close': close + i, 'volume': 1000 + i} for i in range(days)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CandleCache(str(tmp_path))
+
+
+def test_request_range_includes_the_whole_to_date():
+    start, end = request_range('2026-10-01', '2026-10-02')
+    assert end - start == 2 * DAY
+    start, end = request_range('2026-10-01 09:15:00', '2026-10-01 09:15:59')
+    assert end - start == 60
+
+
+def test_timestamps_with_an_offset_stay_exchange_local():
+    assert parse_datetime('2026-10-01T09:15:00+0530') == datetime(2026, 10, 1, 9, 15)
+
+
+def test_only_the_gaps_of_a_request_are_missing(cache):
+    first = datetime(2026, 10, 1)
+    start, end = to_epoch(first), to_epoch(first) + 10 * DAY
+    cache.store(TOKEN, 'day', candles(first + timedelta(days=3), 3), start + 3 * DAY, start + 6 * DAY)
+
+    assert cache.missing(TOKEN, 'day', start, end) == [(start, start + 3 * DAY), (start + 6 * DAY, end)]
+    assert [row['date'] for row in cache.read(TOKEN, 'day', start, end)] == [
+        '2026-10-04T00:00:00', '2026-10-05T00:00:00', '2026-10-06T00:00:00']
+
+
+def test_empty_fetched_ranges_are_not_fetched_again(cache):
+    start = to_epoch(datetime(2026, 10, 3))  # A weekend without candles
+    cache.store(TOKEN, 'day', [], start, start + 2 * DAY)
+
+    assert cache.missing(TOKEN, 'day', start, start + 2 * DAY) == []
+    assert cache.read(TOKEN, 'day', start, start + 2 * DAY) == []
+
+
+def test_refetched_candles_replace_cached_ones(cache):
+    first = datetime(2026, 10, 1)
+    start = to_epoch(first)
+    cache.store(TOKEN, 'day', candles(first, 2, close=100.0), start, start + 2 * DAY)
+    cache.store(TOKEN, 'day', candles(first + timedelta(days=1), 2, close=200.0), start + DAY, start + 3 * DAY)
+
+    assert [row['close'] for row in cache.read(TOKEN, 'day', start, start + 3 * DAY)] == [100.0, 200.0, 201.0]
+    assert cache.missing(TOKEN, 'day', start, start + 3 * DAY) == []
+
+
+def test_candles_after_complete_before_stay_missing(cache):
+    today = datetime.combine(date.today(), datetime.min.time())
+    session_start = to_epoch(today)
+    start = session_start - DAY
+    cache.store(TOKEN, 'minute', [], start, session_start + 3600, complete_before=session_start)
+
+    assert cache.missing(TOKEN, 'minute', start, session_start + 3600) == [(session_start, session_start + 3600)]
+
+
+@pytest.mark.asyncio
+async def test_agent_fetches_only_uncached_ranges(agent):
+    calls = []
+
+    async def fetch(instrument_token, start, end, interval):
+        calls.append((start, end))
+        days = (end - start) // DAY
+        return candles(from_epoch(start), days)
+
+    agent._fetch_historical_data = fetch
+    first = await agent.get_historical_data(TOKEN, '2026-10-01', '2026-10-05')
+    again = await agent.get_historical_data(TOKEN, '2026-10-03', '2026-10-07')
+
+    start = to_epoch(datetime(2026, 10, 1))
+    assert calls == [(start, start + 5 * DAY), (start + 5 * DAY, start + 7 * DAY)]
+    assert len(first) == 5
+    assert [row['date'][:10] for row in again] == ['2026-10-03', '2026-10-04', '2026-10-05', '2026-10-06',
+                                                    '2026-10-07']
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from app.decoder import (DEPTH_LEVELS, FULL_MODE, LTP_MODE, QUOTE_MODE, TICK_DTYPE, decode_frame,
+                         encode_frame, encode_packets, to_quotes)
+
+NSE_TOKEN = 256 * 1000 + 1
+CDS_TOKEN = 256 * 1001 + 3  # Currency segment: prices in 1e-7 rupees
+
+
+def make_ticks(mode):
+    ticks = np.zeros(3, dtype=TICK_DTYPE)
+    ticks['instrument_token'] = [NSE_TOKEN, NSE_TOKEN + 256, CDS_TOKEN]
+    ticks['mode'] = mode
+    ticks['last_price'] = [1500.05, 20.5, 83.1234567]
+    ticks['last_quantity'] = [10, 250, 1000]
+    ticks['average_price'] = [1499.5, 20.45, 83.12]
+    ticks['volume'] = [120000, 5000000, 30]
+    ticks['buy_quantity'] = [3000, 4000, 5]
+    ticks['sell_quantity'] = [3500, 4500, 6]
+    ticks['open'] = [1490.0, 20.0, 83.0]
+    ticks['high'] = [1510.0, 21.0, 83.2]
+    ticks['low'] = [1485.0, 19.95, 82.9]
+    ticks['close'] = [1495.0, 20.1, 83.05]
+    if mode == FULL_MODE:
+        ticks['last_trade_time'] = 1760000000
+        ticks['exchange_timestamp'] = 1760000001
+        ticks['oi'] = [0, 0, 42]
+        levels = np.arange(1, DEPTH_LEVELS + 1) * 0.05
+        ticks['bid_price'] = ticks['last_price'][:, None] - levels
+        ticks['ask_price'] = ticks['last_price'][:, None] + levels
+        ticks['bid_quantity'] = np.arange(DEPTH_LEVELS) + 1
+        ticks['ask_quantity'] = np.arange(DEPTH_LEVELS) + 11
+        ticks['bid_orders'] = ticks['ask_orders'] = 2
+    return ticks
+
+
+def assert_prices_equal(actual, expected):
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-7)
+
+
+@pytest.mark.parametrize('mode', [LTP_MODE, QUOTE_MODE, FULL_MODE])
+def test_round_trip(mode):
+    ticks = make_ticks(mode)
+    decoded = decode_frame(encode_frame(encode_packets(ticks, mode)))
+
+    assert len(decoded) == len(ticks)
+    np.testing.assert_array_equal(decoded['instrument_token'], ticks['instrument_token'])
+    np.testing.assert_array_equal(decoded['mode'], mode)
+    assert_prices_equal(decoded['last_price'], ticks['last_price'])
+    if mode == LTP_MODE:
+        assert not decoded['volume'].any()
+        return
+    for name in ('open', 'high', 'low', 'close', 'average_price'):
+        assert_prices_equal(decoded[name], ticks[name])
+    for name in ('last_quantity', 'volume', 'buy_quantity', 'sell_quantity'):
+        np.testing.assert_array_equal(decoded[name], ticks[name])
+    assert_prices_equal(decoded['change'], ticks['last_price'] - ticks['close'])
+    if mode == FULL_MODE:
+        for name in ('last_trade_time', 'exchange_timestamp', 'oi', 'bid_quantity', 'ask_quantity',
+                     'bid_orders', 'ask_orders'):
+            np.testing.assert_array_equal(decoded[name], ticks[name])
+        assert_prices_equal(decoded['bid_price'], ticks['bid_price'])
+        assert_prices_equal(decoded['ask_price'], ticks['ask_price'])
+
+
+def test_mixed_mode_frame():
+    ltp = make_ticks(LTP_MODE)[:1]
+    full = make_ticks(FULL_MODE)[1:]
+    frame = encode_frame(encode_packets(ltp, LTP_MODE) + encode_packets(full, FULL_MODE))
+    decoded = decode_frame(frame)
+
+    assert decoded['mode'].tolist() == [LTP_MODE, FULL_MODE, FULL_MODE]  # Frame order is kept
+    by_token = {row['instrument_token']: row for row in decoded}
+    assert by_token[NSE_TOKEN]['last_price'] == pytest.approx(1500.05)
+    assert by_token[CDS_TOKEN]['oi'] == 42
+
+
+def test_heartbeat_and_unknown_packets_decode_to_nothing():
+    assert len(decode_frame(b'\x00')) == 0
+    assert len(decode_frame(encode_frame([b'\x00' * 5]))) == 0
+
+
+def test_to_quotes_keys_by_symbol():
+    decoded = decode_frame(encode_frame(encode_packets(make_ticks(FULL_MODE), FULL_MODE)))
+    quotes = to_quotes(decoded, {NSE_TOKEN: 'NSE:INFY'})
+
+    assert quotes['NSE:INFY']['last_price'] == pytest.approx(1500.05)
+    assert quotes['NSE:INFY']['depth']['buy'][0]['quantity'] == 1
+    assert str(CDS_TOKEN) in quotes
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from app.decoder import TICK_DTYPE
+from app.gtt import ACTIVE, CANCELLED, REJECTED, SINGLE, TRIGGERED, TWO_LEG, GTTEngine
+
+TOKEN = 408065
+BUY = {'transaction_type': 'BUY', 'quantity': 1, 'product': 'CNC', 'price': 100.0}
+SELL = {'transaction_type': 'SELL', 'quantity': 1, 'product': 'CNC', 'price': 100.0}
+
+
+def ticks(*prices, token=TOKEN):
+    rows = np.zeros(len(prices), dtype=TICK_DTYPE)
+    rows['instrument_token'] = token
+    rows['last_price'] = prices
+    return rows
+
+
+@pytest.fixture
+def placed():
+    return []
+
+
+@pytest.fixture
+def engine(placed):
+    async def place_order(**order):
+        placed.append(order)
+        return {'status': 'success', 'data': {'order_id': str(len(placed))}}
+
+    return GTTEngine(place_order)
+
+
+@pytest.mark.asyncio
+async def test_single_gtt_fires_once_when_its_level_is_crossed(engine, placed):
+    gtt_id = engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [110.0], 100.0, [SELL])
+
+    engine.on_ticks(ticks(105.0), 0.0)
+    await engine.drain()
+    assert placed == []
+
+    engine.on_ticks(ticks(110.0, 111.0), 0.0)
+    engine.on_ticks(ticks(112.0), 0.0)
+    await engine.drain()
+    assert len(placed) == 1
+    assert placed[0]['tag'] == f'gtt{gtt_id}leg0'
+    assert gtt_id not in engine.gtts
+    assert engine.history[-1]['status'] == TRIGGERED
+    assert engine.history[-1]['triggered_price'] == 110.0
+    assert engine.stats()['instruments'] == 0
+
+
+@pytest.mark.asyncio
+async def test_falling_trigger_fires_below_the_last_price(engine, placed):
+    engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [90.0], 100.0, [BUY])
+
+    engine.on_ticks(ticks(95.0), 0.0)
+    engine.on_ticks(ticks(89.5), 0.0)
+    await engine.drain()
+    assert [order['transaction_type'] for order in placed] == ['BUY']
+
+
+@pytest.mark.asyncio
+async def test_one_tick_crosses_several_levels(engine, placed):
+    for value in (101.0, 102.0, 103.0):
+        engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [value], 100.0, [SELL])
+
+    engine.on_ticks(ticks(102.5), 0.0)
+    await engine.drain()
+    assert len(placed) == 2
+    assert len(engine.active()) == 1
+
+
+@pytest.mark.asyncio
+async def test_two_leg_gtt_cancels_the_other_leg(engine, placed):
+    gtt_id = engine.create(TWO_LEG, 'NSE', 'INFY', TOKEN, [90.0, 110.0], 100.0, [SELL, SELL])
+
+    engine.on_ticks(ticks(89.0), 0.0)
+    engine.on_ticks(ticks(120.0), 0.0)
+    await engine.drain()
+    assert len(placed) == 1
+    assert engine.history[-1]['id'] == gtt_id
+    assert engine.history[-1]['triggered_leg'] == 0
+    assert engine._levels == {}  # The target leg went with the stop-loss
+
+
+@pytest.mark.asyncio
+async def test_cancelled_and_other_instrument_gtts_do_not_fire(engine, placed):
+    gtt_id = engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [110.0], 100.0, [SELL])
+    engine.create(SINGLE, 'NSE', 'TCS', TOKEN + 1, [110.0], 100.0, [SELL])
+    assert engine.cancel(gtt_id)
+    assert not engine.cancel(gtt_id)
+
+    engine.on_ticks(ticks(115.0), 0.0)
+    await engine.drain()
+    assert placed == []
+    assert gtt_id not in engine.gtts
+    assert engine.history[-1]['status'] == CANCELLED
+    assert [gtt['tradingsymbol'] for gtt in engine.active()] == ['TCS']
+    assert list(engine._levels) == [TOKEN + 1]
+
+
+def test_cancel_removes_only_that_gtts_levels(engine):
+    first = engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [110.0], 100.0, [SELL])
+    second = engine.create(TWO_LEG, 'NSE', 'INFY', TOKEN, [90.0, 110.0], 100.0, [SELL, SELL])
+    engine.cancel(second)
+
+    levels = engine._levels[TOKEN]
+    assert [gtt_id for _, _, gtt_id, _ in levels.rising + levels.falling] == [first]
+    engine.cancel(first)
+    assert engine._levels == {}
+    assert len(engine._tokens) == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_order_marks_the_gtt():
+    async def place_order(**order):
+        return {'error': 'Insufficient funds'}
+
+    engine = GTTEngine(place_order)
+    gtt_id = engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [110.0], 100.0, [BUY])
+    engine.on_ticks(ticks(110.0), 0.0)
+    await engine.drain()
+    assert engine.history[-1]['id'] == gtt_id
+    assert engine.history[-1]['status'] == REJECTED
+    assert engine.stats()['triggered'] == 1
+
+
+def test_invalid_gtts_are_refused(engine):
+    with pytest.raises(ValueError):
+        engine.create('oco', 'NSE', 'INFY', TOKEN, [110.0], 100.0, [SELL])
+    with pytest.raises(ValueError):
+        engine.create(TWO_LEG, 'NSE', 'INFY', TOKEN, [110.0], 100.0, [SELL])
+    with pytest.raises(ValueError):
+        engine.create(TWO_LEG, 'NSE', 'INFY', TOKEN, [105.0, 110.0], 100.0, [SELL, SELL])
+    assert engine.gtts == {}
+
+
+def test_new_gtts_are_active(engine):
+    gtt_id = engine.create(SINGLE, 'NSE', 'INFY', TOKEN, [110.0], 100.0, [SELL])
+    assert engine.gtts[gtt_id]['status'] == ACTIVE
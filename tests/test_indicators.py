@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.config import config
+from app.indicators import INDICATORS, IndicatorState, compute
+
+
+def history(days, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return close, close * 1.01, close * 0.99, rng.integers(1000, 5000, days).astype(np.float64)
+
+
+def test_seed_and_peek_match_the_batch_computation():
+    close, high, low, volume = history(60)
+    state = IndicatorState()
+    row = state.seed('NSE:INFY', close[:-1], high[:-1], low[:-1], volume[:-1])
+
+    values = state.peek(np.array([row]), close[-1:], high[-1:], low[-1:], volume[-1:])
+    expected = compute(close, high, low, volume)
+    for name in INDICATORS:
+        assert values[name][0] == pytest.approx(expected[name][-1]), name
+
+
+def test_update_folds_bars_like_seeding_them():
+    close, high, low, volume = history(40)
+    rolled, seeded = IndicatorState(), IndicatorState()
+    rows = np.array([rolled.seed('NSE:INFY', close[:30], high[:30], low[:30], volume[:30])])
+    for i in range(30, 39):
+        rolled.update(rows, close[i:i + 1], high[i:i + 1], low[i:i + 1], volume[i:i + 1])
+    seeded.seed('NSE:INFY', close[:39], high[:39], low[:39], volume[:39])
+
+    bar = (close[-1:], high[-1:], low[-1:], volume[-1:])
+    left = rolled.peek(rows, *bar)
+    right = seeded.peek(np.array([seeded.row('NSE:INFY')]), *bar)
+    for name in INDICATORS:
+        assert left[name][0] == pytest.approx(right[name][0]), name
+
+
+def test_records_report_unavailable_values_as_none():
+    state = IndicatorState()
+    row = state.seed('NSE:NEW', *history(3))
+    record = state.records(state.peek(np.array([row]), *(a[-1:] for a in history(1))))[0]
+    assert record['sma'] is None
+    assert record['ema'] is not None
+
+
+def daily_candles(days):
+    close, high, low, volume = history(days)
+    first = date.today() - timedelta(days=days)
+    return [{'date': (first + timedelta(days=i)).isoformat(), 'open': c, 'high': h, 'low': l, 'close': c,
+             'volume': int(v)} for i, (c, h, l, v) in enumerate(zip(close, high, low, volume))]
+
+
+def quote(token):
+    return {'instrument_token': token, 'last_price': 101.0, 'volume': 1000,
+            'ohlc': {'open': 100.0, 'high': 102.0, 'low': 99.0, 'close': 100.0}}
+
+
+@pytest.mark.asyncio
+async def test_failed_seed_only_drops_that_instrument(agent, monkeypatch):
+    calls = []
+
+    async def fetch(instrument_token, start, end, interval):
+        calls.append(instrument_token)
+        if instrument_token == 2:
+            raise RuntimeError('boom')
+        return daily_candles(60)
+
+    monkeypatch.setattr(agent, '_fetch_historical_data', fetch)
+    quotes = {'NSE:A': quote(1), 'NSE:B': quote(2), 'NSE:C': quote(3)}
+
+    indicators = await agent._quote_indicators(quotes)
+    assert sorted(indicators) == ['NSE:A', 'NSE:C']
+    assert indicators['NSE:A']['sma'] is not None
+
+    # The failed instrument waits for INDICATOR_SEED_RETRY; the seeded ones are not fetched again
+    calls.clear()
+    assert sorted(await agent._quote_indicators(quotes)) == ['NSE:A', 'NSE:C']
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_seeding_is_capped_per_refresh(agent, monkeypatch):
+    async def fetch(instrument_token, start, end, interval):
+        return daily_candles(30)
+
+    monkeypatch.setattr(agent, '_fetch_historical_data', fetch)
+    quotes = {f'NSE:S{i}': quote(i + 1) for i in range(config.INDICATOR_SEEDS_PER_REFRESH + 2)}
+
+    assert len(await agent._quote_indicators(quotes)) == config.INDICATOR_SEEDS_PER_REFRESH
+    assert len(await agent._quote_indicators(quotes)) == len(quotes)
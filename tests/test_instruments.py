@@ -0,0 +1,99 @@
+import asyncio
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.instruments import InstrumentMaster
+from app.transport import ToolBackend
+
+
+def instrument(token, tradingsymbol, name, exchange='NSE', instrument_type='EQ'):
+    return {'instrument_token': token, 'exchange_token': token // 256, 'tradingsymbol': tradingsymbol,
+            'name': name, 'last_price': 0.0, 'expiry': '', 'strike': 0.0, 'tick_size': 0.05, 'lot_size': 1,
+            'instrument_type': instrument_type, 'segment': exchange, 'exchange': exchange}
+
+
+INSTRUMENTS = [
+    instrument(408065, 'INFY', 'Infosys'),
+    instrument(2953217, 'TCS', 'Tata Consultancy Services'),
+    instrument(884737, 'TATAMOTORS', 'Tata Motors'),
+    instrument(500209, 'INFY', 'Infosys', exchange='BSE'),
+    instrument(12345, 'NIFTY24DECFUT', 'Nifty', exchange='NFO', instrument_type='FUT'),
+]
+
+
+@pytest.fixture
+def master(tmp_path):
+    return InstrumentMaster.refresh(str(tmp_path), INSTRUMENTS, as_of='2026-10-19')
+
+
+def test_saved_master_maps_back_the_same_records(master):
+    assert len(master) == len(INSTRUMENTS)
+    assert master.as_of == '2026-10-19'
+    records = master.records(np.arange(len(master)))
+    assert [record['tradingsymbol'] for record in records] == [row['tradingsymbol'] for row in INSTRUMENTS]
+    assert records[1]['name'] == 'TATA CONSULTANCY SERVICES'
+    assert records[3]['exchange'] == 'BSE'
+
+
+def test_prefix_matches_come_before_fuzzy_ones(master):
+    names = [record['name'] for record in master.search('tata', 'name')]
+    assert sorted(names[:2]) == ['TATA CONSULTANCY SERVICES', 'TATA MOTORS']
+    symbols = [record['tradingsymbol'] for record in master.search('MOTRS', 'tradingsymbol')]
+    assert symbols == ['TATAMOTORS']
+    assert master.search('  ', 'name') == []
+
+
+def test_filter_by_category_columns(master):
+    rows = master.filter(exchange='nse', instrument_type='EQ')
+    assert [record['tradingsymbol'] for record in master.records(rows)] == ['INFY', 'TCS', 'TATAMOTORS']
+    assert len(master.filter(exchange='MCX')) == 0
+
+
+def test_refresh_replaces_the_previous_snapshot(tmp_path, master):
+    fresh = InstrumentMaster.refresh(str(tmp_path), INSTRUMENTS[:2], as_of='2026-10-20')
+
+    assert len(fresh) == 2
+    assert sorted(os.listdir(tmp_path)) == ['2026-10-20', 'CURRENT']
+    assert InstrumentMaster.open(str(tmp_path)).as_of == '2026-10-20'
+
+
+class DumpBackend(ToolBackend):
+    def __init__(self, instruments):
+        self.instruments = instruments
+        self.calls = 0
+
+    async def call(self, tool_name, **kwargs):
+        assert tool_name == 'd94_get_instruments'
+        self.calls += 1
+        await asyncio.sleep(0)
+        return {'status': 'success', 'data': self.instruments}
+
+
+@pytest.mark.asyncio
+async def test_agent_loads_the_master_once_a_day(agent):
+    backend = agent.backend = DumpBackend(INSTRUMENTS)
+    agent.is_logged_in = True
+
+    masters = await asyncio.gather(*(agent._get_instrument_master() for _ in range(5)))
+    assert backend.calls == 1
+    assert all(master is masters[0] for master in masters)
+    assert masters[0].as_of == date.today().isoformat()
+    assert await agent._instrument_token('BSE', 'infy') == 500209
+
+    agent._instrument_master_date = None  # Next day, same process: the stored snapshot is still today's
+    await agent._get_instrument_master()
+    assert backend.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_agent_keeps_the_previous_master_when_the_dump_is_empty(agent):
+    InstrumentMaster.refresh(agent.instrument_cache_dir, INSTRUMENTS, as_of='2026-01-01')
+    agent.backend = DumpBackend([])
+    agent.is_logged_in = True
+
+    master = await agent._get_instrument_master()
+    assert master.as_of == '2026-01-01'
+    assert len(await agent.get_instrument_universe('NSE', 'EQ')) == 3
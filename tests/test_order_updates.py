@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+from app.order_updates import (OrderUpdateStream, PostbackServer, QueueOrderUpdateSource,
+                               postback_checksum)
+
+SECRET = 'test-secret'
+
+
+def fill(order_id, status='COMPLETE', secret=SECRET):
+    update = {'order_id': order_id, 'exchange': 'NSE', 'tradingsymbol': 'INFY', 'transaction_type': 'BUY',
+              'status': status, 'quantity': 1, 'filled_quantity': 1, 'average_price': 1500.0,
+              'order_timestamp': '2026-10-19 10:00:00'}
+    update['checksum'] = postback_checksum(order_id, update['order_timestamp'], secret)
+    return update
+
+
+async def post(port, update):
+    body = json.dumps(update).encode()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(b"POST /postback HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.split(b' ', 2)[1].decode()
+
+
+@pytest.mark.asyncio
+async def test_postbacks_with_a_bad_checksum_are_rejected():
+    source = PostbackServer(api_secret=SECRET)
+    stream = OrderUpdateStream(source)
+    queue = stream.subscribe()
+    pump = asyncio.ensure_future(stream.run())
+    await source.listening.wait()
+    try:
+        assert await post(source.port, fill('1', secret='wrong')) == '403'
+        unsigned = fill('2')
+        del unsigned['checksum']
+        assert await post(source.port, unsigned) == '403'
+        assert await post(source.port, fill('3')) == '200'
+        update = await asyncio.wait_for(queue.get(), 1)
+    finally:
+        pump.cancel()
+    assert update['order_id'] == '3'
+    assert source.rejected == 2
+
+
+def test_unverified_server_only_binds_to_loopback():
+    with pytest.raises(ValueError):
+        PostbackServer(host='0.0.0.0', api_secret=None)
+    assert PostbackServer(host='127.0.0.1', api_secret=None).api_secret is None
+    assert PostbackServer(host='0.0.0.0', api_secret=SECRET).host == '0.0.0.0'
+
+
+@pytest.mark.asyncio
+async def test_updates_reach_the_order_book_before_subscribers(agent):
+    source = QueueOrderUpdateSource()
+    stream = OrderUpdateStream(source)
+    agent.attach_order_updates(stream)
+    pump = asyncio.ensure_future(stream.run())
+
+    waiter = asyncio.ensure_future(stream.wait_for('7', timeout=1))
+    await asyncio.sleep(0)
+    source.put(fill('7', status='OPEN'))
+    source.put(fill('7'))
+    update = await waiter
+    await source.close()
+    await pump
+
+    assert update['status'] == 'COMPLETE'
+    assert agent.order_book.get('7')['status'] == 'COMPLETE'
+    assert stream.stats()['updates'] == 2
@@ -0,0 +1,64 @@
+from app.orderbook import OrderBook
+
+
+def order(order_id, symbol='INFY', status='OPEN', timestamp='2026-10-18 10:00:00', **fields):
+    return dict(order_id=order_id, tradingsymbol=symbol, status=status, order_timestamp=timestamp, **fields)
+
+
+def ids(orders):
+    return [o['order_id'] for o in orders]
+
+
+def test_merge_returns_only_changed_orders():
+    book = OrderBook()
+    fetched = [order('1'), order('2', 'TCS')]
+
+    assert ids(book.merge(fetched, synced_at=1.0)) == ['1', '2']
+    assert book.merge([dict(o) for o in fetched]) == []
+    assert ids(book.merge([order('1', status='COMPLETE'), order('2', 'TCS')])) == ['1']
+    assert book.synced_at == 1.0
+    assert len(book) == 2
+
+
+def test_updates_move_orders_between_indexes():
+    book = OrderBook()
+    book.merge([order('1'), order('2')])
+    book.upsert(order('1', status='COMPLETE'))
+
+    assert ids(book.open_orders()) == ['2']
+    assert ids(book.query(status='COMPLETE')) == ['1']
+    assert book.get('1')['status'] == 'COMPLETE'
+
+
+def test_orders_without_an_id_are_ignored():
+    book = OrderBook()
+    assert not book.upsert({'status': 'OPEN'})
+    assert len(book) == 0
+
+
+def test_query_combines_filters_oldest_first():
+    book = OrderBook()
+    book.merge([
+        order('3', 'INFY', 'OPEN', '2026-10-18 09:30:00'),
+        order('1', 'INFY', 'COMPLETE', '2026-10-18 09:15:00'),
+        order('2', 'TCS', 'OPEN', '2026-10-18 09:20:00'),
+        order('4', 'INFY', 'TRIGGER PENDING', '2026-10-18 10:00:00'),
+    ])
+
+    assert ids(book.query()) == ['1', '2', '3', '4']
+    assert ids(book.query(symbol='INFY')) == ['1', '3', '4']
+    assert ids(book.open_orders('INFY')) == ['3', '4']
+    assert ids(book.query(status=['OPEN', 'COMPLETE'], symbol='INFY')) == ['1', '3']
+    assert ids(book.query(since='2026-10-18 09:20:00', until='2026-10-18 09:30:00')) == ['2', '3']
+    assert ids(book.query(symbol='INFY', since='2026-10-18 09:20:00')) == ['3', '4']
+    assert ids(book.query(symbol='INFY', limit=2)) == ['3', '4']
+    assert book.query(symbol='WIPRO') == []
+    assert ids(book.recent(2)) == ['3', '4']
+
+
+def test_timestamp_change_reorders_an_order():
+    book = OrderBook()
+    book.merge([order('1', timestamp='2026-10-18 09:15:00'), order('2', timestamp='2026-10-18 09:20:00')])
+    book.upsert(order('1', timestamp='2026-10-18 09:25:00'))
+
+    assert ids(book.query()) == ['2', '1']
@@ -0,0 +1,124 @@
+import pytest
+
+from app.paper import CANCELLED, COMPLETE, OPEN, REJECTED, TRIGGER_PENDING, PaperExchange
+
+INSTRUMENT = 'NSE:INFY'
+
+
+@pytest.fixture
+def exchange():
+    return PaperExchange(cash=1_000_000.0, prices={INSTRUMENT: 100.0})
+
+
+def place(exchange, transaction_type, quantity, order_type='LIMIT', price=None, trigger_price=None):
+    result = exchange.d94_place_order('NSE', 'INFY', transaction_type, quantity, 'MIS', order_type,
+                                      price=price, trigger_price=trigger_price)
+    return result['data']['order_id']
+
+
+def order(exchange, order_id):
+    return exchange.orders[order_id].to_dict()
+
+
+def fills(exchange, order_id):
+    return [(abs(quantity), price) for trade_order, _, quantity, price, _ in exchange.trades
+            if trade_order == order_id]
+
+
+def test_better_price_matches_first_then_earlier_order(exchange):
+    early = place(exchange, 'SELL', 5, price=101.0)
+    late = place(exchange, 'SELL', 5, price=101.0)
+    best = place(exchange, 'SELL', 5, price=100.5)
+
+    buy = place(exchange, 'BUY', 8, price=101.0)
+    assert fills(exchange, buy) == [(5, 100.5), (3, 101.0)]
+    assert order(exchange, best)['status'] == COMPLETE
+    assert order(exchange, early)['filled_quantity'] == 3
+    assert order(exchange, late)['filled_quantity'] == 0
+
+    place(exchange, 'BUY', 4, price=101.0)
+    assert order(exchange, early)['status'] == COMPLETE
+    assert order(exchange, late)['filled_quantity'] == 2
+
+
+def test_modified_order_loses_time_priority(exchange):
+    first = place(exchange, 'SELL', 5, price=101.0)
+    second = place(exchange, 'SELL', 5, price=101.0)
+    exchange.d94_modify_order(first, quantity=6)
+
+    place(exchange, 'BUY', 5, price=101.0)
+    assert order(exchange, second)['status'] == COMPLETE
+    assert order(exchange, first)['filled_quantity'] == 0
+
+
+def test_limit_order_beyond_the_market_rests(exchange):
+    buy = place(exchange, 'BUY', 10, price=99.0)
+    assert order(exchange, buy)['status'] == OPEN
+    assert exchange.blocked == pytest.approx(990.0)
+
+    exchange.update_price(INSTRUMENT, 98.5)
+    assert order(exchange, buy)['status'] == COMPLETE
+    assert fills(exchange, buy) == [(10, 99.0)]
+    assert exchange.blocked == pytest.approx(0.0)
+    assert exchange.cash == pytest.approx(1_000_000.0 - 990.0)
+
+
+def test_marketable_orders_fill_at_the_market(exchange):
+    market = place(exchange, 'BUY', 10, order_type='MARKET')
+    limit = place(exchange, 'SELL', 4, price=99.0)
+
+    assert fills(exchange, market) == [(10, 100.0)]
+    assert fills(exchange, limit) == [(4, 100.0)]
+    position = exchange.d94_get_positions()['data'][0]
+    assert position['quantity'] == 6
+
+
+def test_stop_orders_wait_for_their_trigger(exchange):
+    stop = place(exchange, 'SELL', 5, order_type='SL-M', trigger_price=95.0)
+    assert order(exchange, stop)['status'] == TRIGGER_PENDING
+
+    exchange.update_price(INSTRUMENT, 96.0)
+    assert order(exchange, stop)['status'] == TRIGGER_PENDING
+    exchange.update_price(INSTRUMENT, 94.0)
+    assert fills(exchange, stop) == [(5, 94.0)]
+
+
+def test_triggered_stop_limit_keeps_its_order_type(exchange):
+    stop = place(exchange, 'BUY', 5, order_type='SL', price=106.0, trigger_price=105.0)
+    exchange.update_price(INSTRUMENT, 107.0)
+
+    assert order(exchange, stop)['status'] == OPEN
+    assert order(exchange, stop)['order_type'] == 'SL'
+    assert exchange.orders[stop].triggered
+    exchange.update_price(INSTRUMENT, 105.5)
+    assert fills(exchange, stop) == [(5, 106.0)]
+
+
+def test_modifying_a_triggered_stop_does_not_rearm_it(exchange):
+    stop = place(exchange, 'BUY', 5, order_type='SL', price=106.0, trigger_price=105.0)
+    exchange.update_price(INSTRUMENT, 107.0)
+    exchange.d94_modify_order(stop, price=106.5)
+
+    assert order(exchange, stop)['status'] == OPEN
+    assert order(exchange, stop)['order_type'] == 'SL'
+    exchange.update_price(INSTRUMENT, 106.2)
+    assert fills(exchange, stop) == [(5, 106.5)]
+
+
+def test_cancelled_order_is_skipped_by_matching(exchange):
+    resting = place(exchange, 'SELL', 5, price=101.0)
+    exchange.d94_cancel_order(resting)
+    exchange.update_price(INSTRUMENT, 102.0)
+    buy = place(exchange, 'BUY', 5, price=101.0)
+
+    assert order(exchange, resting)['status'] == CANCELLED
+    assert fills(exchange, resting) == []
+    assert order(exchange, buy)['status'] == OPEN
+
+
+def test_invalid_orders_are_rejected(exchange):
+    assert exchange.d94_place_order('NSE', 'INFY', 'BUY', 5, 'MIS', 'LIMIT')['message'] == 'Price required'
+    assert exchange.d94_place_order('NSE', 'NEW', 'BUY', 5, 'MIS', 'MARKET')['message'] == 'No market price'
+    result = exchange.d94_place_order('NSE', 'INFY', 'BUY', 1_000_000, 'MIS', 'LIMIT', price=100.0)
+    assert result['message'] == 'Insufficient funds'
+    assert exchange.orders[result['data']['order_id']].status == REJECTED
@@ -0,0 +1,36 @@
+import pytest
+
+from app.portfolio import PortfolioArrays
+
+
+def holding(exchange, tradingsymbol, quantity, average_price, last_price):
+    return {'exchange': exchange, 'tradingsymbol': tradingsymbol, 'quantity': quantity,
+            'average_price': average_price, 'last_price': last_price,
+            'pnl': (last_price - average_price) * quantity}
+
+
+def test_reprice_keeps_listings_on_different_exchanges_apart():
+    arrays = PortfolioArrays([holding('NSE', 'INFY', 10, 100.0, 110.0), holding('BSE', 'INFY', 5, 100.0, 110.0)])
+    arrays.update_last_prices({'BSE:INFY': 120.0, 'NSE:TCS': 50.0})
+
+    assert arrays.last_price.tolist() == [110.0, 120.0]
+    assert arrays.pnl.tolist() == [100.0, 100.0]
+
+
+@pytest.mark.asyncio
+async def test_agent_reprices_its_holdings_from_quotes(agent):
+    holdings = {'data': [holding('NSE', 'INFY', 10, 100.0, 110.0)]}
+    before = agent._calculate_portfolio_metrics(holdings, {'data': []}, {'data': {}})
+    arrays = agent.portfolio_arrays
+
+    async def fetch(instruments):
+        return {'NSE:INFY': {'last_price': 120.0}}
+
+    agent._fetch_quotes = fetch
+    await agent.get_live_quotes(['NSE:INFY'])
+    after = agent._calculate_portfolio_metrics(holdings, {'data': []}, {'data': {}})
+
+    assert agent.portfolio_arrays is arrays
+    assert before['current_value'] == 1100.0
+    assert after['current_value'] == 1200.0
+    assert after['total_pnl'] == 200.0
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.quote_cache import QuoteCache
+
+
+def quote(instrument):
+    return {'instrument': instrument, 'last_price': 100.0}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch():
+    release = asyncio.Event()
+    calls = []
+
+    async def fetch(instruments):
+        calls.append(list(instruments))
+        await release.wait()
+        return {instrument: quote(instrument) for instrument in instruments}
+
+    cache = QuoteCache(ttl=60)
+    first = asyncio.ensure_future(cache.get(['NSE:INFY', 'NSE:TCS'], fetch))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(cache.get(['NSE:INFY'], fetch))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await first == {'NSE:INFY': quote('NSE:INFY'), 'NSE:TCS': quote('NSE:TCS')}
+    assert await second == {'NSE:INFY': quote('NSE:INFY')}
+    assert calls == [['NSE:INFY', 'NSE:TCS']]
+    assert cache.stats()['coalesced'] == 1
+
+
+@pytest.mark.asyncio
+async def test_only_missing_instruments_are_fetched():
+    calls = []
+
+    async def fetch(instruments):
+        calls.append(list(instruments))
+        return {instrument: quote(instrument) for instrument in instruments}
+
+    cache = QuoteCache(ttl=60)
+    await cache.get(['NSE:INFY'], fetch)
+    result = await cache.get(['NSE:INFY', 'NSE:TCS'], fetch)
+
+    assert list(result) == ['NSE:INFY', 'NSE:TCS']
+    assert calls == [['NSE:INFY'], ['NSE:TCS']]
+    assert cache.stats()['hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_releases_waiters():
+    release = asyncio.Event()
+
+    async def fetch(instruments):
+        await release.wait()
+        raise RuntimeError('quote service down')
+
+    cache = QuoteCache(ttl=60)
+    first = asyncio.ensure_future(cache.get(['NSE:INFY'], fetch))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(cache.get(['NSE:INFY'], fetch))
+    await asyncio.sleep(0)
+    release.set()
+
+    with pytest.raises(RuntimeError):
+        await first
+    assert await second == {}
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_expired_quotes_are_fetched_again():
+    calls = []
+
+    async def fetch(instruments):
+        calls.append(list(instruments))
+        return {instrument: quote(instrument) for instrument in instruments}
+
+    cache = QuoteCache(ttl=0)
+    await cache.get(['NSE:INFY'], fetch)
+    await cache.get(['NSE:INFY'], fetch)
+
+    assert calls == [['NSE:INFY'], ['NSE:INFY']]
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.ratelimit import BULK_LANE, INTERACTIVE_LANE, ORDER_LANE, RateLimiter, TokenBucket
+
+
+def test_bucket_bursts_to_capacity_then_refills():
+    bucket = TokenBucket(rate=4.0, capacity=2)
+    now = bucket.updated
+
+    assert bucket.try_take(now)
+    assert bucket.try_take(now)
+    assert not bucket.try_take(now)
+    assert bucket.wait_time(now) == pytest.approx(0.25)
+    assert not bucket.try_take(now + 0.125)
+    assert bucket.try_take(now + 0.3)
+
+
+def test_bucket_does_not_refill_beyond_capacity():
+    bucket = TokenBucket(rate=10.0, capacity=2)
+    bucket.try_take(bucket.updated)
+    later = bucket.updated + 60
+
+    assert bucket.try_take(later)
+    assert bucket.try_take(later)
+    assert not bucket.try_take(later)
+
+
+@pytest.mark.asyncio
+async def test_order_lane_overtakes_queued_bulk_requests():
+    limiter = RateLimiter({'default': 50.0}, window=0.02)
+    assert limiter.try_acquire('default', BULK_LANE)
+    served = []
+
+    async def request(name, lane):
+        await limiter.acquire('default', lane)
+        served.append(name)
+
+    tasks = [asyncio.ensure_future(request(f'bulk{i}', BULK_LANE)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(request('interactive', INTERACTIVE_LANE)))
+    tasks.append(asyncio.ensure_future(request('order', ORDER_LANE)))
+    await asyncio.gather(*tasks)
+
+    assert served == ['order', 'interactive', 'bulk0', 'bulk1', 'bulk2']
+    stats = limiter.stats()
+    assert stats['bulk']['requests'] == 4
+    assert stats['order']['queued_requests'] == 1
+
+
+@pytest.mark.asyncio
+async def test_try_acquire_does_not_jump_the_queue():
+    limiter = RateLimiter({'default': 1.0})
+    assert limiter.try_acquire('default')
+    waiter = asyncio.ensure_future(limiter.acquire('default', BULK_LANE))
+    await asyncio.sleep(0)
+    limiter._buckets['default'].tokens = 1.0  # Refilled, but the waiter was queued first
+
+    assert not limiter.try_acquire('default', ORDER_LANE)
+    waiter.cancel()
+
+
+@pytest.mark.asyncio
+async def test_endpoints_have_separate_buckets():
+    limiter = RateLimiter({'default': 1.0, 'order': 1.0})
+    assert limiter.try_acquire('default')
+    assert limiter.try_acquire('order')
+    assert not limiter.try_acquire('order')
+    # Unknown endpoints share the default bucket
+    assert not limiter.try_acquire('quote')
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_its_lane():
+    limiter = RateLimiter({'default': 1.0})
+    assert limiter.try_acquire('default')
+    waiter = asyncio.ensure_future(limiter.acquire('default', BULK_LANE))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert limiter.stats()['bulk']['depth'] == 0
+    assert limiter._queued['default'] == 0
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from app.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, Resilience
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_success()
+    assert breaker.failures == 0
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at = time.monotonic() - 60
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    breaker.state = OPEN
+    breaker.opened_at = time.monotonic() - 60
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_abandoned_trial_frees_the_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.opened_at = time.monotonic() - 60
+
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_call_retries_then_succeeds():
+    resilience = Resilience(max_retries=2, timeout=1, backoff_base=0.001, backoff_max=0.001)
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError('reset')
+        return 'ok'
+
+    assert await resilience.call('quotes', request) == 'ok'
+    assert resilience.stats()['quotes']['retries'] == 1
+    assert resilience.endpoints['quotes'].breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast():
+    resilience = Resilience(max_retries=0, timeout=1)
+    resilience._endpoint('quotes').breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        raise ConnectionError('down')
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await resilience.call('quotes', request)
+    with pytest.raises(CircuitOpenError):
+        await resilience.call('quotes', request)
+    assert len(attempts) == 2
+    assert resilience.stats()['quotes']['rejected'] == 1
+
+
+@pytest.mark.asyncio
+async def test_timeouts_count_as_failures():
+    resilience = Resilience(max_retries=0, timeout=0.01)
+
+    async def request():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await resilience.call('quotes', request)
+    assert resilience.endpoints['quotes'].breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_does_not_block_the_breaker():
+    resilience = Resilience(max_retries=0, timeout=1)
+    breaker = resilience._endpoint('quotes').breaker
+    breaker.state = OPEN
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+
+    async def acquire():
+        await asyncio.sleep(1)
+
+    async def request():
+        return 'ok'
+
+    call = asyncio.ensure_future(resilience.call('quotes', request, acquire=acquire))
+    await asyncio.sleep(0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert await resilience.call('quotes', request) == 'ok'
+    assert breaker.state == CLOSED
@@ -0,0 +1,119 @@
+import logging
+
+import pytest
+
+from app.risk import PreTradeRiskEngine
+
+
+@pytest.fixture
+def engine():
+    """₹1,00,000 portfolio: 10 INFY at ₹1,000 and ₹90,000 cash"""
+    engine = PreTradeRiskEngine(max_order_value=15_000, max_position_size=0.2, max_exposure=1.0,
+                                max_open_order_value=30_000)
+    engine.seed(
+        holdings={'data': [{'exchange': 'NSE', 'tradingsymbol': 'INFY', 'quantity': 10, 'last_price': 1000.0}]},
+        positions={'data': []},
+        margins={'data': {'equity': {'available': {'cash': 90_000.0}}}},
+    )
+    return engine
+
+
+def test_seed_sets_portfolio_totals(engine):
+    assert engine.portfolio_value == 100_000
+    assert engine.exposure == 10_000
+    assert engine.positions == {'NSE:INFY': 10}
+
+
+def test_quantity_must_be_positive(engine):
+    assert not engine.check('NSE:INFY', 'BUY', 0, 1000.0).allowed
+
+
+def test_position_size_limit(engine):
+    assert engine.check('NSE:INFY', 'BUY', 10, 1000.0).allowed
+    decision = engine.check('NSE:INFY', 'BUY', 11, 1000.0)
+    assert not decision.allowed
+    assert 'Position in NSE:INFY' in decision.reason
+
+
+def test_reducing_orders_skip_position_and_exposure_limits(engine):
+    engine.max_exposure = 0.01
+    assert engine.check('NSE:INFY', 'SELL', 10, 1000.0).allowed
+
+
+def test_exposure_limit(engine):
+    engine.max_exposure = 0.25
+    assert engine.check('NSE:TCS', 'BUY', 7, 2000.0).allowed
+    decision = engine.check('NSE:TCS', 'BUY', 8, 2000.0)
+    assert not decision.allowed
+    assert decision.reason.startswith('Exposure')
+
+
+def test_large_orders_need_confirmation(engine):
+    decision = engine.check('NSE:TCS', 'BUY', 10, 2000.0)
+    assert not decision.allowed
+    assert decision.requires_confirmation
+    assert engine.check('NSE:TCS', 'BUY', 10, 2000.0, confirmed=True).allowed
+
+
+def test_orders_without_a_price_skip_value_checks(engine, caplog):
+    with caplog.at_level(logging.WARNING, logger='app.risk'):
+        decision = engine.check('NSE:NEWLISTING', 'BUY', 1_000_000)
+    assert decision.allowed
+    assert 'No reference price for NSE:NEWLISTING' in caplog.text
+
+
+def test_reference_price_is_used_when_the_order_has_none(engine):
+    assert not engine.check('NSE:INFY', 'BUY', 11).allowed
+
+
+def test_basket_is_checked_against_its_own_reservations(engine):
+    # Each order passes on its own, but the basket exceeds the open-order limit
+    basket = [('NSE:A', 10), ('NSE:B', 10), ('NSE:C', 10), ('NSE:D', 10)]
+    assert all(engine.check(symbol, 'BUY', quantity, 1000.0).allowed for symbol, quantity in basket)
+
+    decisions = [engine.reserve(symbol, 'BUY', quantity, 1000.0) for symbol, quantity in basket]
+    assert [decision.allowed for decision in decisions] == [True, True, True, False]
+    assert 'Open order value' in decisions[3].reason
+    assert decisions[3].reservation is None
+    assert engine.open_order_value == 30_000
+
+
+def test_basket_orders_in_one_symbol_add_up(engine):
+    first = engine.reserve('NSE:INFY', 'BUY', 6, 1000.0)
+    second = engine.reserve('NSE:INFY', 'BUY', 6, 1000.0)
+    assert first.allowed
+    assert not second.allowed
+    assert engine.pending['NSE:INFY'] == 6
+
+
+def test_release_frees_a_reservation(engine):
+    decision = engine.reserve('NSE:A', 'BUY', 10, 1000.0)
+    engine.release(decision.reservation)
+
+    assert engine.open_order_value == 0
+    assert engine.pending['NSE:A'] == 0
+    assert not engine.orders
+
+
+def test_committed_reservation_tracks_fills_and_closing(engine):
+    decision = engine.reserve('NSE:INFY', 'BUY', 5, 1000.0)
+    engine.commit(decision.reservation, 'order1')
+    assert list(engine.orders) == ['order1']
+
+    engine.apply_order_update({'order_id': 'order1', 'status': 'OPEN', 'filled_quantity': 2,
+                               'average_price': 1000.0})
+    assert engine.positions['NSE:INFY'] == 12
+    assert engine.open_order_value == 3000
+
+    engine.apply_order_update({'order_id': 'order1', 'status': 'CANCELLED', 'filled_quantity': 2})
+    assert engine.open_order_value == 0
+    assert engine.pending['NSE:INFY'] == 0
+    assert not engine.orders
+
+
+def test_commit_without_an_order_id_releases(engine):
+    decision = engine.reserve('NSE:A', 'BUY', 10, 1000.0)
+    engine.commit(decision.reservation, None)
+
+    assert engine.open_order_value == 0
+    assert not engine.orders
@@ -0,0 +1,87 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.candle_cache import to_epoch
+from app.decoder import QUOTE_MODE, TICK_DTYPE, encode_frame, encode_packets
+from app.scanner import MarketScanner
+from app.streaming import TickSource, TickStream
+
+# tradingsymbol -> (instrument token, open, last price, previous close, volume)
+MARKET = {
+    'UP': (256 * 1 + 1, 101.0, 110.0, 100.0, 1000),
+    'DOWN': (256 * 2 + 1, 99.0, 90.0, 100.0, 1000),
+    'GAP': (256 * 3 + 1, 105.0, 102.0, 100.0, 1000),
+    'BUSY': (256 * 4 + 1, 100.0, 100.5, 100.0, 50000),
+    'FLAT': (256 * 5 + 1, 100.0, 100.0, 100.0, 1000),
+}
+
+
+def quote(token, open_, last, close, volume):
+    return {'instrument_token': token, 'last_price': last, 'volume': volume,
+            'ohlc': {'open': open_, 'high': max(open_, last), 'low': min(open_, last), 'close': close}}
+
+
+@pytest.fixture
+def scanner(agent):
+    requested = []
+
+    async def universe(exchange, instrument_type):
+        return [{'exchange': exchange, 'tradingsymbol': symbol, 'instrument_token': token}
+                for symbol, (token, *_) in MARKET.items()]
+
+    async def fetch(instruments):
+        requested.append(list(instruments))
+        return {instrument: quote(*MARKET[instrument.split(':')[1]]) for instrument in instruments}
+
+    agent.get_instrument_universe = universe
+    agent._fetch_quotes = fetch
+    scanner = MarketScanner(agent, top_k=2)
+    scanner.requested = requested
+    return scanner
+
+
+def symbols(rows):
+    return [row['instrument'].split(':')[1] for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_scan_ranks_the_universe(scanner):
+    result = await scanner.scan()
+
+    assert result['scanned'] == result['universe'] == 5
+    assert symbols(result['gainers']) == ['UP', 'GAP']
+    assert symbols(result['losers']) == ['DOWN']  # Only falling instruments rank as losers
+    assert symbols(result['gap_ups']) == ['GAP', 'UP']
+    assert symbols(result['volume_spikes'])[0] == 'BUSY'
+    assert result['gainers'][0]['change_percent'] == pytest.approx(10.0)
+
+
+@pytest.mark.asyncio
+async def test_volume_spikes_use_cached_daily_volume(agent, scanner):
+    token = MARKET['FLAT'][0]
+    first = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=5)
+    candles = [{'date': (first + timedelta(days=i)).isoformat(), 'open': 100.0, 'high': 100.0, 'low': 100.0,
+                'close': 100.0, 'volume': 10} for i in range(5)]
+    agent.candle_cache.store(token, 'day', candles, to_epoch(first), to_epoch(first) + 5 * 86400)
+
+    result = await scanner.scan()
+    assert symbols(result['volume_spikes']) == ['FLAT', 'BUSY']
+    assert result['volume_spikes'][0]['volume_ratio'] == pytest.approx(100.0)
+
+
+@pytest.mark.asyncio
+async def test_streamed_instruments_are_not_requested(agent, scanner):
+    ticks = np.zeros(2, dtype=TICK_DTYPE)
+    for tick, symbol in zip(ticks, ['UP', 'DOWN']):
+        token, open_, last, close, volume = MARKET[symbol]
+        tick['instrument_token'], tick['last_price'], tick['volume'] = token, last, volume
+        tick['open'], tick['high'], tick['low'], tick['close'] = open_, max(open_, last), min(open_, last), close
+    stream = TickStream(TickSource())
+    stream.ingest(encode_frame(encode_packets(ticks, QUOTE_MODE)))
+    agent.attach_stream(stream)
+
+    result = await scanner.scan()
+    assert sorted(scanner.requested[0]) == ['NSE:BUSY', 'NSE:FLAT', 'NSE:GAP']
+    assert symbols(result['gainers']) == ['UP', 'GAP']
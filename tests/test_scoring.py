@@ -0,0 +1,33 @@
+import math
+
+import numpy as np
+import pytest
+
+from app import scoring
+from app.utils import RiskManager
+
+NAN = math.nan
+
+
+@pytest.mark.parametrize('change_percent, volume, expected', [
+    (12.0, 50000, scoring.HIGH_RISK),
+    (-7.0, 50000, scoring.MEDIUM_RISK_VOLATILITY),
+    (1.0, 500, scoring.MEDIUM_RISK_LIQUIDITY),
+    (1.0, 50000, scoring.LOW_RISK),
+    (NAN, 50000, scoring.UNKNOWN_RISK),
+    (1.0, NAN, scoring.UNKNOWN_RISK),
+])
+def test_scalar_and_batch_risk_agree(change_percent, volume, expected):
+    assert scoring.risk_code(change_percent, volume) == expected
+    assert scoring.risk_codes(np.array([change_percent]), np.array([volume])).tolist() == [expected]
+
+
+def test_missing_data_is_never_low_risk():
+    assessment = RiskManager.get_risk_assessment(NAN, 50000)
+    assert assessment == scoring.RISK_LABELS[scoring.UNKNOWN_RISK]
+    assert 'Low Risk' not in assessment
+
+
+def test_missing_data_has_no_recommendation():
+    codes = scoring.recommendation_codes(np.array([NAN, 6.0]), np.array([200000, 200000]))
+    assert codes.tolist() == [scoring.INSUFFICIENT_DATA, scoring.STRONG_BULLISH]
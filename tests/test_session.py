@@ -0,0 +1,94 @@
+import asyncio
+import os
+import stat
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+from app.agent import ZerodhaAgent
+from app.config import config
+from app.session import IST, SessionStore, session_path, token_expiry
+from app.transport import ToolBackend
+
+
+def test_tokens_expire_at_six_the_next_morning():
+    evening = datetime(2026, 10, 19, 20, 0, tzinfo=IST).timestamp()
+    early = datetime(2026, 10, 19, 5, 0, tzinfo=IST).timestamp()
+    assert token_expiry(evening) == datetime(2026, 10, 20, config.SESSION_EXPIRY_HOUR, tzinfo=IST).timestamp()
+    assert token_expiry(early) == datetime(2026, 10, 19, config.SESSION_EXPIRY_HOUR, tzinfo=IST).timestamp()
+
+
+def test_saved_session_is_owner_only_and_loads_back(tmp_path):
+    store = SessionStore(os.path.join(tmp_path, 'private', 'session'))
+    store.save('token', 'AB1234')
+
+    assert store.load()['access_token'] == 'token'
+    if sys.platform != 'win32':
+        assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(os.path.dirname(store.path)).st_mode) == 0o700
+
+
+def test_expired_or_unreadable_sessions_are_ignored(tmp_path):
+    store = SessionStore(os.path.join(tmp_path, 'session'))
+    store.save('token', expires_at=time.time() - 1)
+    assert store.load() is None
+
+    with open(store.path, 'w') as f:
+        f.write('{not json')
+    assert store.load() is None
+    store.clear()
+    store.clear()
+    assert not os.path.exists(store.path)
+
+
+def test_each_account_has_its_own_session_file():
+    assert session_path() == config.SESSION_FILE
+    assert session_path('AB/12') != session_path('AB_13')
+    assert os.path.dirname(session_path('../evil')) == os.path.dirname(config.SESSION_FILE)
+
+
+class LoginBackend(ToolBackend):
+    """Counts logins; the first call with an expired token fails with a TokenException"""
+
+    def __init__(self, expire_once=False):
+        self.logins = 0
+        self.expire_once = expire_once
+        self.token = None
+
+    def set_session(self, access_token):
+        self.token = access_token
+
+    async def call(self, tool_name, **kwargs):
+        await asyncio.sleep(0)
+        if tool_name == 'd94_login':
+            self.logins += 1
+            return {'status': 'success', 'data': {'access_token': f'token{self.logins}', 'user_id': 'AB1234'}}
+        if self.expire_once:
+            self.expire_once = False
+            return {'status': 'error', 'error_type': 'TokenException', 'message': 'Token expired'}
+        return {'status': 'success', 'data': {'token': self.token}}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_login_and_reuse_it_later(agent):
+    backend = agent.backend = LoginBackend()
+    await asyncio.gather(*(agent.ensure_session() for _ in range(5)))
+    assert backend.logins == 1
+
+    restarted = ZerodhaAgent(session_file=agent.session_store.path)
+    restarted.backend = backend
+    await restarted.ensure_session()
+    assert backend.logins == 1
+    assert backend.token == 'token1'
+
+
+@pytest.mark.asyncio
+async def test_expired_token_logs_in_again_once(agent):
+    backend = agent.backend = LoginBackend(expire_once=True)
+    result = await agent._call('d94_get_profile')
+
+    assert result['data']['token'] == 'token2'
+    assert backend.logins == 2
+    assert agent.session_store.load()['access_token'] == 'token2'
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.decoder import LTP_MODE, QUOTE_MODE, TICK_DTYPE, encode_frame, encode_packets
+from app.streaming import FileTickSource, TickRingBuffer, TickSource, TickStream, encode_record
+
+TOKEN = 256 * 1000 + 1
+
+
+def frame(prices, mode=QUOTE_MODE, tokens=None):
+    ticks = np.zeros(len(prices), dtype=TICK_DTYPE)
+    ticks['instrument_token'] = tokens or [TOKEN + 256 * i for i in range(len(prices))]
+    ticks['last_price'] = prices
+    ticks['volume'] = 1000
+    ticks['open'] = ticks['high'] = ticks['low'] = ticks['close'] = 100.0
+    return encode_frame(encode_packets(ticks, mode))
+
+
+def test_ring_buffer_keeps_the_latest_ticks_per_instrument():
+    buffer = TickRingBuffer(max_instruments=1, size=3)
+    for price in [1.0, 2.0, 3.0, 4.0]:
+        buffer.append(TOKEN, timestamp=price, last_price=price)
+    buffer.append(TOKEN + 256, last_price=9.0)  # No row left for a second instrument
+
+    assert buffer.latest(TOKEN)['last_price'] == 4.0
+    assert buffer.history(TOKEN)['last_price'].tolist() == [2.0, 3.0, 4.0]
+    assert buffer.latest(TOKEN + 256) is None
+    assert buffer.dropped == 1
+
+
+def test_stream_quotes_the_latest_tick_of_each_instrument():
+    stream = TickStream(TickSource())
+    stream.ingest(frame([101.0, 50.0]))
+    stream.ingest(frame([102.0], tokens=[TOKEN]))
+
+    quotes = stream.quotes({TOKEN: 'NSE:INFY', TOKEN + 256: 'NSE:TCS', TOKEN + 512: 'NSE:SBIN'})
+    assert {symbol: quote['last_price'] for symbol, quote in quotes.items()} == {
+        'NSE:INFY': 102.0, 'NSE:TCS': 50.0}
+    assert stream.stats()['ticks'] == 3
+    assert stream.idle() < 60
+
+
+@pytest.mark.asyncio
+async def test_recorded_frames_replay_through_subscribers(tmp_path):
+    path = tmp_path / 'ticks.bin'
+    path.write_bytes(b''.join(encode_record(frame([100.0 + i])) for i in range(5)))
+    stream = TickStream(FileTickSource(str(path)))
+    queue = stream.subscribe([TOKEN])
+
+    await stream.run()
+    assert queue.qsize() == 5
+    assert stream.buffer.history(TOKEN)['last_price'].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+@pytest.mark.asyncio
+async def test_live_quotes_come_from_the_stream_once_the_token_is_known(agent, monkeypatch):
+    fetched = []
+
+    async def fetch(instruments):
+        fetched.append(list(instruments))
+        return {instrument: {'instrument_token': TOKEN + 256 * i, 'last_price': 90.0,
+                             'ohlc': {'open': 90.0, 'high': 90.0, 'low': 90.0, 'close': 90.0}}
+                for i, instrument in enumerate(instruments)}
+
+    agent._fetch_quotes = fetch
+    agent.quote_cache.ttl = 0
+    stream = TickStream(TickSource())
+    agent.attach_stream(stream)
+    stream.ingest(frame([101.0]))
+    stream.ingest(frame([55.0], mode=LTP_MODE, tokens=[TOKEN + 256]))
+
+    first = await agent.get_live_quotes(['NSE:INFY', 'NSE:TCS'])
+    assert first['NSE:INFY']['last_price'] == 90.0  # Token not known yet
+
+    quotes = await agent.get_live_quotes(['NSE:INFY', 'NSE:TCS'])
+    assert quotes['NSE:INFY']['last_price'] == 101.0
+    assert quotes['NSE:TCS']['last_price'] == 90.0  # LTP ticks lack the day's range
+    assert fetched[-1] == ['NSE:TCS']
+    assert agent.risk_engine.prices['NSE:INFY'] == 101.0
+
+    monkeypatch.setattr(stream, 'last_received', stream.last_received - 60)
+    stale = await agent.get_live_quotes(['NSE:INFY'])
+    assert stale['NSE:INFY']['last_price'] == 90.0
@@ -0,0 +1,70 @@
+import pytest
+
+from app.paper import PaperExchange
+from app.transport import AiohttpToolBackend, MockToolServer
+
+aiohttp = pytest.importorskip('aiohttp')
+
+
+class Tools:
+    def d94_echo(self, **kwargs):
+        return {'status': 'success', 'data': kwargs}
+
+    def d94_fail(self, **kwargs):
+        raise RuntimeError('tool crashed')
+
+    def helper(self):
+        return {'status': 'success'}
+
+
+@pytest.mark.asyncio
+async def test_calls_reuse_pooled_connections():
+    server = MockToolServer(Tools())
+    backend = AiohttpToolBackend(await server.start())
+    try:
+        for i in range(5):
+            assert (await backend.call('d94_echo', n=i))['data'] == {'n': i}
+        stats = backend.stats()
+    finally:
+        await backend.close()
+        await server.close()
+    assert stats['requests'] == 5
+    assert stats['connections_created'] == 1
+    assert stats['connections_reused'] == 4
+
+
+@pytest.mark.asyncio
+async def test_error_bodies_are_results_and_server_errors_raise():
+    server = MockToolServer(Tools())
+    backend = AiohttpToolBackend(await server.start())
+    try:
+        assert (await backend.call('d94_missing'))['message'] == 'Unknown tool'
+        assert (await backend.call('helper'))['message'] == 'Unknown tool'  # Only d94_ methods are tools
+        with pytest.raises(aiohttp.ClientResponseError):
+            await backend.call('d94_fail')
+    finally:
+        await backend.close()
+        await server.close()
+
+
+def test_session_token_becomes_the_authorization_header():
+    backend = AiohttpToolBackend('http://127.0.0.1:1/')
+    backend.set_session('abc')
+    assert backend.headers['Authorization'] == 'token abc'
+    assert backend.base_url == 'http://127.0.0.1:1'
+    backend.set_session(None)
+    assert 'Authorization' not in backend.headers
+
+
+@pytest.mark.asyncio
+async def test_agent_trades_against_a_paper_exchange_over_http(agent):
+    server = MockToolServer(PaperExchange(prices={'NSE:INFY': 100.0}))
+    await agent.use_backend(AiohttpToolBackend(await server.start()))
+    try:
+        placed = await agent.place_order('NSE', 'INFY', 'BUY', 5, 'MARKET', 'MIS')
+        orders = await agent.get_orders()
+    finally:
+        await agent.close()
+        await server.close()
+    assert placed['status'] == 'success'
+    assert [(order['order_id'], order['status']) for order in orders] == [(placed['data']['order_id'], 'COMPLETE')]